@@ -1,4 +1,4 @@
-INPUT_FILE = {'filename': {'name': 'input.xlsx'},
+INPUT_FILE = {'filename': {'name': 'Input.xlsx'},
               'sheet_feed_lib': {'name': 'Feed Library',
                                  'headers': [
                                      'ID',
@@ -52,3 +52,20 @@ INPUT_FILE = {'filename': {'name': 'input.xlsx'},
               }
 OUTPUT_FILE = 'output.xlsx'
 SOLVER = 'HiGHS'
+N_WORKERS = 1  # processes solving scenarios in parallel, overridden by run.py --workers
+RESUME = False  # skip scenarios completed by an interrupted run, overridden by run.py --resume
+WORKSPACE = None  # folder for partial results, None creates a unique one per run (run.py --workspace)
+SHARD = None  # "i/N" solves only the i-th of N slices of the Scenario sheet (run.py --shard)
+SHARD_MODE = 'hash'  # 'hash' or 'range' split of Identifier groups between shards (run.py --shard-mode)
+SCENARIO_TIME_BUDGET = None  # seconds per scenario, then its best-so-far solution is kept (run.py --scenario-budget)
+RUN_TIME_BUDGET = None  # seconds for the whole run, remaining scenarios are not started (run.py --run-budget)
+GRID = None  # factorial grid replacing the Scenario rows, e.g. {'base': 4, 'parameters': {'SBW': [300, 350]}}
+# or {'base': 4, 'sheet': 'Grid'}, see model/grid.py (run.py --grid)
+INCREMENTAL = False  # True or an Output folder to carry over results of unchanged scenarios (run.py --incremental)
+WARM_START = False  # True or an Output folder whose optimal CNEm starts each scenario's search (run.py --warm-start)
+WARM_WINDOW = 0.1  # half width [Mcal/kg] of the CNEm window searched around a previous optimum (run.py --warm-window)
+BRACKETING = 'bisection'  # 'bisection' finds the feasible CNEm edges in O(log(range/Tol)) solves, 'scan' steps by Tol
+EVALUATION_CACHE = None  # CNEm evaluations memoized per scenario (LRU), None keeps all of them, 0 disables the cache
+OBJECTIVE_TOL = 0.01  # BRENT stops when the objective [US$] changes less than this over its last evaluations
+OBJECTIVE_RTOL = 0.0  # ... or less than this fraction of the best objective, 0 disables the relative rule
+SERVER_ADDRESS = '127.0.0.1:8765'  # listening address of the quote server (run.py --serve)
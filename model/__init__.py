@@ -1,4 +1,6 @@
 from model import diet
 from config import *
 
-diet.config(INPUT_FILE, OUTPUT_FILE)
\ No newline at end of file
+diet.config(INPUT_FILE, OUTPUT_FILE, N_WORKERS, RESUME, WORKSPACE, SHARD, SHARD_MODE,
+            SCENARIO_TIME_BUDGET, RUN_TIME_BUDGET, GRID, INCREMENTAL,
+            WARM_START, WARM_WINDOW, BRACKETING, EVALUATION_CACHE, OBJECTIVE_TOL, OBJECTIVE_RTOL)
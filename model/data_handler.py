@@ -1,4 +1,7 @@
 from typing import NamedTuple
+import copy
+import hashlib
+import json
 import pandas
 import logging
 
@@ -28,6 +31,22 @@ def mask(df, key, value):
         return df[df[key].isin(value)]
 
 
+def to_data_frame(table, headers):
+    """ Convert DataFrame, dict or 2D array into a DataFrame with the given headers """
+    if isinstance(table, pandas.DataFrame):
+        return table.copy()
+    if isinstance(table, dict):
+        return pandas.DataFrame(table, columns=headers)
+    return pandas.DataFrame(list(table), columns=headers)
+
+
+def _digest(values):
+    """sha256 of values as json, numpy scalars as their python value"""
+    def builtin(value):
+        return value.item() if hasattr(value, "item") else str(value)
+    return hashlib.sha256(json.dumps(values, default=builtin).encode("utf-8")).hexdigest()
+
+
 def unwrap_list(nested_list):
     new_list = []
     for sublist in nested_list:
@@ -102,6 +121,8 @@ class Data:
     data_feed_scenario: pandas.DataFrame = None  # Feeds
     data_scenario: pandas.DataFrame = None  # Scenario
 
+    _feeds_fingerprints = None  # {feed scenario: digest of its Feeds and Feed Library rows}
+
 
     def __init__(self,
                  filename,
@@ -114,15 +135,34 @@ class Data:
         :param sheet_* : {'name', 'headers'}
         """
         excel_file = pandas.ExcelFile(filename['name'])
+        self._load(pandas.read_excel(excel_file, sheet_feed_lib['name']),
+                   pandas.read_excel(excel_file, sheet_feeds['name']),
+                   pandas.read_excel(excel_file, sheet_scenario['name']),
+                   sheet_feed_lib, sheet_feeds, sheet_scenario)
+
+    @classmethod
+    def from_frames(cls, feed_lib, feeds, scenario, sheet_feed_lib, sheet_feeds, sheet_scenario):
+        """
+        Build data set from in-memory tables instead of an Excel file
+        :param feed_lib, feeds, scenario : pandas.DataFrame, dict {header: column} or list of records, or 2D array
+        :param sheet_* : {'name', 'headers'}
+        """
+        data = cls.__new__(cls)
+        data._load(to_data_frame(feed_lib, sheet_feed_lib['headers']),
+                   to_data_frame(feeds, sheet_feeds['headers']),
+                   to_data_frame(scenario, sheet_scenario['headers']),
+                   sheet_feed_lib, sheet_feeds, sheet_scenario)
+        return data
+
+    def _load(self, data_feed_lib, data_feed_scenario, data_scenario, sheet_feed_lib, sheet_feeds, sheet_scenario):
         # TODO: Be sure that everything is on the same order
 
         # Feed Library Sheet
-        data_feed_lib = pandas.read_excel(excel_file, sheet_feed_lib['name'])
         self.headers_feed_lib = self.IngredientProperties(*(list(data_feed_lib)))
         data_feed_lib.astype({self.headers_feed_lib.s_ID: 'int64'}).dtypes
 
         # Feeds scenarios
-        self.data_feed_scenario = pandas.read_excel(excel_file, sheet_feeds['name'])
+        self.data_feed_scenario = data_feed_scenario
         self.headers_feed_scenario = self.ScenarioFeedProperties(*(list(self.data_feed_scenario)))
         self.data_feed_scenario.astype({self.headers_feed_scenario.s_ID: 'int64'}).dtypes
 
@@ -137,7 +177,7 @@ class Data:
         # TODO Check if all ingredients exist in the library.
 
         # Sheet Scenario
-        self.data_scenario = pandas.read_excel(excel_file, sheet_scenario['name'])
+        self.data_scenario = data_scenario
         self.headers_scenario = self.ScenarioParameters(*(list(self.data_scenario)))
         self.data_scenario.astype({self.headers_scenario.s_id: 'int64'}).dtypes
 
@@ -160,6 +200,53 @@ class Data:
         # Saving info in the log
         logging.info("\n\nAll data read")
 
+    def with_prices(self, feed_scenario, prices):
+        """
+        Shallow copy of the data set with new ingredient costs in one feed scenario
+        :param feed_scenario: Feed Scenario whose costs are replaced
+        :param prices: {ingredient ID: cost [US$/kg AF]}
+        """
+        data = copy.copy(self)
+        feeds = self.data_feed_scenario.copy()
+        headers = self.headers_feed_scenario
+        for ingredient_id, cost in prices.items():
+            rows = (feeds[headers.s_feed_scenario] == int(feed_scenario)) & (feeds[headers.s_ID] == int(ingredient_id))
+            if not rows.any():
+                raise KeyError("Ingredient {0} not in feed scenario {1}".format(ingredient_id, feed_scenario))
+            feeds.loc[rows, headers.s_feed_cost] = float(cost)
+        data.data_feed_scenario = feeds
+        data._feeds_fingerprints = None
+        return data
+
+    def scenario_fingerprint(self, parameters):
+        """
+        Digest of the inputs of a scenario: its Scenario row, the Feeds rows of its feed scenario and the
+        Feed Library rows of those ingredients
+        :param parameters: scenario parameter dict
+        :return: hex str
+        """
+        feeds_digest = self.feeds_fingerprint(parameters[self.headers_scenario.s_feed_scenario])
+        return _digest([[parameters[header] for header in self.headers_scenario], feeds_digest])
+
+    def feeds_fingerprint(self, feed_scenario):
+        """
+        Digest of the Feeds rows of a feed scenario and the Feed Library rows of its ingredients
+        :return: hex str
+        """
+        if self._feeds_fingerprints is None:
+            self._feeds_fingerprints = {}
+        feeds_digest = self._feeds_fingerprints.get(feed_scenario)
+        if feeds_digest is None:
+            feeds = self.sort_df(self.filter_column(self.data_feed_scenario, self.headers_feed_scenario.s_feed_scenario,
+                                                    feed_scenario),
+                                 self.headers_feed_scenario.s_ID)
+            ingredient_ids = [int(i) for i in feeds[self.headers_feed_scenario.s_ID]]
+            feed_lib = self.sort_df(self.filter_column(self.data_feed_lib, self.headers_feed_lib.s_ID, ingredient_ids),
+                                    self.headers_feed_lib.s_ID)
+            feeds_digest = _digest([feeds.values.tolist(), feed_lib.values.tolist()])
+            self._feeds_fingerprints[feed_scenario] = feeds_digest
+        return feeds_digest
+
     def datasets(self):
         """
         Return datasets
@@ -1,13 +1,35 @@
 from model import data_handler
 import pandas
+import time
+import zlib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 
-from model.output_handler import Output
-from model.lp_model import model_factory
-from optimizer.numerical_methods import Searcher, Status, Algorithms
+from model.output_handler import Output, read_manifest
+from model.lp_model import model_factory, ModelTemplates, SharedResults
+from model import grid as scenario_grid
+from optimizer.numerical_methods import Searcher, Status, Algorithms, SearchTimeout
 import logging
 
 INPUT = {}
 OUTPUT = None
+N_WORKERS = 1
+RESUME = False
+WORKSPACE = None
+SHARD = None
+SHARD_MODE = "hash"
+SCENARIO_TIME_BUDGET = None
+RUN_TIME_BUDGET = None
+GRID = None
+INCREMENTAL = False
+WARM_START = False
+WARM_WINDOW = 0.1
+BRACKETING = "bisection"
+EVALUATION_CACHE = None
+OBJECTIVE_TOL = 0.01
+OBJECTIVE_RTOL = 0.0
+
+_worker_diet = None
 
 
 class Diet:
@@ -19,59 +41,409 @@ class Diet:
     headers_scenario: data_handler.Data.ScenarioParameters = None  # Scenario
     data_batch: pandas.DataFrame = None  # Scenario
 
-    @staticmethod
-    def initialize(msg):
-        global _output, ds, data_scenario, headers_scenario, data_batch, headers_batch
-        _output = Output()
-        ds = data_handler.Data(**INPUT)
-        data_scenario = ds.data_scenario
-        headers_scenario = ds.headers_scenario
+    n_workers = None
+    resume = False
+    workspace = None
+    shard = None
+    shard_mode = None
+    scenario_time_budget = None
+    run_time_budget = None
+    deadline = None
+    grid = None
+    shared: SharedResults = None
+    templates: ModelTemplates = None
+    incremental = False
+    warm_start = False
+    warm_window = None
+    bracketing = None
+    evaluation_cache = None
+    objective_tol = None
+    objective_rtol = None
+
+    def __init__(self, n_workers=None, resume=None, workspace=None, shard=None, shard_mode=None,
+                 scenario_time_budget=None, run_time_budget=None, grid=None, incremental=None,
+                 warm_start=None, warm_window=None, bracketing=None, evaluation_cache=None,
+                 objective_tol=None, objective_rtol=None):
+        """
+        :param n_workers: number of processes used to solve scenarios, defaults to config.N_WORKERS
+        :param resume: skip scenarios completed by an interrupted run, defaults to config.RESUME
+        :param workspace: folder for partial results of this run, defaults to config.WORKSPACE (unique if None)
+        :param shard: "i/N" to solve only the i-th (0 <= i < N) slice of the scenarios, defaults to config.SHARD
+        :param shard_mode: {"hash", "range"} how scenario IDs are split, defaults to config.SHARD_MODE
+        :param scenario_time_budget: seconds a scenario may search before its best-so-far solution is reported,
+            defaults to config.SCENARIO_TIME_BUDGET (None: no limit)
+        :param run_time_budget: seconds after which no scenario is started or continued,
+            defaults to config.RUN_TIME_BUDGET (None: no limit)
+        :param grid: factorial grid spec replacing the Scenario rows, see grid.py, defaults to config.GRID
+        :param incremental: output folder of a previous run (True: the latest one) whose results are carried over
+            for scenarios with unchanged inputs, defaults to config.INCREMENTAL
+        :param warm_start: output folder of a previous run (True: the latest one) whose optimal CNEm is used to
+            search only a window around it, defaults to config.WARM_START
+        :param warm_window: half width of the CNEm window searched around a previous optimum,
+            defaults to config.WARM_WINDOW
+        :param bracketing: {"bisection", "scan"} how the feasible CNEm edges are found, defaults to config.BRACKETING
+        :param evaluation_cache: CNEm evaluations memoized per scenario (None: all, 0: none),
+            defaults to config.EVALUATION_CACHE
+        :param objective_tol: objective change [currency] small enough for BRENT to stop, defaults to
+            config.OBJECTIVE_TOL
+        :param objective_rtol: the same relative to the best objective, defaults to config.OBJECTIVE_RTOL
+        """
+        if n_workers is None:
+            n_workers = N_WORKERS
+        if resume is None:
+            resume = RESUME
+        if workspace is None:
+            workspace = WORKSPACE
+        self.n_workers = max(1, int(n_workers))
+        self.resume = resume
+        self.workspace = workspace
+        if shard is None:
+            shard = SHARD
+        if shard_mode is None:
+            shard_mode = SHARD_MODE
+        self.shard = parse_shard(shard)
+        self.shard_mode = shard_mode
+        if scenario_time_budget is None:
+            scenario_time_budget = SCENARIO_TIME_BUDGET
+        if run_time_budget is None:
+            run_time_budget = RUN_TIME_BUDGET
+        self.scenario_time_budget = scenario_time_budget
+        self.run_time_budget = run_time_budget
+        if grid is None:
+            grid = GRID
+        self.grid = grid
+        if grid is not None:
+            self.shared = SharedResults()
+        self.templates = ModelTemplates()
+        if incremental is None:
+            incremental = INCREMENTAL
+        self.incremental = incremental
+        if warm_start is None:
+            warm_start = WARM_START
+        if warm_window is None:
+            warm_window = WARM_WINDOW
+        self.warm_start = warm_start
+        self.warm_window = warm_window
+        if bracketing is None:
+            bracketing = BRACKETING
+        self.bracketing = bracketing
+        if evaluation_cache is None:
+            evaluation_cache = EVALUATION_CACHE
+        self.evaluation_cache = evaluation_cache
+        if objective_tol is None:
+            objective_tol = OBJECTIVE_TOL
+        if objective_rtol is None:
+            objective_rtol = OBJECTIVE_RTOL
+        self.objective_tol = objective_tol
+        self.objective_rtol = objective_rtol
+
+    @classmethod
+    def from_data(cls, feed_lib, feeds, scenario, input_info=None, n_workers=1):
+        """
+        Build a Diet straight from in-memory tables, without Excel input or output folders
+        :param feed_lib: Feed Library as DataFrame, dict or 2D array
+        :param feeds: Feeds as DataFrame, dict or 2D array
+        :param scenario: Scenario as DataFrame, dict or 2D array
+        :param input_info: same structure as config.INPUT_FILE, defaults to the configured one
+        :param n_workers: number of processes used to solve scenarios
+        """
+        if input_info is None:
+            input_info = INPUT
+        diet = cls(n_workers=n_workers, resume=False, incremental=False, warm_start=False)
+        # None falls back to the config globals in __init__, an in-memory run neither expands a grid nor
+        # selects a shard or reads and writes run folders
+        diet.workspace = None
+        diet.shard = None
+        diet.grid = None
+        diet.shared = None
+        diet._set_data(data_handler.Data.from_frames(feed_lib, feeds, scenario,
+                                                     sheet_feed_lib=input_info['sheet_feed_lib'],
+                                                     sheet_feeds=input_info['sheet_feeds'],
+                                                     sheet_scenario=input_info['sheet_scenario']))
+        return diet
+
+    def initialize(self, msg):
+        self._output = Output(resume=self.resume, workspace=self.workspace)
+        self.load_data(msg)
+
+    def load_data(self, msg):
+        """Read input file, without preparing an output workspace"""
+        self._set_data(data_handler.Data(**INPUT))
         logging.info(msg)
 
+    def _set_data(self, data):
+        self.ds = data
+        self.data_scenario = data.data_scenario
+        self.headers_scenario = data.headers_scenario
+
     def run(self):
+        """Optimize all scenarios and store results in the output folder"""
         logging.info("Iterating through scenarios")
-        results = {}
-        for scenario in data_scenario.values:
-
-            parameters = dict(zip(headers_scenario, scenario))
-            if parameters[headers_scenario.s_id] < 0:
+        shard_scenarios = self.shard_scenarios(self.scenarios())
+        self._output.discard_stale({parameters[self.headers_scenario.s_id]: self.ds.scenario_fingerprint(parameters)
+                                    for parameters in shard_scenarios})
+        scenarios = [parameters for parameters in shard_scenarios
+                     if not self._output.is_completed(parameters[self.headers_scenario.s_id])]
+        if self.incremental:
+            scenarios = self.carry_over(scenarios)
+        warm_starts = self.warm_starts() if self.warm_start else {}
+        unsolved = 0
+        for parameters, result in zip(scenarios, self.__results(scenarios, warm_starts)):
+            if result is None:
+                result = (None, None)
+            if result[0] == Status.EMPTY:
+                logging.warning("Run deadline reached, scenario {} not solved".format(
+                    parameters[self.headers_scenario.s_id]))
+                unsolved += 1
                 continue
+            self.store_results(parameters, *result)
+
+        if unsolved > 0:
+            # storing would remove the checkpoint, the workspace is kept for --resume to solve the rest
+            self._output.release()
+            logging.warning("{0} scenarios not solved, finish the run with --resume --workspace {1}".format(
+                unsolved, self._output.temp_dir))
+            return
 
-            logging.info("Current Scenario:")
-            logging.info("{}".format(parameters))
+        suffix, info = "", {"shard": None}
+        if self.shard is not None:
+            suffix = "_shard{0}of{1}".format(*self.shard)
+            info = {"shard": list(self.shard), "shard_mode": self.shard_mode}
+        if self.grid is not None:
+            info["grid"] = self.grid
+            if len(shard_scenarios) > 0:
+                self._output.save_as_csv(name="grid_index" + suffix, solution=shard_scenarios)
+            if self.shared.hits + self.shared.misses > 0:
+                logging.info("Shared LP results: {0} hits, {1} misses".format(self.shared.hits, self.shared.misses))
+        if self.templates.hits + self.templates.misses > 0:
+            logging.info("Model templates: {0} hits, {1} misses".format(self.templates.hits, self.templates.misses))
+        self._output.store(INPUT['filename']['name'], suffix=suffix, info=info)
 
-            logging.info("Initializing model")
-            model = model_factory(ds, parameters)
-            logging.info("Initializing numerical methods")
-            optimizer = Searcher(model)
+        logging.info("END")
+
+    def carry_over(self, scenarios):
+        """
+        Copy the results of scenarios whose inputs did not change from the previous run's output folder
+        :return: scenarios that still have to be solved
+        """
+        directory, manifest = previous_output(self.incremental)
+        if manifest is None:
+            logging.warning("No previous run to compare with, solving all scenarios")
+            return scenarios
+        previous = manifest["scenarios"]
 
-            # TODO Implement Sensitivity Analysis: sensitivity.py
+        # results are stored by Identifier, so scenarios sharing one are carried over or solved together
+        groups = {}
+        for parameters in scenarios:
+            groups.setdefault(str(parameters[self.headers_scenario.s_identifier]), []).append(parameters)
+        previous_groups = {}
+        for s_id, record in previous.items():
+            previous_groups.setdefault(record["identifier"], set()).add(s_id)
 
-            if parameters[headers_scenario.s_algorithm] == "GSS":
-                msg = "Golden-Section Search algorithm"
-            elif parameters[headers_scenario.s_algorithm] == "BF":
-                msg = "Brute Force algorithm"
-            else:
-                logging.error("Algorithm {} not found, scenario skipped".format(
-                    parameters[headers_scenario.s_algorithm]))
+        to_solve = set()
+        for name, group in groups.items():
+            fingerprints = {str(parameters[self.headers_scenario.s_id]): self.ds.scenario_fingerprint(parameters)
+                            for parameters in group}
+            # timed out results depend on the machine load, they get another chance
+            unchanged = previous_groups.get(name) == set(fingerprints.keys()) and \
+                all(previous[s_id].get("fingerprint") == fingerprint and
+                    previous[s_id]["status"] != Status.TIMED_OUT.name
+                    for s_id, fingerprint in fingerprints.items())
+            if not unchanged:
+                to_solve.update(fingerprints.keys())
                 continue
+            for s_id, fingerprint in fingerprints.items():
+                self._output.carry_over(directory, s_id, name, previous[s_id]["status"], fingerprint,
+                                        previous[s_id].get("optimum"))
+        logging.info("Incremental run from {0}: {1} of {2} scenarios changed".format(
+            directory, len(to_solve), len(scenarios)))
+        return [parameters for parameters in scenarios if str(parameters[self.headers_scenario.s_id]) in to_solve]
 
-            tol = parameters[headers_scenario.s_tol]
-            lb = parameters[headers_scenario.s_lb]
-            ub = parameters[headers_scenario.s_ub]
-            lb, ub = self.refine_bounds(optimizer, parameters)
-            if lb is None:
+    def warm_starts(self):
+        """Optimal CNEm of each scenario in the previous run, {scenario ID (str): CNEm}"""
+        directory, manifest = previous_output(self.warm_start)
+        if manifest is None:
+            logging.warning("No previous run to warm start from, searching the whole CNEm domain")
+            return {}
+        logging.info("Warm start from {}".format(directory))
+        return {s_id: record["optimum"] for s_id, record in manifest["scenarios"].items()
+                if record.get("optimum") is not None}
+
+    def solve(self):
+        """
+        Optimize all scenarios in memory
+        :return: dict {scenario ID: (status, solution)}, skipped scenarios are left out
+        """
+        scenarios = self.scenarios()
+        results = {}
+        for parameters, result in zip(scenarios, self.__results(scenarios)):
+            if result is None:
+                continue
+            results[parameters[self.headers_scenario.s_id]] = result
+        return results
+
+    def scenarios(self):
+        """Scenario rows as parameter dicts, scenarios with negative ID are disabled, grid points if grid is set"""
+        if self.grid is not None:
+            return self.grid_scenarios()
+        scenarios = []
+        for scenario in self.data_scenario.values:
+            parameters = dict(zip(self.headers_scenario, scenario))
+            if parameters[self.headers_scenario.s_id] < 0:
                 continue
-            logging.info(f'Optimizing with {msg}')
-            self.__single_scenario(optimizer, parameters, lb, ub, tol)
-            self.store_results(optimizer, parameters)
+            scenarios.append(parameters)
+        return scenarios
 
-        _output.store()
+    def grid_scenarios(self):
+        """Expand the grid spec around its base scenario"""
+        parameters = self.grid.get("parameters")
+        if parameters is None:
+            parameters = scenario_grid.grid_from_sheet(
+                pandas.read_excel(INPUT['filename']['name'], sheet_name=self.grid["sheet"]))
+        spec = {"base": self.grid.get("base"), "parameters": parameters}
+        scenarios = scenario_grid.expand_grid(spec, self.scenario(spec["base"]),
+                                              self.headers_scenario.s_id, self.headers_scenario.s_identifier,
+                                              self.headers_scenario.s_feed_scenario)
+        logging.info("Grid expanded to {} scenarios".format(len(scenarios)))
+        return scenarios
 
-        logging.info("END")
+    def shard_scenarios(self, scenarios):
+        """Scenarios belonging to this run's shard, all of them if the run is not sharded"""
+        if self.shard is None:
+            return scenarios
+        selected = shard_scenarios(scenarios, self.headers_scenario.s_id, self.headers_scenario.s_identifier,
+                                   *self.shard, mode=self.shard_mode)
+        logging.info("Shard {0}/{1}: {2} of {3} scenarios".format(*self.shard, len(selected), len(scenarios)))
+        return selected
+
+    def __results(self, scenarios, warm_starts=None):
+        self.deadline = None
+        if self.run_time_budget is not None:
+            self.deadline = time.time() + self.run_time_budget
+        warm_cnem = [(warm_starts or {}).get(str(parameters[self.headers_scenario.s_id])) for parameters in scenarios]
+        if self.n_workers > 1 and len(scenarios) > 1:
+            return self.__run_parallel(scenarios, warm_cnem)
+        return (self.solve_scenario(parameters, warm_cnem=cnem) for parameters, cnem in zip(scenarios, warm_cnem))
+
+    def __run_parallel(self, scenarios, warm_cnem):
+        """
+        Solve scenarios in a process pool, yielding results in the same order as the input.
+        Most expensive scenarios are submitted first so the long ones do not end the run alone.
+        """
+        order = sorted(range(len(scenarios)), key=lambda i: self.scenario_cost(scenarios[i]), reverse=True)
+        logging.info("Solving {0} scenarios with {1} workers".format(len(scenarios), self.n_workers))
+        with ProcessPoolExecutor(max_workers=self.n_workers,
+                                 initializer=_init_worker,
+                                 initargs=self.worker_initargs()) as pool:
+            futures = [None] * len(scenarios)
+            for i in order:
+                futures[i] = pool.submit(_solve_scenario_worker, scenarios[i], None, self.deadline, warm_cnem[i])
+            for future in futures:
+                yield future.result()
+
+    def worker_initargs(self):
+        """_init_worker arguments giving pool workers the data and search settings of this Diet"""
+        return self.ds, self.scenario_time_budget, self.shared is not None, self.warm_window, self.bracketing, \
+            self.evaluation_cache, self.objective_tol, self.objective_rtol
+
+    def scenario_cost(self, parameters):
+        """Estimated number of LP solves needed by a scenario, used to schedule the expensive ones first"""
+        return Searcher.estimate_evaluations(parameters[self.headers_scenario.s_algorithm],
+                                             parameters[self.headers_scenario.s_lb],
+                                             parameters[self.headers_scenario.s_ub],
+                                             parameters[self.headers_scenario.s_tol])
+
+    def scenario(self, scenario_id=None, **values):
+        """
+        Parameter dict of a scenario row, with values replaced by header name
+        :param scenario_id: row of the Scenario sheet used as base, the first one if None
+        :param values: {header: value}
+        """
+        headers = list(self.headers_scenario)
+        if scenario_id is None:
+            row = self.data_scenario.values[0]
+        else:
+            rows = self.data_scenario[self.data_scenario[self.headers_scenario.s_id] == scenario_id].values
+            if len(rows) == 0:
+                raise KeyError("Scenario {} not found".format(scenario_id))
+            row = rows[0]
+        parameters = dict(zip(headers, row))
+        for header, value in values.items():
+            if header not in parameters:
+                raise KeyError("Unknown scenario parameter {}".format(header))
+            parameters[header] = value
+        return parameters
 
-    @staticmethod
-    def refine_bounds(optimizer, parameters, batch = False):
+    def solve_scenario(self, parameters, prices=None, deadline=None, warm_cnem=None):
+        """
+        Build model and searcher for one scenario and optimize it
+        :param prices: {ingredient ID: cost} replacing the Feeds sheet costs of the scenario's feed scenario
+        :param deadline: time.time() of the run deadline, defaults to the one of the current run
+        :param warm_cnem: optimal CNEm of a previous run, only a window around it is searched unless the optimum
+            moved to the window edge
+        :return: (status, solution) or None if the scenario was skipped,
+            status is Status.EMPTY if the deadline passed before the scenario started
+        """
+        headers_scenario = self.headers_scenario
+        if deadline is None:
+            deadline = self.deadline
+        start = time.time()
+        if deadline is not None and start >= deadline:
+            return Status.EMPTY, None
+        if self.scenario_time_budget is not None:
+            deadline = min(start + self.scenario_time_budget, deadline or float("inf"))
+        logging.info("Current Scenario:")
+        logging.info("{}".format(parameters))
+
+        data = self.ds
+        if prices:
+            data = data.with_prices(parameters[headers_scenario.s_feed_scenario], prices)
+
+        logging.info("Initializing model")
+        # shared LPs and templates hold the Feeds sheet costs, quotes with their own prices get a model of their own
+        # (a template per quoted price list would be kept for the life of the quote server)
+        model = model_factory(data, parameters, None if prices else self.shared, None if prices else self.templates)
+        logging.info("Initializing numerical methods")
+        optimizer = Searcher(model, bracketing=self.bracketing, cache_size=self.evaluation_cache,
+                             objective_tol=self.objective_tol, objective_rtol=self.objective_rtol)
+
+        # TODO Implement Sensitivity Analysis: sensitivity.py
+
+        if parameters[headers_scenario.s_algorithm] == "GSS":
+            msg = "Golden-Section Search algorithm"
+        elif parameters[headers_scenario.s_algorithm] == "BF":
+            msg = "Brute Force algorithm"
+        elif parameters[headers_scenario.s_algorithm] == "PARAM":
+            msg = "Parametric search"
+        elif parameters[headers_scenario.s_algorithm] == "BRENT":
+            msg = "Brent's method"
+        else:
+            logging.error("Algorithm {} not found, scenario skipped".format(
+                parameters[headers_scenario.s_algorithm]))
+            return None
+
+        optimizer.set_deadline(deadline)
+        tol = parameters[headers_scenario.s_tol]
+        try:
+            if warm_cnem is not None:
+                logging.info("Warm start around CNEm = {}".format(warm_cnem))
+                if optimizer.warm_search(Algorithms[parameters[headers_scenario.s_algorithm]],
+                                         parameters[headers_scenario.s_lb], parameters[headers_scenario.s_ub],
+                                         tol, warm_cnem, self.warm_window):
+                    return optimizer.get_results()
+                logging.info("Warm start failed, searching the whole CNEm domain")
+            lb, ub = self.refine_bounds(optimizer, parameters)
+        except SearchTimeout:
+            optimizer.stop_timed_out()
+            return optimizer.get_results()
+        if lb is None:
+            return None
+        logging.info(f'Optimizing with {msg}')
+        self.__single_scenario(optimizer, parameters, lb, ub, tol)
+        return optimizer.get_results()
+
+    def refine_bounds(self, optimizer, parameters, batch = False):
+        headers_scenario = self.headers_scenario
         logging.info("Refining bounds")
         if batch:
             optimizer.set_batch_params(0)
@@ -88,25 +460,133 @@ class Diet:
         logging.info("Choosing optimization method")
         return lb, ub
 
-    @staticmethod
-    def __single_scenario(optimizer, parameters, lb, ub, tol):
-        algorithm = Algorithms[parameters[headers_scenario.s_algorithm]]
-        optimizer.run_scenario(algorithm, lb, ub, tol)
+    def __single_scenario(self, optimizer, parameters, lb, ub, tol):
+        algorithm = Algorithms[parameters[self.headers_scenario.s_algorithm]]
+        optimizer.run_scenario(algorithm, lb, ub, tol, uncertain_bounds=False)
+        logging.info("CNEm evaluations: {0} cached, {1} solved".format(optimizer.cache.hits, optimizer.cache.misses))
 
-    @staticmethod
-    def store_results(optimizer, parameters):
+    def store_results(self, parameters, status, solution):
         logging.info("Saving solution locally")
-        status, solution = optimizer.get_results()
-        if status == Status.SOLVED:
-            _output.save_as_csv(name=str(parameters[headers_scenario.s_identifier]), solution=solution)
+        name = str(parameters[self.headers_scenario.s_identifier])
+        if status == Status.TIMED_OUT and solution is not None:
+            logging.warning("Scenario {} timed out, best solution found saved".format(
+                parameters[self.headers_scenario.s_id]))
+        optimum = None
+        if status in (Status.SOLVED, Status.TIMED_OUT) and solution is not None:
+            self._output.save_as_csv(name=name, solution=solution)
+            optimum = max(solution, key=lambda sol: sol["obj_func"])["CNEm"]
         else:
-            logging.warning("Bad Status: {0}, {1}".format(status, parameters))
+            solution = None
+            if status is not None:
+                logging.warning("Bad Status: {0}, {1}".format(status, parameters))
+        self._output.checkpoint(parameters[self.headers_scenario.s_id], name, status, solution,
+                                fingerprint=self.ds.scenario_fingerprint(parameters), optimum=optimum)
+
+
+def parse_shard(shard):
+    """Parse "i/N" into (i, N), tuples and None are passed through"""
+    if shard is None:
+        return None
+    if isinstance(shard, str):
+        shard = shard.split("/")
+    index, count = int(shard[0]), int(shard[1])
+    if count < 1 or not 0 <= index < count:
+        raise ValueError("Invalid shard {0}/{1}, expected 0 <= i < N".format(index, count))
+    return index, count
+
+
+def select_shard(ids, index, count, mode="hash"):
+    """
+    Scenario IDs assigned to shard index out of count
+    :param mode: "hash" spreads IDs by a stable hash, "range" splits the sorted IDs in contiguous blocks
+    """
+    if mode == "hash":
+        return [s_id for s_id in ids if zlib.crc32(str(s_id).encode()) % count == index]
+    elif mode == "range":
+        return list(np.array_split(np.sort(np.asarray(ids)), count)[index])
+    raise ValueError("Shard mode {} not supported".format(mode))
+
+
+def shard_scenarios(scenarios, s_id, s_identifier, index, count, mode="hash"):
+    """
+    Scenarios assigned to shard index out of count. Results are stored by Identifier, so scenarios sharing one
+    go to the same shard, the group being placed by its smallest scenario ID.
+    :param s_id: scenario ID header
+    :param s_identifier: Identifier header
+    """
+    groups = {}
+    for parameters in scenarios:
+        groups.setdefault(str(parameters[s_identifier]), []).append(parameters[s_id])
+    keys = {name: min(ids) for name, ids in groups.items()}
+    selected = set(select_shard(list(keys.values()), index, count, mode=mode))
+    return [parameters for parameters in scenarios if keys[str(parameters[s_identifier])] in selected]
+
+
+def previous_output(directory):
+    """
+    Output folder of a previous run and its manifest
+    :param directory: folder path or True for the latest folder in /Output/
+    :return: (folder, manifest), manifest is None if there is no such run
+    """
+    if directory is True:
+        directory = Output.last_output()
+    if directory is None:
+        return None, None
+    return directory, read_manifest(directory)
+
+
+def optimize(feed_lib, feeds, scenario, input_info=None):
+    """
+    Reentrant entry point: optimize in-memory tables and return the solutions without touching the disk
+    :return: dict {scenario ID: (status, solution)}
+    """
+    return Diet.from_data(feed_lib, feeds, scenario, input_info).solve()
+
+
+def _init_worker(data, scenario_time_budget=None, share_results=False, warm_window=None, bracketing=None,
+                 evaluation_cache=None, objective_tol=None, objective_rtol=None):
+    """
+    Process pool initializer: every worker keeps its own copy of the input data (and shared results).
+    See Diet.worker_initargs()
+    """
+    global _worker_diet
+    _worker_diet = Diet(n_workers=1, scenario_time_budget=scenario_time_budget, warm_window=warm_window,
+                        bracketing=bracketing, objective_tol=objective_tol, objective_rtol=objective_rtol)
+    # None keeps every evaluation, it does not stand for the config default here
+    _worker_diet.evaluation_cache = evaluation_cache
+    _worker_diet._set_data(data)
+    if share_results:
+        _worker_diet.shared = SharedResults()
+
+
+def _solve_scenario_worker(parameters, prices=None, deadline=None, warm_cnem=None):
+    return _worker_diet.solve_scenario(parameters, prices, deadline, warm_cnem)
 
 
-def config(input_info, output_info):
-    global INPUT, OUTPUT
+def config(input_info, output_info, n_workers=1, resume=False, workspace=None, shard=None, shard_mode="hash",
+           scenario_time_budget=None, run_time_budget=None, grid=None, incremental=False,
+           warm_start=False, warm_window=0.1, bracketing="bisection", evaluation_cache=None,
+           objective_tol=0.01, objective_rtol=0.0):
+    global INPUT, OUTPUT, N_WORKERS, RESUME, WORKSPACE, SHARD, SHARD_MODE, SCENARIO_TIME_BUDGET, RUN_TIME_BUDGET, \
+        GRID, INCREMENTAL, WARM_START, WARM_WINDOW, BRACKETING, \
+        EVALUATION_CACHE, OBJECTIVE_TOL, OBJECTIVE_RTOL
     INPUT = input_info
     OUTPUT = output_info
+    N_WORKERS = n_workers
+    RESUME = resume
+    WORKSPACE = workspace
+    SHARD = shard
+    SHARD_MODE = shard_mode
+    SCENARIO_TIME_BUDGET = scenario_time_budget
+    RUN_TIME_BUDGET = run_time_budget
+    GRID = grid
+    INCREMENTAL = incremental
+    WARM_START = warm_start
+    WARM_WINDOW = warm_window
+    BRACKETING = bracketing
+    EVALUATION_CACHE = evaluation_cache
+    OBJECTIVE_TOL = objective_tol
+    OBJECTIVE_RTOL = objective_rtol
 
 
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+"""
+Factorial scenario grids: a compact spec of parameter ranges expanded into Scenario rows.
+
+Spec (config.GRID or run.py --grid):
+    {"base": 4,                                           # Scenario row supplying the values not in the grid
+     "parameters": {"SBW": {"start": 300, "stop": 400, "step": 50},  # inclusive range
+                    "Selling Price [US$]": [1.4, 1.5, 1.6],           # explicit values
+                    "Feed Scenario": [1, 2]}}
+or {"base": 4, "sheet": "Grid"} to read the parameters from a sheet of the input file with the columns
+Parameter | Values (comma separated) | Start | Stop | Step.
+"""
+import itertools
+import math
+
+import pandas
+
+grid_headers = ["Parameter", "Values", "Start", "Stop", "Step"]
+
+
+def parameter_values(values):
+    """
+    Values of a grid parameter
+    :param values: list of values or dict {"start", "stop", "step"} (stop included)
+    """
+    if isinstance(values, dict):
+        start, stop, step = float(values["start"]), float(values["stop"]), float(values["step"])
+        if step <= 0 or stop < start:
+            raise ValueError("Invalid grid range {}".format(values))
+        n = int(math.floor((stop - start) / step + 1e-9)) + 1
+        return [round(start + i * step, 10) for i in range(n)]
+    if isinstance(values, (str, bytes)) or not hasattr(values, "__iter__"):
+        return [values]
+    return list(values)
+
+
+def expand_grid(spec, base, s_id, s_identifier, s_feed_scenario=None):
+    """
+    Scenario parameter dicts for every combination of the grid parameters
+    :param spec: grid spec, see module docstring
+    :param base: parameter dict of the base scenario
+    :param s_id: ID header, grid points are numbered from 1
+    :param s_identifier: Identifier header, grid points are named <base identifier>_<ID>
+    :param s_feed_scenario: Feed Scenario header, varied in the outermost loop so consecutive points share the LP
+    :return: list of parameter dicts
+    """
+    grid = dict(spec["parameters"])
+    for header in grid:
+        if header not in base:
+            raise KeyError("Unknown scenario parameter {}".format(header))
+        if header in (s_id, s_identifier):
+            raise ValueError("{} cannot be a grid parameter".format(header))
+    headers = sorted(grid.keys(), key=lambda h: h != s_feed_scenario)
+    axes = [parameter_values(grid[header]) for header in headers]
+
+    scenarios = []
+    for i, point in enumerate(itertools.product(*axes), start=1):
+        parameters = dict(base)
+        parameters.update(zip(headers, point))
+        parameters[s_id] = i
+        parameters[s_identifier] = "{0}_{1}".format(base[s_identifier], i)
+        scenarios.append(parameters)
+    return scenarios
+
+
+def grid_from_sheet(df):
+    """
+    Grid parameters from a Grid sheet
+    :param df: DataFrame with columns Parameter, Values, Start, Stop, Step
+    :return: dict {header: values}
+    """
+    parameters = {}
+    for row in df[grid_headers].to_dict("records"):
+        values = row["Values"]
+        if isinstance(values, str):
+            parameters[row["Parameter"]] = [_number(v) for v in values.split(",") if v.strip() != ""]
+        elif not pandas.isna(values):
+            parameters[row["Parameter"]] = [values]
+        else:
+            parameters[row["Parameter"]] = {"start": row["Start"], "stop": row["Stop"], "step": row["Step"]}
+    return parameters
+
+
+def _number(value):
+    value = value.strip()
+    try:
+        return float(value) if "." in value or "e" in value.lower() else int(value)
+    except ValueError:
+        return value
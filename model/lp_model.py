@@ -5,14 +5,109 @@ from model import data_handler
 from model.nrc_equations import NRC_eq as nrc
 import logging
 import math
+import functools
 
 cnem_lb, cnem_ub = 0.8, 3
 
-bigM = 100000
 
+def model_factory(ds, parameters, shared=None, templates=None):
+    """
+    :param shared: SharedResults reused between scenarios, a new independent Model is built if None
+    :param templates: ModelTemplates the new independent Model is copied from (and registered in)
+    """
+    if shared is None:
+        return Model(ds, parameters, templates)
+    return shared.model(ds, parameters)
+
+
+@functools.lru_cache(maxsize=65536)
+def _nrc_parameters(cnem, sbw, bcs, be, l, sex, a2, ph_val, target_weight, dmi_eq):
+    """NRC parameters memoized by animal profile and CNEm"""
+    return nrc.get_all_parameters(cnem, sbw, bcs, be, l, sex, a2, ph_val, target_weight, dmi_eq)
+
+
+class SharedResults:
+    """
+    Intermediate results shared between scenarios of a run: one built Model per feed scenario, whose LP only
+    gets new RHS and objective for every scenario, and LP solutions by feed scenario and RHS.
+    The objective of scenarios sharing a feed scenario only differs by a positive factor
+    (DMI * feeding time [/ SWG]), so one LP solution answers every scenario with the same RHS.
+    """
+    _models = None
+    _lp = None
+    hits = 0
+    misses = 0
+
+    def __init__(self):
+        self._models = {}
+        self._lp = {}
+        self.hits = 0
+        self.misses = 0
+
+    def model(self, ds, parameters):
+        feed_scenario = parameters[ds.headers_scenario.s_feed_scenario]
+        model = self._models.get(feed_scenario)
+        if model is None:
+            model = Model(ds, parameters)
+            model.lp_cache = self
+            self._models[feed_scenario] = model
+        else:
+            model.set_scenario(parameters)
+        return model
+
+    def get(self, key, factor):
+        """Raw solver solution for key with duals scaled to objective factor, None if not solved yet"""
+        raw = self._lp.get(key)
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _scale_duals(raw, factor)
+
+    def put(self, key, raw, factor):
+        """Store raw solver solution normalized to unit objective factor"""
+        if raw is not None:
+            self._lp[key] = _scale_duals(raw, 1.0 / factor)
+
+
+class ModelTemplates:
+    """
+    Built Models of a run by feed scenario and digest of its Feeds and Feed Library rows. Their data and constraint
+    matrix (NEma, MPm, RDP, Fat, peNDF and unit sum rows, variable bounds) only depend on those rows, so a Model
+    for another scenario copies them and only sets its RHS and objective.
+    """
+    _templates = None
+    hits = 0
+    misses = 0
+
+    def __init__(self):
+        self._templates = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(ds, feed_scenario):
+        return feed_scenario, ds.feeds_fingerprint(feed_scenario)
+
+    def get(self, ds, feed_scenario):
+        """Built Model of the feed scenario, None if there is none yet"""
+        template = self._templates.get(self._key(ds, feed_scenario))
+        if template is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return template
+
+    def put(self, model):
+        """Keep a built Model as template of its feed scenario"""
+        self._templates.setdefault(self._key(model.ds, model.p_feed_scenario), model)
 
-def model_factory(ds, parameters):
-    return Model(ds, parameters)
+
+def _scale_duals(raw, factor):
+    """HiGHS output (status, col value, col dual, row value, row dual, col basis, row basis) for objective * factor"""
+    status, col_value, col_dual, row_value, row_dual, col_basis, row_basis = raw
+    return (status, col_value, [v * factor for v in col_dual],
+            row_value, [v * factor for v in row_dual], col_basis, row_basis)
 
 
 class Model:
@@ -47,17 +142,47 @@ class Model:
 
     opt_sol = None
     prefix_id = ""
+    lp_cache: SharedResults = None
+    templates: ModelTemplates = None
+    _obj_scale = None
+    _new_scenario = False
+
+    def __init__(self, out_ds, parameters, templates=None):
+        """
+        :param templates: ModelTemplates to copy the data and LP of the scenario's feed scenario from
+        """
+        self.templates = templates
+        template = None
+        if templates is not None:
+            template = templates.get(out_ds, parameters[out_ds.headers_scenario.s_feed_scenario])
+        if template is None:
+            self._cast_data(out_ds, parameters)
+        else:
+            self._copy_template(out_ds, template, parameters)
 
-    def __init__(self, out_ds, parameters):
-        self._cast_data(out_ds, parameters)
+    def _copy_template(self, out_ds, template, parameters):
+        """Take data and a copy of the built LP of template, the first run only sets RHS and objective"""
+        self.ds = out_ds
+        for name in ("data_feed_scenario", "headers_feed_scenario", "ingredient_ids", "headers_feed_lib",
+                     "data_feed_lib", "cost_vector", "n_ingredients", "dm_af_coversion", "_var_names_x",
+                     "constraints_names"):
+            setattr(self, name, getattr(template, name))
+        self._diet = template._diet.copy()
+        self.set_scenario(parameters)
+
+    def set_scenario(self, parameters):
+        """Reuse data and built LP for another scenario of the same feed scenario"""
+        self.scenario_parameters = parameters
+        self.__set_parameters(parameters)
+        self.prefix_id = ""
+        self._new_scenario = True
+        if self._diet is not None:
+            self._diet.reset_solution()
 
-    @staticmethod
-    def _remove_inf(vector):
-        for i in range(len(vector)):
-            if vector[i] == float("-inf"):
-                vector[i] = -bigM
-            elif vector[i] == float("inf"):
-                vector[i] = bigM
+    @property
+    def first_run(self):
+        """True if the next run is the first of the scenario, its MPm RHS has the SWG and NEg terms of _build_model()"""
+        return self._diet is None or self._new_scenario
 
     def run(self, p_id, p_cnem):
         """Either build or update model, solve ir and return solution = {dict xor None}"""
@@ -70,13 +195,56 @@ class Model:
                 return None
             if self._diet is None:
                 self._build_model()
+                if self.templates is not None:
+                    self.templates.put(self)
             else:
-                self._update_model()
+                self._update_model(self._new_scenario)
+                self._new_scenario = False
             return self._solve(p_id)
         except Exception as e:
             logging.error("An error occurred in lp_model.py L86:\n{}".format(str(e)))
             return None
 
+    def run_many(self, p_ids, p_cnems):
+        """
+        Same solutions as run() for every CNEm, the LPs are solved together by one Optimizer.solve_many call.
+        The first run of a scenario, runs with shared LP results and solvers without raw solutions go through run()
+        :return: list of solution dicts (None if infeasible)
+        """
+        solutions = [None] * len(p_cnems)
+        pending = list(range(len(p_cnems)))
+        while len(pending) > 0 and self.first_run:
+            i = pending.pop(0)
+            solutions[i] = self.run(p_ids[i], p_cnems[i])
+        if self.lp_cache is not None or optimizer.SOLVER not in optimizer.array_solvers:
+            for i in pending:
+                solutions[i] = self.run(p_ids[i], p_cnems[i])
+            return solutions
+        logging.info("Populating and running {} models".format(len(pending)))
+        try:
+            batch, rhs, objectives = [], [], []
+            for i in pending:
+                self._p_cnem = p_cnems[i]
+                if not self._compute_parameters(p_ids[i]):
+                    self._infeasible_output(p_ids[i])
+                    continue
+                batch.append(i)
+                rhs.append(list(self._rhs().values()))
+                objectives.append(list(self.cost_obj_vector))
+            if len(batch) == 0:
+                return solutions
+            self._diet.solve_many(list(self._rhs().keys()), rhs, objectives)
+            for i, raw in zip(batch, self._diet.get_raw_solutions()):
+                self.opt_sol = None
+                self._p_cnem = p_cnems[i]
+                self._compute_parameters(p_ids[i])
+                self._update_model()
+                self._diet.load_raw_solution(raw)
+                solutions[i] = self._solution(p_ids[i])
+        except Exception as e:
+            logging.error("An error occurred in lp_model.py run_many:\n{}".format(str(e)))
+        return solutions
+
     def _get_params(self, p_swg):
         if p_swg is None:
             return dict(zip(["CNEm", "CNEg", "NEm", "NEg", "DMI", "MPm",  "peNDF"],
@@ -91,7 +259,21 @@ class Model:
         """Return None if solution is infeasible or Solution dict otherwise"""
         diet = self._diet
         # diet.write_lp(name="CNEm_{}.lp".format(str(self._p_cnem)))
-        diet.solve()
+        raw = None
+        if self.lp_cache is not None:
+            key = (self.p_feed_scenario, tuple(diet.get_constraints_rhs(self.constraints_names)))
+            raw = self.lp_cache.get(key, self._obj_scale)
+        if raw is None:
+            diet.solve()
+            if self.lp_cache is not None:
+                self.lp_cache.put(key, diet.get_raw_solution(), self._obj_scale)
+        else:
+            diet.load_raw_solution(raw)
+        return self._solution(problem_id)
+
+    def _solution(self, problem_id):
+        """Solution dict of the LP solution held by the optimizer, None if it is infeasible"""
+        diet = self._diet
         status = diet.get_solution_status()
         logging.info("Solution status: {}".format(status))
         if status.__contains__("infeasible"):
@@ -198,8 +380,8 @@ class Model:
 
         """Compute parameters variable with CNEm"""
         self._p_mpm, self._p_dmi, self._p_nem, self._p_pe_ndf = \
-            nrc.get_all_parameters(self._p_cnem, self.p_sbw, self.p_bcs,
-                                   self.p_be, self.p_l, self.p_sex, self.p_a2, self.p_ph, self.p_target_weight, self.p_dmi_eq)
+            _nrc_parameters(self._p_cnem, self.p_sbw, self.p_bcs,
+                            self.p_be, self.p_l, self.p_sex, self.p_a2, self.p_ph, self.p_target_weight, self.p_dmi_eq)
 
         self._p_cneg = nrc.cneg(self._p_cnem)
         self._p_neg = nrc.neg(self._p_cneg, self._p_dmi, self._p_cnem, self._p_nem)
@@ -232,18 +414,22 @@ class Model:
             for i in range(len(self.cost_vector)):
                 self.cost_obj_vector[i] = - self.expenditure_obj_vector[i]
             self.cst_obj = self.revenue
+            self._obj_scale = self._p_dmi * self._model_feeding_time
         elif self.p_obj == "MinCost":
             for i in range(len(self.cost_vector)):
                 self.cost_obj_vector[i] = - self.expenditure_obj_vector[i]
             self.cst_obj = 0
+            self._obj_scale = self._p_dmi * self._model_feeding_time
         elif self.p_obj == "MaxProfitSWG":
             for i in range(len(self.cost_vector)):
                 self.cost_obj_vector[i] = -(self.expenditure_obj_vector[i])/self._p_swg
             self.cst_obj = self.revenue/self._p_swg
+            self._obj_scale = self._p_dmi * self._model_feeding_time / self._p_swg
         elif self.p_obj == "MinCostSWG":
             for i in range(len(self.cost_vector)):
                 self.cost_obj_vector[i] = -(self.expenditure_obj_vector[i])/self._p_swg
             self.cst_obj = 0
+            self._obj_scale = self._p_dmi * self._model_feeding_time / self._p_swg
 
 #         self.cost_obj_vector_mono = self.cost_obj_vector.copy()
         return True
@@ -257,8 +443,6 @@ class Model:
         diet = self._diet
         diet.set_sense(sense="max")
 
-        self._remove_inf(self.cost_obj_vector)
-
         x_vars = list(diet.add_variables(obj=self.cost_obj_vector,
                                          lb=self.ds.sorted_column(self.data_feed_scenario,
                                                                   self.headers_feed_scenario.s_min,
@@ -362,18 +546,27 @@ class Model:
         # diet.write_lp(name="file.lp")
         pass
 
-    def _update_model(self):
-        """Update RHS values on the model based on the new CNEm and updated parameters"""
-        new_rhs = {
+    def _update_model(self, as_built=False):
+        """
+        Update RHS values on the model based on the new CNEm and updated parameters
+        :param as_built: set the RHS _build_model() would, for the first run of a scenario reusing the LP
+        """
+        new_rhs = self._rhs(as_built)
+        seq_of_pairs = tuple(zip(new_rhs.keys(), new_rhs.values()))
+        self._diet.set_constraint_rhs(seq_of_pairs)
+
+        self._diet.set_objective_function(list(zip(self._var_names_x, self.cost_obj_vector)), self.cst_obj)
+
+    def _rhs(self, as_built=False):
+        """{constraint name: RHS} for the current CNEm and parameters, see _update_model()"""
+        mpm_rhs = self._p_mpm * 0.001 / self._p_dmi
+        if as_built:
+            mpm_rhs = (self._p_mpm + 268 * self._p_swg - 29.4 * self._p_neg) * 0.001 / self._p_dmi
+        return {
             "CNEm GE": self._p_cnem * 0.999,
             "CNEm LE": self._p_cnem * 1.001,
             "SUM 1": 1,
-            "MPm": self._p_mpm * 0.001 / self._p_dmi,
+            "MPm": mpm_rhs,
             "RDP": 0.125 * self._p_cnem,
             "Fat": 0.06,
             "peNDF": self._p_pe_ndf}
-
-        seq_of_pairs = tuple(zip(new_rhs.keys(), new_rhs.values()))
-        self._diet.set_constraint_rhs(seq_of_pairs)
-
-        self._diet.set_objective_function(list(zip(self._var_names_x, self.cost_obj_vector)), self.cst_obj)
@@ -1,54 +1,268 @@
 import csv
+import json
 import logging
 import os, os.path
 import shutil
+import tempfile
 from datetime import datetime
 
 
 class Output:
-    temp_dir = "model/temp_output/"
+    base_temp_dir = "model/temp_output/"
+    output_dir = "./Output/"
+    checkpoint_file = "checkpoint.jsonl"
+    lock_file = "run.pid"
+    manifest_file = "manifest.json"
+    temp_dir = None
 
-    def __init__(self):
+    def __init__(self, resume=False, workspace=None):
+        """
+        :param resume: keep the checkpoint of an interrupted run instead of wiping temp_dir
+        :param workspace: folder for this run's partial results, a unique one in base_temp_dir is created if None
+        :raises ValueError: workspace holds other files and no checkpoint, so it is not a run workspace, or another
+            running process is using it
+        """
+        if workspace is None and resume:
+            workspace = self.last_workspace()
+        if workspace is None:
+            os.makedirs(self.base_temp_dir, exist_ok=True)
+            now = datetime.now().strftime("%Y_%m_%d_%H%M%S")
+            workspace = tempfile.mkdtemp(prefix=now + "_", dir=self.base_temp_dir)
+        else:
+            os.makedirs(workspace, exist_ok=True)
+            if self.is_live(workspace):
+                raise ValueError("Workspace {} is in use by another run".format(workspace))
+            if len(set(os.listdir(workspace)) - {self.lock_file}) > 0 and \
+                    not os.path.isfile(os.path.join(workspace, self.checkpoint_file)):
+                raise ValueError("Workspace {} is not empty and has no checkpoint, "
+                                 "choose an empty or new folder".format(workspace))
+        self.temp_dir = os.path.join(workspace, "")
+        with open(self.temp_dir + self.lock_file, "w") as file:
+            file.write(str(os.getpid()))
+        logging.info("Run workspace: {}".format(self.temp_dir))
 
-        if not os.path.exists(self.temp_dir):
-            os.mkdir(self.temp_dir)
+        self._completed = {}
+        self._results = set()
+        if resume:
+            self._completed = self.load_checkpoint()
+        if len(self._completed) > 0:
+            logging.info("Resuming run, {} scenarios already completed".format(len(self._completed)))
+            self.delete_results_in(self.temp_dir)
+            self.replay_checkpoint()
+        else:
+            self.delete_results_in(self.temp_dir, checkpoint=True)
 
+    @classmethod
+    def last_workspace(cls):
+        """Most recent workspace in base_temp_dir left with a checkpoint by an interrupted run, running ones are
+        skipped"""
+        if not os.path.exists(cls.base_temp_dir):
+            return None
+        workspaces = [os.path.join(cls.base_temp_dir, d) for d in os.listdir(cls.base_temp_dir)
+                      if os.path.isfile(os.path.join(cls.base_temp_dir, d, cls.checkpoint_file))]
+        live = [workspace for workspace in workspaces if cls.is_live(workspace)]
+        if len(live) > 0:
+            logging.info("Workspaces in use by other runs, not resumed: {}".format(live))
+        workspaces = [workspace for workspace in workspaces if workspace not in live]
+        if len(workspaces) == 0:
+            return None
+        return max(workspaces, key=os.path.getmtime)
 
-        self.delete_all_files_in(self.temp_dir)
-        pass
+    @classmethod
+    def is_live(cls, workspace):
+        """
+        Whether another process still runs in workspace, according to the pid in its lock file.
+        Windows cannot probe a pid without side effects, there any lock left by another process counts as live
+        and the workspace of a crashed run has to be given explicitly.
+        """
+        path = os.path.join(workspace, cls.lock_file)
+        if not os.path.isfile(path):
+            return False
+        try:
+            with open(path, "r") as file:
+                pid = int(file.read().strip())
+        except ValueError:
+            return False
+        if pid == os.getpid():
+            return False
+        if os.name == "nt":
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
 
-    @staticmethod
-    def delete_all_files_in(directory):
-        files = [f for f in os.listdir(directory) if os.path.isfile(os.path.join(directory, f))]
-        for f in files:
-            os.remove(directory + f)
+    def release(self):
+        """Remove the lock file, so the workspace can be resumed by another run"""
+        if os.path.exists(self.temp_dir + self.lock_file):
+            os.remove(self.temp_dir + self.lock_file)
+
+    @classmethod
+    def delete_results_in(cls, directory, checkpoint=False):
+        """Remove the csv results (and the checkpoint) left in a workspace, other files are not touched"""
+        for f in os.listdir(directory):
+            if (f.endswith(".csv") or (checkpoint and f == cls.checkpoint_file)) and \
+                    os.path.isfile(os.path.join(directory, f)):
+                os.remove(directory + f)
+
+    def load_checkpoint(self):
+        """Read completed scenarios from the checkpoint journal, a truncated last line is ignored"""
+        completed = {}
+        path = self.temp_dir + self.checkpoint_file
+        if not os.path.exists(path):
+            return completed
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logging.warning("Ignoring corrupted checkpoint line: {}".format(line))
+                    continue
+                completed[record["id"]] = record
+        return completed
+
+    def replay_checkpoint(self):
+        """Rebuild the csv files in temp_dir from the journal, so partially written files are discarded"""
+        for record in self._completed.values():
+            if record.get("carried_from") is not None:
+                self.copy_results(record["carried_from"], record["name"])
+            elif record["solution"] is not None:
+                self.save_as_csv(name=record["name"], solution=record["solution"])
+
+    def is_completed(self, scenario_id):
+        return str(scenario_id) in self._completed
+
+    def discard_stale(self, fingerprints):
+        """
+        Forget checkpointed scenarios that left the run or whose inputs changed since they were solved, the csv
+        files are rebuilt without their results so they are solved again
+        :param fingerprints: {scenario ID: Data.scenario_fingerprint()} of the scenarios in this run
+        :return: list of discarded scenario IDs (str)
+        """
+        fingerprints = {str(scenario_id): fingerprint for scenario_id, fingerprint in fingerprints.items()}
+        stale = [scenario_id for scenario_id, record in self._completed.items()
+                 if fingerprints.get(scenario_id) is None or record.get("fingerprint") != fingerprints[scenario_id]]
+        if len(stale) == 0:
+            return stale
+        logging.warning("Input changed since the checkpoint, solving scenarios {} again".format(stale))
+        for scenario_id in stale:
+            del self._completed[scenario_id]
+        self.delete_results_in(self.temp_dir)
+        self._results = set()
+        self.replay_checkpoint()
+        return stale
 
-    def store(self):
+    def checkpoint(self, scenario_id, name, status, solution=None, fingerprint=None, carried_from=None,
+                   optimum=None):
+        """
+        Durably record a finished scenario and its results in the checkpoint journal
+        :param scenario_id: scenario ID
+        :param name: csv file name the results were saved to
+        :param status: final status name
+        :param solution: list of solution dicts or None
+        :param fingerprint: digest of the scenario inputs, see Data.scenario_fingerprint()
+        :param carried_from: output folder the results were copied from instead of solving
+        :param optimum: CNEm of the best solution, used to warm start later runs
+        """
+        record = {"id": str(scenario_id),
+                  "name": name,
+                  "status": getattr(status, "name", str(status)),
+                  "solution": solution,
+                  "fingerprint": fingerprint,
+                  "carried_from": carried_from,
+                  "optimum": optimum}
+        path = self.temp_dir + self.checkpoint_file
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(record, default=to_builtin) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self._completed[record["id"]] = record
+
+    def carry_over(self, directory, scenario_id, name, status, fingerprint, optimum=None):
+        """Take the results of an unchanged scenario from a previous output folder"""
+        self.copy_results(directory, name)
+        self.checkpoint(scenario_id, name, status, fingerprint=fingerprint, carried_from=directory, optimum=optimum)
+
+    def copy_results(self, directory, name):
+        path = os.path.join(directory, name + ".csv")
+        if os.path.exists(path):
+            shutil.copy(path, self.temp_dir + name + ".csv")
+            self._results.add(name + ".csv")
+
+    def store(self, input_file='./Input.xlsx', suffix="", info=None):
+        """
+        Move results to a new folder in /Output/ with a manifest of the scenarios solved
+        :param input_file: input copied along with results
+        :param suffix: appended to the folder name
+        :param info: dict with run information stored in the manifest
+        :return: folder path
+        """
 
         # create a new folder in /Output/ and name it YYYY_MM_DD_HHMMSS
-        dirName = './Output/'
+        dirName = self.output_dir
 
         if not os.path.exists(dirName):
             os.mkdir(dirName)
 
         now = datetime.now()
         now = now.strftime("%Y_%m_%d_%H%M%S")
-        dirName = dirName + now
-
-        try:
-            os.mkdir(dirName)
-        except FileExistsError:
-            print("Directory ", dirName, " already exists.")
+        dirName = self.unique_dir(dirName + now + suffix)
 
         # copy input
-        shutil.copy('./Input.xlsx', dirName)
+        shutil.copy(input_file, dirName)
 
-        files = [f for f in os.listdir(self.temp_dir) if os.path.isfile(os.path.join(self.temp_dir, f))]
+        manifest = dict(info or {})
+        manifest["scenarios"] = {record["id"]: {"identifier": record["name"], "status": record["status"],
+                                                "fingerprint": record.get("fingerprint"),
+                                                "optimum": record.get("optimum")}
+                                 for record in self._completed.values()}
+        write_manifest(dirName, manifest)
 
-        # move all csv files from temp_output to the new folder
+        files = [f for f in sorted(self._results) if os.path.isfile(self.temp_dir + f)]
+
+        # move the csv files of this run from temp_output to the new folder
         for f in files:
             os.rename(self.temp_dir + f, dirName + "/" + f)
 
+        # run is complete, the next one starts from scratch
+        if os.path.exists(self.temp_dir + self.checkpoint_file):
+            os.remove(self.temp_dir + self.checkpoint_file)
+        self.release()
+        self._completed = {}
+        self._results = set()
+        try:
+            os.rmdir(self.temp_dir)
+        except OSError:
+            logging.warning("Workspace {} not empty, kept".format(self.temp_dir))
+        return dirName
+
+    @classmethod
+    def last_output(cls):
+        """Most recent folder in output_dir with a manifest, None if there is none"""
+        if not os.path.exists(cls.output_dir):
+            return None
+        outputs = [os.path.join(cls.output_dir, d) for d in os.listdir(cls.output_dir)
+                   if os.path.isfile(os.path.join(cls.output_dir, d, cls.manifest_file))]
+        if len(outputs) == 0:
+            return None
+        return max(outputs, key=os.path.getmtime)
+
+    @staticmethod
+    def unique_dir(path):
+        """Create folder path, appending _1, _2, ... if another run already created it"""
+        candidate = path
+        i = 0
+        while True:
+            try:
+                os.mkdir(candidate)
+                return candidate
+            except FileExistsError:
+                i += 1
+                candidate = "{0}_{1}".format(path, i)
+
     def save_as_csv(self, name="", solution=[]):
         """Save solution as a csv file"""
         keys = list(solution[0].keys())
@@ -57,6 +271,7 @@ class Output:
             values.append(list(line.values()))
 
         path = self.temp_dir + name + ".csv"
+        self._results.add(name + ".csv")
 
         with open(path, "a+", newline='', encoding='utf-16') as file:
             writer = csv.writer(file)
@@ -93,6 +308,87 @@ class Output:
     #    writer.save()
 
 
+def write_manifest(directory, manifest):
+    with open(os.path.join(directory, Output.manifest_file), "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=1, default=to_builtin)
+
+
+def read_manifest(directory):
+    """Manifest of an output folder, None for folders created before manifests existed"""
+    path = os.path.join(directory, Output.manifest_file)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def merge_outputs(directories, destination=None):
+    """
+    Combine the output folders of sharded runs into a single result set
+    :param directories: output folders, one per shard
+    :param destination: merged folder, a new one in /Output/ if None
+    :return: merged folder path
+    :raises ValueError: two shards hold results for the same Identifier or scenario ID
+    """
+    owners = {}
+    scenario_owners = {}
+    shards = {}
+    for directory in directories:
+        for f in os.listdir(directory):
+            if f.endswith(".csv"):
+                owners.setdefault(f, []).append(directory)
+        manifest = read_manifest(directory)
+        if manifest is None:
+            logging.warning("No manifest in {}, scenario IDs not checked".format(directory))
+            continue
+        for scenario_id in manifest["scenarios"]:
+            scenario_owners.setdefault(scenario_id, []).append(directory)
+        if manifest.get("shard") is not None:
+            index, count = manifest["shard"]
+            shards.setdefault(count, []).append(index)
+
+    conflicts = ["Identifier '{0}' in {1}".format(f[:-len(".csv")], dirs)
+                 for f, dirs in owners.items() if len(dirs) > 1]
+    conflicts += ["scenario ID {0} in {1}".format(s_id, dirs)
+                  for s_id, dirs in scenario_owners.items() if len(dirs) > 1]
+    if len(conflicts) > 0:
+        raise ValueError("Conflicting shard results:\n" + "\n".join(conflicts))
+
+    if len(shards) > 1:
+        logging.warning("Merging shards from different splits: {}".format(sorted(shards.keys())))
+    for count, indexes in shards.items():
+        missing = sorted(set(range(count)) - set(indexes))
+        if len(missing) > 0:
+            logging.warning("Shards {0} of {1} missing from merge".format(missing, count))
+
+    if destination is None:
+        os.makedirs(Output.output_dir, exist_ok=True)
+        destination = Output.unique_dir(Output.output_dir + datetime.now().strftime("%Y_%m_%d_%H%M%S") + "_merged")
+    else:
+        os.makedirs(destination, exist_ok=True)
+
+    for f, dirs in owners.items():
+        shutil.copy(os.path.join(dirs[0], f), destination)
+    for f in os.listdir(directories[0]):
+        if f.endswith(".xlsx"):
+            shutil.copy(os.path.join(directories[0], f), destination)
+
+    merged = {"shard": None, "merged_from": list(directories), "scenarios": {}}
+    for directory in directories:
+        manifest = read_manifest(directory)
+        if manifest is not None:
+            merged["scenarios"].update(manifest["scenarios"])
+    write_manifest(destination, merged)
+    return destination
+
+
+def to_builtin(value):
+    """json fallback for numpy scalars"""
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError("Object of type {} is not JSON serializable".format(type(value).__name__))
+
+
 if __name__ == "__main__":
 
     if not os.path.exists("../Output"):
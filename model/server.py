@@ -0,0 +1,144 @@
+"""
+Resident optimization server: keeps the input data and the solver workers warm to answer diet quotes.
+
+POST /quote with a JSON body:
+    {"scenario_id": 4,                                  # Scenario row used as base, optional
+     "scenario": {"SBW": 320, "Selling Price [US$]": 1.5},  # values replaced by header name, optional
+     "prices": {"45": 0.18},                             # ingredient ID: cost [US$/kg AF] of the feed scenario
+     "all": false}                                       # return every evaluated solution, not only the best
+GET /health answers {"status": "ok"} once the server is warm.
+"""
+import json
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from model import diet
+from model.output_handler import to_builtin
+from optimizer import optimizer
+from optimizer.numerical_methods import Status
+
+
+class QuoteServer:
+    _diet: diet.Diet = None
+    _pool: ProcessPoolExecutor = None
+    _httpd: ThreadingHTTPServer = None
+
+    def __init__(self, diet_opt, n_workers=1):
+        """
+        :param diet_opt: Diet with data already loaded (initialize() or from_data())
+        :param n_workers: solver processes kept warm, quotes are solved in the request thread if 1
+        """
+        self._diet = diet_opt
+        if n_workers > 1:
+            self._pool = ProcessPoolExecutor(max_workers=n_workers,
+                                             initializer=diet._init_worker,
+                                             initargs=diet_opt.worker_initargs())
+            # Workers are started lazily, force them up so the first quotes do not pay for it
+            for future in [self._pool.submit(_warm_up) for i in range(n_workers)]:
+                future.result()
+        else:
+            _warm_up()
+
+    def quote(self, request):
+        """
+        Optimal diet for one scenario
+        :param request: dict, see module docstring
+        :return: dict {"status", "solution"} (+ "solutions" if request["all"])
+        """
+        parameters = self._diet.scenario(request.get("scenario_id"), **request.get("scenario", {}))
+        prices = {int(k): float(v) for k, v in request.get("prices", {}).items()}
+        if self._pool is None:
+            result = self._diet.solve_scenario(parameters, prices)
+        else:
+            result = self._pool.submit(diet._solve_scenario_worker, parameters, prices).result()
+
+        if result is None:
+            return {"status": "SKIPPED", "solution": None}
+        status, solutions = result
+        response = {"status": status.name, "solution": None}
+        if status in (Status.SOLVED, Status.TIMED_OUT) and solutions:
+            response["solution"] = max(solutions, key=lambda sol: sol["obj_func"])
+            if request.get("all", False):
+                response["solutions"] = solutions
+        return response
+
+    def serve(self, host="127.0.0.1", port=8765):
+        """Answer requests until interrupted"""
+        self._httpd = ThreadingHTTPServer((host, port), _QuoteHandler)
+        self._httpd.quote_server = self
+        logging.info("Quote server listening on {0}:{1}".format(host, port))
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        if self._httpd is not None:
+            self._httpd.server_close()
+            self._httpd = None
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+class _QuoteHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply(200, {"status": "ok"})
+        else:
+            self._reply(404, {"error": "unknown path {}".format(self.path)})
+
+    def do_POST(self):
+        if self.path != "/quote":
+            self._reply(404, {"error": "unknown path {}".format(self.path)})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            response = self.server.quote_server.quote(request)
+        except (KeyError, ValueError, TypeError) as e:
+            self._reply(400, {"error": str(e)})
+            return
+        except Exception as e:
+            logging.error("Quote failed: {}".format(str(e)))
+            self._reply(500, {"error": str(e)})
+            return
+        self._reply(200, response)
+
+    def _reply(self, code, body):
+        data = json.dumps(_finite(body), default=to_builtin).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, fmt, *args):
+        logging.info("%s - %s" % (self.address_string(), fmt % args))
+
+
+def _finite(value):
+    """Replace NaN/inf by None so responses are valid JSON"""
+    if isinstance(value, dict):
+        return {k: _finite(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_finite(v) for v in value]
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _warm_up():
+    """Load the solver library in the current process"""
+    optimizer.Optimizer()
+
+
+def parse_address(address):
+    """"[host:]port" into (host, port)"""
+    if ":" in str(address):
+        host, port = str(address).rsplit(":", 1)
+        return host, int(port)
+    return "127.0.0.1", int(address)
@@ -0,0 +1,169 @@
+import os
+import tempfile
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas
+
+from config import INPUT_FILE
+from model import diet
+from model.data_handler import Data
+from model.lp_model import Model
+from model.output_handler import Output
+from optimizer import optimizer
+from optimizer.numerical_methods import Status
+
+INPUT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Input.xlsx")
+
+
+def tables(scenario_ids=(2, 4)):
+    """Feed Library, Feeds and a few Scenario rows of the shipped input, with a coarse tolerance"""
+    sheets = pandas.read_excel(INPUT_PATH, sheet_name=None)
+    scenario = sheets["Scenario"]
+    scenario = scenario[scenario["ID"].isin(scenario_ids)].copy()
+    scenario["Algorithm"] = "GSS"
+    scenario["Tol"] = 0.05
+    return sheets["Feed Library"], sheets["Feeds"], scenario
+
+
+class TestOptimize(unittest.TestCase):
+    overrides = {"GRID": {"base": 4, "parameters": {"SBW": [250, 350]}}, "SHARD": "1/2", "RESUME": True,
+                 "WORKSPACE": "workspace", "INCREMENTAL": True, "WARM_START": True}
+
+    def setUp(self):
+        self.solver = optimizer.SOLVER
+        optimizer.config("SciPy")
+        self.globals = {name: getattr(diet, name) for name in self.overrides}
+        for name, value in self.overrides.items():
+            setattr(diet, name, value)
+        self.cwd = os.getcwd()
+        self.root = tempfile.TemporaryDirectory()
+        os.chdir(self.root.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.root.cleanup()
+        for name, value in self.globals.items():
+            setattr(diet, name, value)
+        optimizer.SOLVER = self.solver
+
+    def test_optimize_ignores_run_options(self):
+        results = diet.optimize(*tables(), input_info=INPUT_FILE)
+        self.assertEqual(sorted(results), [2, 4])
+        for status, solution in results.values():
+            self.assertEqual(status, Status.SOLVED)
+            self.assertGreater(len(solution), 0)
+        # nothing is read from or written to run folders
+        self.assertEqual(os.listdir(self.root.name), [])
+
+    def test_quotes_do_not_keep_templates(self):
+        diet_opt = diet.Diet.from_data(*tables(), input_info=INPUT_FILE)
+        parameters = diet_opt.scenario(2)
+        for price in [0.17, 0.18]:
+            status, solution = diet_opt.solve_scenario(parameters, prices={45: price})
+            self.assertEqual(status, Status.SOLVED)
+        self.assertEqual(diet_opt.templates.hits + diet_opt.templates.misses, 0)
+
+
+def worker_settings():
+    worker = diet._worker_diet
+    return (worker.scenario_time_budget, worker.warm_window, worker.bracketing, worker.evaluation_cache,
+            worker.objective_tol, worker.objective_rtol)
+
+
+class TestWorkers(unittest.TestCase):
+
+    def test_workers_get_the_diet_settings(self):
+        settings = (30.0, 0.2, "scan", 5, 0.5, 0.1)
+        diet_opt = diet.Diet(n_workers=2, scenario_time_budget=30.0, warm_window=0.2, bracketing="scan",
+                             evaluation_cache=5, objective_tol=0.5, objective_rtol=0.1)
+        diet_opt._set_data(Data.from_frames(*tables(), INPUT_FILE['sheet_feed_lib'], INPUT_FILE['sheet_feeds'],
+                                            INPUT_FILE['sheet_scenario']))
+        with ProcessPoolExecutor(max_workers=2, initializer=diet._init_worker,
+                                 initargs=diet_opt.worker_initargs()) as pool:
+            received = [pool.submit(worker_settings).result() for i in range(2)]
+        self.assertEqual(received, [settings] * 2)
+
+
+class TestRunBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.solver = optimizer.SOLVER
+        optimizer.config("SciPy")
+        self.input = diet.INPUT
+        diet.INPUT = {"filename": {"name": INPUT_PATH}}
+        self.cwd = os.getcwd()
+        self.root = tempfile.TemporaryDirectory()
+        os.chdir(self.root.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.root.cleanup()
+        diet.INPUT = self.input
+        optimizer.SOLVER = self.solver
+
+    def run_diet(self, resume, deadline_after=None):
+        """Run scenarios 2 and 4 in ./workspace, the run deadline passes after deadline_after scenarios"""
+        diet_opt = diet.Diet(n_workers=1, resume=resume, workspace="workspace", run_time_budget=3600,
+                             grid=None, incremental=False, warm_start=False)
+        diet_opt._output = Output(resume=resume, workspace="workspace")
+        diet_opt._set_data(Data.from_frames(*tables(), INPUT_FILE['sheet_feed_lib'], INPUT_FILE['sheet_feeds'],
+                                            INPUT_FILE['sheet_scenario']))
+        solved = []
+        solve_scenario = diet_opt.solve_scenario
+
+        def solve(parameters, *args, **kwargs):
+            result = solve_scenario(parameters, *args, **kwargs)
+            if result[0] != Status.EMPTY:
+                solved.append(parameters[diet_opt.headers_scenario.s_id])
+            if len(solved) == deadline_after:
+                diet_opt.deadline = time.time() - 1
+            return result
+
+        diet_opt.solve_scenario = solve
+        diet_opt.run()
+        return solved
+
+    def test_resume_after_run_deadline(self):
+        self.assertEqual(self.run_diet(resume=False, deadline_after=1), [2])
+        self.assertTrue(os.path.isfile(os.path.join("workspace", Output.checkpoint_file)))
+        self.assertFalse(os.path.exists(Output.output_dir))
+
+        self.assertEqual(self.run_diet(resume=True), [4])
+        self.assertFalse(os.path.exists("workspace"))
+        [directory] = os.listdir(Output.output_dir)
+        manifest = diet.read_manifest(os.path.join(Output.output_dir, directory))
+        self.assertEqual(sorted(manifest["scenarios"]), ["2", "4"])
+
+
+class TestRunMany(unittest.TestCase):
+
+    def setUp(self):
+        self.solver = optimizer.SOLVER
+
+    def tearDown(self):
+        optimizer.SOLVER = self.solver
+
+    def test_run_many_matches_run(self):
+        data = Data.from_frames(*tables(), INPUT_FILE['sheet_feed_lib'], INPUT_FILE['sheet_feeds'],
+                                INPUT_FILE['sheet_scenario'])
+        parameters = dict(zip(data.headers_scenario, data.data_scenario.values[0]))
+        cnems = [1.5, 1.0, 1.8, 2.1, 2.9]
+        for solver in ["SciPy", "Dense"]:
+            optimizer.config(solver)
+            single, batched = Model(data, parameters), Model(data, parameters)
+            expected = [single.run(i, cnem) for i, cnem in enumerate(cnems)]
+            solutions = batched.run_many(list(range(len(cnems))), cnems)
+            self.assertEqual([s is None for s in solutions], [s is None for s in expected])
+            self.assertIsNone(solutions[-1])
+            for solution, sol in zip(solutions, expected):
+                if sol is None:
+                    continue
+                self.assertEqual(solution.keys(), sol.keys())
+                for key, value in sol.items():
+                    self.assertAlmostEqual(solution[key], value, places=6, msg=key)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+import pandas
+
+from model.grid import expand_grid, grid_from_sheet, parameter_values
+
+
+class TestGrid(unittest.TestCase):
+    base = {"ID": 4, "Feed Scenario": 1, "SBW": 300, "Selling Price [US$]": 1.44, "Identifier": "GSS-Max"}
+
+    def test_range_includes_stop(self):
+        self.assertEqual(parameter_values({"start": 1.2, "stop": 1.5, "step": 0.1}), [1.2, 1.3, 1.4, 1.5])
+        self.assertEqual(parameter_values([250, 300]), [250, 300])
+        self.assertEqual(parameter_values(2), [2])
+        self.assertRaises(ValueError, parameter_values, {"start": 2, "stop": 1, "step": 1})
+
+    def test_expand_grid(self):
+        spec = {"base": 4, "parameters": {"SBW": [250, 300, 350], "Feed Scenario": [1, 2]}}
+        scenarios = expand_grid(spec, self.base, "ID", "Identifier", "Feed Scenario")
+        self.assertEqual(len(scenarios), 6)
+        self.assertEqual([s["ID"] for s in scenarios], list(range(1, 7)))
+        self.assertEqual(scenarios[0]["Identifier"], "GSS-Max_1")
+        # feed scenario is the outermost loop, so consecutive points share the same LP
+        self.assertEqual([s["Feed Scenario"] for s in scenarios], [1, 1, 1, 2, 2, 2])
+        self.assertEqual([s["SBW"] for s in scenarios[:3]], [250, 300, 350])
+        self.assertTrue(all(s["Selling Price [US$]"] == 1.44 for s in scenarios))
+
+    def test_unknown_parameter(self):
+        spec = {"base": 4, "parameters": {"Weight": [250]}}
+        self.assertRaises(KeyError, expand_grid, spec, self.base, "ID", "Identifier")
+        spec = {"base": 4, "parameters": {"ID": [1, 2]}}
+        self.assertRaises(ValueError, expand_grid, spec, self.base, "ID", "Identifier")
+
+    def test_grid_from_sheet(self):
+        df = pandas.DataFrame({"Parameter": ["SBW", "Selling Price [US$]"],
+                               "Values": ["250, 300", None],
+                               "Start": [None, 1.3], "Stop": [None, 1.5], "Step": [None, 0.1]})
+        self.assertEqual(grid_from_sheet(df), {"SBW": [250, 300],
+                                               "Selling Price [US$]": {"start": 1.3, "stop": 1.5, "step": 0.1}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import os
+import tempfile
+import unittest
+
+from config import INPUT_FILE
+from model.data_handler import Data
+from model.output_handler import Output
+
+
+def tables():
+    feed_lib = {header: [1.0, 2.0] for header in INPUT_FILE['sheet_feed_lib']['headers']}
+    feed_lib['ID'] = [10, 20]
+    feeds = {'Feed Scenario': [1, 1, 2], 'ID': [10, 20, 10], 'Min %DM': [0, 0, 0], 'Max %DM': [1, 1, 1],
+             'Cost [US$/kg AF]': [0.2, 0.3, 0.2], 'Name': ['a', 'b', 'a']}
+    scenario = {header: [1, 1] for header in INPUT_FILE['sheet_scenario']['headers']}
+    scenario['ID'] = [1, 2]
+    scenario['Feed Scenario'] = [1, 2]
+    return feed_lib, feeds, scenario
+
+
+class TestIncremental(unittest.TestCase):
+
+    def __fingerprints(self, feed_lib, feeds, scenario):
+        data = Data.from_frames(feed_lib, feeds, scenario, INPUT_FILE['sheet_feed_lib'],
+                                INPUT_FILE['sheet_feeds'], INPUT_FILE['sheet_scenario'])
+        rows = [dict(zip(data.headers_scenario, row)) for row in data.data_scenario.values]
+        return [data.scenario_fingerprint(parameters) for parameters in rows]
+
+    def test_fingerprint_follows_feed_scenario(self):
+        feed_lib, feeds, scenario = tables()
+        before = self.__fingerprints(feed_lib, feeds, scenario)
+        self.assertEqual(before, self.__fingerprints(*tables()))
+
+        feeds['Cost [US$/kg AF]'][1] = 0.4  # ingredient 20 only in feed scenario 1
+        after = self.__fingerprints(feed_lib, feeds, scenario)
+        self.assertNotEqual(before[0], after[0])
+        self.assertEqual(before[1], after[1])
+
+        feed_lib, feeds, scenario = tables()
+        feed_lib['CP, %DM'][0] = 5.0  # ingredient 10 in both feed scenarios
+        after = self.__fingerprints(feed_lib, feeds, scenario)
+        self.assertNotEqual(before[0], after[0])
+        self.assertNotEqual(before[1], after[1])
+
+    def test_carried_results_survive_resume(self):
+        with tempfile.TemporaryDirectory() as root:
+            previous = os.path.join(root, "previous")
+            os.mkdir(previous)
+            with open(os.path.join(previous, "GSS-Max.csv"), "w") as file:
+                file.write("Problem_ID\n0\n")
+            workspace = os.path.join(root, "workspace")
+            Output(workspace=workspace).carry_over(previous, 4, "GSS-Max", "SOLVED", "abc")
+            os.remove(os.path.join(workspace, "GSS-Max.csv"))
+
+            output = Output(resume=True, workspace=workspace)
+            self.assertTrue(output.is_completed(4))
+            self.assertTrue(os.path.exists(os.path.join(workspace, "GSS-Max.csv")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+from model.output_handler import Output
+
+
+class TestWorkspace(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.root = tempfile.TemporaryDirectory()
+        os.chdir(self.root.name)
+        with open("Input.xlsx", "w") as file:
+            file.write("input")
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.root.cleanup()
+
+    def test_refuses_folder_without_checkpoint(self):
+        self.assertRaises(ValueError, Output, workspace=".")
+        self.assertTrue(os.path.exists("Input.xlsx"))
+
+    def test_store_moves_only_run_results(self):
+        os.mkdir("workspace")
+        output = Output(workspace="workspace")
+        output.save_as_csv(name="GSS-Max", solution=[{"Problem_ID": 4, "obj_func": 1.0}])
+        output.checkpoint(4, "GSS-Max", "SOLVED")
+        with open(os.path.join("workspace", "notes.txt"), "w") as file:
+            file.write("not a result")
+
+        # a new run in the interrupted workspace keeps files it did not write
+        output = Output(workspace="workspace")
+        self.assertEqual(sorted(os.listdir("workspace")), ["notes.txt", Output.lock_file])
+        output.save_as_csv(name="GSS-Max", solution=[{"Problem_ID": 4, "obj_func": 1.0}])
+        directory = output.store("Input.xlsx")
+        self.assertEqual(sorted(os.listdir(directory)), ["GSS-Max.csv", "Input.xlsx", "manifest.json"])
+        self.assertEqual(os.listdir("workspace"), ["notes.txt"])
+
+    @unittest.skipIf(os.name == "nt", "pids of other processes are not probed on Windows")
+    def test_resume_skips_live_workspaces(self):
+        crashed = os.path.join(Output.base_temp_dir, "crashed")
+        Output(workspace=crashed).checkpoint(2, "GSS-Max", "SOLVED")
+        running = os.path.join(Output.base_temp_dir, "running")
+        Output(workspace=running).checkpoint(4, "GSS-Max", "SOLVED")
+        with open(os.path.join(running, Output.lock_file), "w") as file:
+            file.write(str(os.getppid()))
+
+        self.assertEqual(Output.last_workspace(), crashed)
+        self.assertRaises(ValueError, Output, resume=True, workspace=running)
+        output = Output(resume=True)
+        self.assertEqual(output.temp_dir, os.path.join(crashed, ""))
+        self.assertTrue(output.is_completed(2))
+
+    def test_resume_discards_changed_scenarios(self):
+        output = Output(workspace="workspace")
+        output.save_as_csv(name="GSS-Max", solution=[{"Problem_ID": 2, "obj_func": 1.0}])
+        output.checkpoint(2, "GSS-Max", "SOLVED", [{"Problem_ID": 2, "obj_func": 1.0}], fingerprint="a")
+        output.save_as_csv(name="GSS-Max", solution=[{"Problem_ID": 4, "obj_func": 2.0}])
+        output.checkpoint(4, "GSS-Max", "SOLVED", [{"Problem_ID": 4, "obj_func": 2.0}], fingerprint="b")
+
+        output = Output(resume=True, workspace="workspace")
+        self.assertEqual(output.discard_stale({2: "a", 4: "c"}), ["4"])
+        self.assertTrue(output.is_completed(2))
+        self.assertFalse(output.is_completed(4))
+        with open(os.path.join("workspace", "GSS-Max.csv"), encoding="utf-16") as file:
+            self.assertEqual(file.read().split(), ["Problem_ID,obj_func", "2,1.0"])
+
+
+if __name__ == "__main__":
+    unittest.main()
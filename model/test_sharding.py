@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+
+from model.diet import select_shard, parse_shard, shard_scenarios
+from model.output_handler import merge_outputs, write_manifest, read_manifest
+
+
+class TestSharding(unittest.TestCase):
+    ids = list(range(1, 101))
+
+    def test_shards_partition_ids(self):
+        for mode in ["hash", "range"]:
+            shards = [select_shard(self.ids, i, 3, mode=mode) for i in range(3)]
+            merged = sorted(s_id for shard in shards for s_id in shard)
+            self.assertEqual(merged, self.ids)
+
+    def test_range_shards_are_contiguous(self):
+        shard = select_shard(self.ids, 1, 4, mode="range")
+        self.assertEqual(shard, list(range(26, 51)))
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/5"), (2, 5))
+        self.assertIsNone(parse_shard(None))
+        self.assertRaises(ValueError, parse_shard, "5/5")
+
+    def __shard_dir(self, root, name, index, scenarios):
+        directory = os.path.join(root, name)
+        os.mkdir(directory)
+        for s_id, identifier in scenarios.items():
+            with open(os.path.join(directory, identifier + ".csv"), "w") as file:
+                file.write("Problem_ID\n{}\n".format(s_id))
+        write_manifest(directory, {"shard": [index, 2],
+                                   "scenarios": {s_id: {"identifier": identifier, "status": "SOLVED"}
+                                                 for s_id, identifier in scenarios.items()}})
+        return directory
+
+    def test_merge_outputs(self):
+        with tempfile.TemporaryDirectory() as root:
+            first = self.__shard_dir(root, "a", 0, {"1": "GSS-Max", "3": "BF-Max"})
+            second = self.__shard_dir(root, "b", 1, {"2": "GSS-Min"})
+            merged = merge_outputs([first, second], os.path.join(root, "merged"))
+            self.assertEqual(sorted(os.listdir(merged)),
+                             ["BF-Max.csv", "GSS-Max.csv", "GSS-Min.csv", "manifest.json"])
+            self.assertEqual(sorted(read_manifest(merged)["scenarios"]), ["1", "2", "3"])
+
+    def test_merge_shared_identifier(self):
+        # scenario 2k-1 and 2k write to the same Identifier
+        scenarios = [{"ID": s_id, "Identifier": "GSS-{}".format((s_id + 1) // 2)} for s_id in self.ids]
+        for mode in ["hash", "range"]:
+            with tempfile.TemporaryDirectory() as root:
+                directories = []
+                for i in range(2):
+                    shard = shard_scenarios(scenarios, "ID", "Identifier", i, 2, mode=mode)
+                    results = {str(parameters["ID"]): parameters["Identifier"] for parameters in shard}
+                    directories.append(self.__shard_dir(root, str(i), i, results))
+                merged = merge_outputs(directories, os.path.join(root, "merged"))
+                self.assertEqual(len(read_manifest(merged)["scenarios"]), len(self.ids))
+                self.assertEqual(len(os.listdir(merged)), len(self.ids) // 2 + 1)
+
+    def test_merge_conflicting_identifier(self):
+        with tempfile.TemporaryDirectory() as root:
+            first = self.__shard_dir(root, "a", 0, {"1": "GSS-Max"})
+            second = self.__shard_dir(root, "b", 1, {"2": "GSS-Max"})
+            self.assertRaises(ValueError, merge_outputs, [first, second], os.path.join(root, "merged"))
+
+
+if __name__ == '__main__':
+    unittest.main()
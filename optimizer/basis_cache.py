@@ -0,0 +1,160 @@
+import logging
+import threading
+
+import numpy as np
+
+# HiGHS basis status (see highs_solver.highs_call)
+LOWER, BASIC, UPPER, ZERO = 0, 1, 2, 3
+
+primal_tolerance = 1e-9
+dual_tolerance = 1e-9
+max_condition = 1e10
+
+
+class _FactorizedBasis:
+    """
+    One optimal basis of the LP, factorized into linear maps of the bounds (x, Ax and their distance to the
+    bounds) and of the costs (row duals and reduced costs). Basic columns are computed from the rows that are
+    not basic (active at one of their bounds), row duals from the basic columns' costs. Diet LPs have a handful
+    of rows, so the maps are small dense matrices and trying a basis costs two products.
+    """
+
+    def __init__(self, a_matrix, col_basis, row_basis):
+        self.col_basis = np.array(col_basis, dtype=np.int32)
+        self.row_basis = np.array(row_basis, dtype=np.int32)
+        n_row, n_col = a_matrix.shape
+        basic_cols = np.flatnonzero(self.col_basis == BASIC)
+        active_rows = np.flatnonzero(self.row_basis != BASIC)
+        if len(basic_cols) != len(active_rows) or np.any(self.col_basis > ZERO) \
+                or np.any(self.row_basis[active_rows] > UPPER):
+            raise ValueError("not a basis")
+        b_matrix = a_matrix[np.ix_(active_rows, basic_cols)]
+        b_inverse = b_matrix
+        if len(basic_cols) > 0:
+            try:
+                b_inverse = np.linalg.inv(b_matrix)
+            except np.linalg.LinAlgError:
+                raise ValueError("singular basis")
+            if np.linalg.norm(b_matrix, np.inf) * np.linalg.norm(b_inverse, np.inf) > max_condition:
+                raise ValueError("ill-conditioned basis")
+
+        # bounds vector: [collower, colupper, rowlower, rowupper]
+        x_map = np.zeros((n_col, 2 * n_col + 2 * n_row))
+        lower_cols = np.flatnonzero(self.col_basis == LOWER)
+        upper_cols = np.flatnonzero(self.col_basis == UPPER)
+        x_map[lower_cols, lower_cols] = 1
+        x_map[upper_cols, n_col + upper_cols] = 1
+        active_bounds = np.zeros((len(active_rows), x_map.shape[1]))
+        at_lower = self.row_basis[active_rows] == LOWER
+        active_bounds[at_lower, 2 * n_col + active_rows[at_lower]] = 1
+        active_bounds[~at_lower, 2 * n_col + n_row + active_rows[~at_lower]] = 1
+        x_map[basic_cols] = b_inverse @ (active_bounds - a_matrix[active_rows] @ x_map)
+        self.primal_map = np.vstack([x_map, a_matrix @ x_map])
+        # distance of x and Ax to their lower and upper bounds, all >= 0 when the basis is primal feasible
+        bounds_map = np.eye(x_map.shape[1])
+        lower_bounds = np.r_[0:n_col, 2 * n_col:2 * n_col + n_row]
+        upper_bounds = np.r_[n_col:2 * n_col, 2 * n_col + n_row:2 * n_col + 2 * n_row]
+        self.slack_map = np.vstack([self.primal_map - bounds_map[lower_bounds],
+                                    bounds_map[upper_bounds] - self.primal_map])
+        # bound of each slack, and bounds x depends on (an infinite one means the basis does not fit)
+        self.slack_bounds = np.r_[lower_bounds, upper_bounds]
+        self.used_bounds = np.flatnonzero(np.any(self.primal_map != 0, axis=0))
+
+        # row duals and reduced costs of the costs vector
+        y_map = np.zeros((n_row, n_col))
+        y_map[active_rows] = b_inverse.T @ np.eye(n_col)[basic_cols]
+        self.dual_map = np.vstack([y_map, np.eye(n_col) - a_matrix.T @ y_map])
+        self.dual_map[n_row + basic_cols] = 0
+        # minimization: duals >= 0 at lower bounds, <= 0 at upper bounds
+        self.dual_sign = np.zeros(n_row + n_col)
+        self.dual_sign[active_rows[at_lower]] = 1
+        self.dual_sign[active_rows[~at_lower]] = -1
+        self.dual_sign[n_row + lower_cols] = 1
+        self.dual_sign[n_row + upper_cols] = -1
+        self.zero_cols = n_row + np.flatnonzero(self.col_basis == ZERO)
+
+    def same(self, col_basis, row_basis):
+        return np.array_equal(self.col_basis, col_basis) and np.array_equal(self.row_basis, row_basis)
+
+    def solve(self, bounds, colcost, finite, fixed):
+        """
+        HiGHS-like solution if this basis is primal and dual feasible for the given LP, None otherwise
+        :param bounds: [collower, colupper, rowlower, rowupper], infinite ones set to 0
+        :param colcost: obj-fun coefficients
+        :param finite: mask of the finite bounds
+        :param fixed: mask of the rows and columns with equal bounds (their duals may have any sign)
+        """
+        if not finite[self.used_bounds].all():
+            return None
+        if (self.slack_map @ bounds < -primal_tolerance)[finite[self.slack_bounds]].any():
+            return None
+        dual = self.dual_map @ colcost
+        if (dual * self.dual_sign < -dual_tolerance)[~fixed].any() or (np.abs(dual[self.zero_cols]) > dual_tolerance).any():
+            return None
+        primal = self.primal_map @ bounds
+        n_col = len(colcost)
+        n_row = len(primal) - n_col
+        return 0, primal[:n_col], dual[n_row:], primal[n_col:], dual[:n_row], self.col_basis, self.row_basis
+
+
+class BasisCache:
+    """
+    Recently seen optimal bases of one LP (fixed constraint matrix, minimization). A new right-hand side or
+    objective is first tried on them: if a basis stays primal and dual feasible its solution is optimal and
+    the solver is not called. Copies of a model share its cache, possibly from several threads, so the list of
+    bases changes under a lock.
+    """
+
+    def __init__(self, a_matrix, size=8):
+        """
+        :param a_matrix: dense constraint matrix
+        :param size: number of bases kept, the least recently used is dropped
+        """
+        self.a_matrix = np.asarray(a_matrix, dtype=np.float64)
+        self.size = size
+        self.bases = []
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def solve(self, colcost, collower, colupper, rowlower, rowupper):
+        """:return: same tuple as highs_solver.highs_call for an optimal LP, None if no cached basis fits"""
+        with self._lock:
+            return self._solve(colcost, collower, colupper, rowlower, rowupper)
+
+    def _solve(self, colcost, collower, colupper, rowlower, rowupper):
+        if len(self.bases) == 0:
+            self.misses += 1
+            return None
+        bounds = np.concatenate([collower, colupper, rowlower, rowupper])
+        finite = np.isfinite(bounds)
+        bounds = np.where(finite, bounds, 0.0)
+        fixed = np.concatenate([rowlower == rowupper, collower == colupper])
+        for i, basis in enumerate(self.bases):
+            sol = basis.solve(bounds, colcost, finite, fixed)
+            if sol is not None:
+                self.hits += 1
+                if i > 0:
+                    self.bases.insert(0, self.bases.pop(i))
+                return sol
+        self.misses += 1
+        return None
+
+    def add(self, col_basis, row_basis):
+        """Keep the optimal basis returned by the solver"""
+        if self.size <= 0 or self._cached(col_basis, row_basis):
+            return
+        try:
+            basis = _FactorizedBasis(self.a_matrix, col_basis, row_basis)
+        except ValueError as e:
+            logging.debug("Basis not cached: {}".format(e))
+            return
+        with self._lock:
+            # another thread may have added it meanwhile
+            if self._cached(col_basis, row_basis):
+                return
+            self.bases.insert(0, basis)
+            del self.bases[self.size:]
+
+    def _cached(self, col_basis, row_basis):
+        return any(basis.same(col_basis, row_basis) for basis in list(self.bases))
@@ -0,0 +1,73 @@
+import threading
+
+import numpy as np
+
+separation_tolerance = 1e-9
+ray_tolerance = 1e-9
+
+
+class CertificateCache:
+    """
+    Farkas certificates (dual rays) of infeasible instances of one LP (fixed constraint matrix). For a ray y,
+    y'Ax = (A'y)'x must hold for any x, so when the range of y'r over the row bounds and the range of (A'y)'x
+    over the column bounds do not overlap, the bounds are infeasible without solving.
+    Copies of a model share its cache, possibly from several threads, so rays and col_rays change under a lock.
+    """
+
+    def __init__(self, a_matrix, size=16):
+        """
+        :param a_matrix: dense constraint matrix
+        :param size: number of certificates kept, the least recently used is dropped
+        """
+        self.a_matrix = np.asarray(a_matrix, dtype=np.float64)
+        self.size = size
+        self.rays = np.zeros((0, self.a_matrix.shape[0]))
+        self.col_rays = np.zeros((0, self.a_matrix.shape[1]))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def infeasible(self, collower, colupper, rowlower, rowupper):
+        """:return: True if a cached certificate proves the bounds infeasible"""
+        with self._lock:
+            return self._infeasible(collower, colupper, rowlower, rowupper)
+
+    def _infeasible(self, collower, colupper, rowlower, rowupper):
+        if len(self.rays) == 0:
+            self.misses += 1
+            return False
+        row_min, row_max = _range(self.rays, rowlower, rowupper)
+        col_min, col_max = _range(self.col_rays, collower, colupper)
+        below = row_max < col_min - separation_tolerance * (1 + np.maximum(np.abs(row_max), np.abs(col_min)))
+        above = col_max < row_min - separation_tolerance * (1 + np.maximum(np.abs(col_max), np.abs(row_min)))
+        separated = np.flatnonzero(below | above)
+        if len(separated) == 0:
+            self.misses += 1
+            return False
+        self.hits += 1
+        if separated[0] > 0:
+            order = np.r_[separated[0], 0:separated[0], separated[0] + 1:len(self.rays)]
+            self.rays, self.col_rays = self.rays[order], self.col_rays[order]
+        return True
+
+    def add(self, ray):
+        """Keep the dual ray of an infeasible solve"""
+        ray = np.array(ray, dtype=np.float64)
+        if self.size <= 0 or not np.any(ray):
+            return
+        # round-off entries would put infinite row bounds into the range of y'r
+        ray[np.abs(ray) <= ray_tolerance * np.abs(ray).max()] = 0.0
+        col_ray = self.a_matrix.T @ ray
+        with self._lock:
+            self.rays = np.vstack([ray, self.rays])[:self.size]
+            self.col_rays = np.vstack([col_ray, self.col_rays])[:self.size]
+
+
+def _range(rays, lower, upper):
+    """Range of ray'v over lower <= v <= upper for each ray, bounds may be infinite"""
+    with np.errstate(invalid="ignore"):
+        at_lower, at_upper = rays * lower, rays * upper
+    # 0 * inf: the ray does not use that bound
+    at_lower[rays == 0] = 0.0
+    at_upper[rays == 0] = 0.0
+    return np.minimum(at_lower, at_upper).sum(axis=1), np.maximum(at_lower, at_upper).sum(axis=1)
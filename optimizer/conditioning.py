@@ -0,0 +1,158 @@
+import copy
+
+import numpy as np
+from scipy.sparse import csc_matrix
+
+from optimizer.basis_cache import BASIC, LOWER, UPPER
+
+
+class ConditionedLp:
+    """
+    Solver side form of an LP (minimization, rowlower <= Ax <= rowupper, collower <= x <= colupper):
+    - rows with the same coefficients (e.g. both sides of a range written as a G and an L row) are merged into
+      one ranged row, whose bounds are the tightest of the merged ones;
+    - rows and columns are scaled by powers of 2 (geometric mean scaling), so scaling and unscaling are exact;
+    - columns with infinite cost are fixed at the bound the cost pushes them to and get no cost.
+    Bounds, costs and coefficients of the model are given in its own units and rows, solutions and dual rays
+    of the solver are mapped back to them.
+    """
+
+    def __init__(self, a_matrix, passes=4):
+        """
+        :param a_matrix: constraint matrix of the model (scipy sparse)
+        :param passes: geometric scaling passes, 0 leaves the LP unscaled
+        """
+        a_matrix = csc_matrix(a_matrix, dtype=np.float64)
+        dense = a_matrix.toarray()
+        n_row, n_col = dense.shape
+        groups = {}
+        self.row_map = np.zeros(n_row, dtype=int)  # model row -> solver row
+        for row in range(n_row):
+            self.row_map[row] = groups.setdefault(dense[row].tobytes(), len(groups))
+        self.first = np.unique(self.row_map, return_index=True)[1]
+        self.merged = [(row, self.row_map[row]) for row in range(n_row) if row not in self.first]
+        dense = dense[self.first]
+        self.row_scale, self.col_scale = _geometric_scaling(dense, passes)
+        self.a_matrix = csc_matrix(dense * self.row_scale[:, None] * self.col_scale)
+        self.a_matrix.indices = self.a_matrix.indices.astype(np.int32)
+        self.a_matrix.indptr = self.a_matrix.indptr.astype(np.int32)
+        self.shape = self.a_matrix.shape
+
+    def copy(self):
+        """ConditionedLp with its own coefficients"""
+        clone = copy.copy(self)
+        clone.a_matrix = self.a_matrix.copy()
+        return clone
+
+    @property
+    def astart(self):
+        return self.a_matrix.indptr
+
+    @property
+    def aindex(self):
+        return self.a_matrix.indices
+
+    @property
+    def avalue(self):
+        return self.a_matrix.data
+
+    def columns(self, colcost, collower, colupper):
+        """Solver obj-fun coefficients and column bounds (also for a matrix of costs, one LP per row)"""
+        infinite_cost = np.isinf(colcost)
+        if infinite_cost.any():
+            collower, colupper = np.where(infinite_cost & (colcost < 0), colupper, collower), \
+                np.where(infinite_cost & (colcost > 0), collower, colupper)
+            colcost = np.where(infinite_cost, 0.0, colcost)
+        return colcost * self.col_scale, collower / self.col_scale, colupper / self.col_scale
+
+    def rows(self, rowlower, rowupper):
+        """Solver row bounds (also for matrices of bounds, one LP per row)"""
+        lower, upper = rowlower[..., self.first], rowupper[..., self.first]
+        for row, group in self.merged:
+            lower[..., group] = np.maximum(lower[..., group], rowlower[..., row])
+            upper[..., group] = np.minimum(upper[..., group], rowupper[..., row])
+        return lower * self.row_scale, upper * self.row_scale
+
+    def set_coefficient(self, row, col, value):
+        """
+        Change a coefficient of the model in place
+        :return: (solver row, column, solver value), None if the row is merged and the LP must be rebuilt
+        """
+        group = self.row_map[row]
+        if np.count_nonzero(self.row_map == group) > 1:
+            return None
+        entries = np.flatnonzero(self.aindex[self.astart[col]:self.astart[col + 1]] == group)
+        if len(entries) != 1:
+            return None
+        value = value * self.row_scale[group] * self.col_scale[col]
+        self.avalue[self.astart[col] + entries[0]] = value
+        return group, col, value
+
+    def solution(self, sol, colcost, rowlower, rowupper):
+        """Model solution (highs_call tuple) of the solver solution sol of the LP with these costs and bounds"""
+        status, col_value, col_dual, row_value, row_dual, col_basis, row_basis = sol
+        col_dual = col_dual / self.col_scale
+        infinite_cost = np.isinf(colcost)
+        if infinite_cost.any():
+            col_dual = np.where(infinite_cost, colcost, col_dual)
+        row_dual, row_basis = self._expand(row_dual * self.row_scale, row_basis, rowlower, rowupper)
+        return (status, col_value * self.col_scale, col_dual, (row_value / self.row_scale)[self.row_map],
+                row_dual, np.array(col_basis, dtype=np.int32), row_basis)
+
+    def basis(self, col_basis, row_basis):
+        """Solver basis of a model basis"""
+        row_basis = np.array(row_basis, dtype=np.int32)
+        solver_basis = row_basis[self.first]
+        for row, group in self.merged:
+            if row_basis[row] != BASIC:
+                solver_basis[group] = row_basis[row]
+        return np.array(col_basis, dtype=np.int32), solver_basis
+
+    def _expand(self, dual, basis, rowlower, rowupper):
+        """
+        Model row duals and basis: the dual and bound status of a merged row go to the row whose bound it is
+        (duals are >= 0 at lower bounds, <= 0 at upper bounds), the other merged rows are basic
+        """
+        row_dual = dual[self.row_map]
+        row_basis = np.asarray(basis, dtype=np.int32)[self.row_map]
+        if not self.merged:
+            return row_dual, row_basis
+        lower, upper = self.rows(rowlower, rowupper)
+        lower, upper = lower / self.row_scale, upper / self.row_scale
+        for group in np.unique([group for _, group in self.merged]):
+            members = np.flatnonzero(self.row_map == group)
+            at_lower = members[rowlower[members] == lower[group]][:1]
+            at_upper = members[rowupper[members] == upper[group]][:1]
+            row_dual[members] = 0.0
+            if dual[group] > 0:
+                row_dual[at_lower] = dual[group]
+            elif dual[group] < 0:
+                row_dual[at_upper] = dual[group]
+            status = row_basis[members[0]]
+            row_basis[members] = BASIC
+            if status == LOWER:
+                row_basis[at_lower] = LOWER
+            elif status == UPPER:
+                row_basis[at_upper] = UPPER
+        return row_dual, row_basis
+
+
+def _geometric_scaling(a_matrix, passes):
+    """Row and column factors (powers of 2) bringing the nonzeros of |a_matrix| close to 1"""
+    n_row, n_col = a_matrix.shape
+    row_scale, col_scale = np.ones(n_row), np.ones(n_col)
+    magnitude = np.abs(a_matrix)
+    nonzero = magnitude > 0
+    for _ in range(passes):
+        scaled = magnitude * row_scale[:, None] * col_scale
+        row_scale /= _geometric_mean(scaled, nonzero, axis=1)
+        scaled = magnitude * row_scale[:, None] * col_scale
+        col_scale /= _geometric_mean(scaled, nonzero, axis=0)
+    return np.exp2(np.round(np.log2(row_scale))), np.exp2(np.round(np.log2(col_scale)))
+
+
+def _geometric_mean(values, nonzero, axis):
+    """sqrt(min * max) of the nonzeros along axis, 1 where there are none"""
+    smallest = np.where(nonzero, values, np.inf).min(axis=axis)
+    largest = np.where(nonzero, values, 0.0).max(axis=axis)
+    return np.where(largest > 0, np.sqrt(smallest * largest), 1.0)
@@ -0,0 +1,218 @@
+import numpy as np
+
+from optimizer import scipy_solver
+from optimizer.basis_cache import BASIC, LOWER, UPPER
+
+# solve_batch status
+OPTIMAL, INFEASIBLE, UNBOUNDED, FAILED = 0, 1, 2, 3
+
+primal_tolerance = 1e-9
+dual_tolerance = 1e-9
+pivot_tolerance = 1e-11
+
+
+def solve_batch(a_matrix, colcost, collower, colupper, rowlower, rowupper, max_iterations=None):
+    """
+    Bounded primal simplex (minimization) on a batch of small dense LPs sharing the constraint matrix:
+    rowlower <= A x <= rowupper, collower <= x <= colupper. Rows get slack variables s = A x, so the basis starts
+    from the slacks; phase 1 minimizes the sum of bound violations of the basic variables. The basis inverse is
+    recomputed at every iteration (LPs of a handful of rows), and an instance turns to Bland's rule after a streak
+    of degenerate pivots.
+    :param a_matrix: dense constraint matrix (m x n)
+    :param colcost: obj-fun coefficients (k x n, one LP per row)
+    :param collower: variables lower bounds (k x n or n), finite
+    :param colupper: variables upper bounds (k x n or n)
+    :param rowlower: constraints lower bounds (k x m or m)
+    :param rowupper: constraints upper bounds (k x m or m)
+    :param max_iterations: pivots per LP before it is reported FAILED, default 50 * (m + n)
+    :return: status (k), col_value, col_dual, row_value, row_dual, col_basis, row_basis (stacked highs_call output)
+    :raises ValueError: a variable has neither a finite lower nor upper bound
+    """
+    a_matrix = np.asarray(a_matrix, dtype=np.float64)
+    n_row, n_col = a_matrix.shape
+    n_var = n_col + n_row
+    cost = np.atleast_2d(np.asarray(colcost, dtype=np.float64))
+    k = len(cost)
+    lower = np.hstack([np.broadcast_to(collower, (k, n_col)), np.broadcast_to(rowlower, (k, n_row))]).astype(float)
+    upper = np.hstack([np.broadcast_to(colupper, (k, n_col)), np.broadcast_to(rowupper, (k, n_row))]).astype(float)
+    if has_free_columns(lower[:, :n_col], upper[:, :n_col]):
+        raise ValueError("free variables are not supported, solve the LP with scipy_solver")
+    cost = np.hstack([cost, np.zeros((k, n_row))])
+    m_matrix = np.hstack([a_matrix, -np.eye(n_row)])
+    if max_iterations is None:
+        max_iterations = 50 * n_var
+
+    basis = np.tile(np.arange(n_col, n_var), (k, 1))
+    status = np.where(np.isfinite(lower), LOWER, UPPER)
+    status[:, n_col:] = BASIC
+    result = np.full(k, FAILED)
+    phase_one = np.ones(k, dtype=bool)
+    degenerate = np.zeros(k, dtype=int)
+    active = np.arange(k)
+
+    for _ in range(max_iterations):
+        if len(active) == 0:
+            break
+        basis_a, status_a, lower_a, upper_a = basis[active], status[active], lower[active], upper[active]
+        try:
+            b_inverse = np.linalg.inv(m_matrix[:, basis_a].transpose(1, 0, 2))
+        except np.linalg.LinAlgError:
+            result[active] = FAILED
+            break
+        values = _nonbasic_values(status_a, lower_a, upper_a)
+        basic_values = -np.einsum("kij,kj->ki", b_inverse, values @ m_matrix.T)
+        basic_lower = np.take_along_axis(lower_a, basis_a, axis=1)
+        basic_upper = np.take_along_axis(upper_a, basis_a, axis=1)
+        tolerance = primal_tolerance * (1 + np.abs(basic_values))
+        below = basic_values < basic_lower - tolerance
+        above = basic_values > basic_upper + tolerance
+
+        # phase 1 is over once the basic variables are within their bounds
+        phase_one[active] &= (below | above).any(axis=1)
+        phase = phase_one[active]
+        basic_cost = np.where(phase[:, None], above.astype(float) - below, np.take_along_axis(cost[active], basis_a, 1))
+        full_cost = np.where(phase[:, None], 0.0, cost[active])
+        duals = np.einsum("ki,kij->kj", basic_cost, b_inverse)
+        reduced = full_cost - duals @ m_matrix
+        gain = np.where(status_a == LOWER, -reduced, np.where(status_a == UPPER, reduced, 0.0))
+        gain[status_a == BASIC] = 0.0
+        eligible = gain > dual_tolerance
+        done = ~eligible.any(axis=1)
+        if done.any():
+            result[active[done & ~phase]] = OPTIMAL
+            result[active[done & phase]] = INFEASIBLE
+
+        bland = degenerate[active] > n_var
+        entering = np.where(bland, np.argmax(eligible, axis=1), np.argmax(gain, axis=1))
+        go = ~done
+        if not go.any():
+            active = active[go]
+            continue
+        idx = np.flatnonzero(go)
+        entering = entering[idx]
+        sign = np.where(status_a[idx, entering] == LOWER, 1.0, -1.0)
+        alpha = np.einsum("kij,kj->ki", b_inverse[idx], m_matrix[:, entering].T)
+        change = -sign[:, None] * alpha  # basic variables per unit of entering step
+
+        # ratio test: feasible basics stop at their bounds, infeasible ones at the bound they move to
+        values_b, lower_b, upper_b = basic_values[idx], basic_lower[idx], basic_upper[idx]
+        below_b, above_b = below[idx], above[idx]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            up_limit = np.where(above_b, np.inf, np.where(below_b, lower_b, upper_b))
+            down_limit = np.where(below_b, -np.inf, np.where(above_b, upper_b, lower_b))
+            ratio = np.full(change.shape, np.inf)
+            increasing, decreasing = change > pivot_tolerance, change < -pivot_tolerance
+            ratio[increasing] = ((up_limit - values_b) / change)[increasing]
+            ratio[decreasing] = ((down_limit - values_b) / change)[decreasing]
+        ratio = np.maximum(ratio, 0.0)
+        ratio[np.isnan(ratio)] = np.inf
+        leaving = np.argmin(ratio, axis=1)
+        step = ratio[np.arange(len(idx)), leaving]
+        flip = upper_a[idx, entering] - lower_a[idx, entering]
+
+        inst = active[idx]
+        unbounded = np.isinf(step) & np.isinf(flip)
+        result[inst[unbounded]] = UNBOUNDED
+        flipping = (flip <= step) & ~unbounded
+        status[inst[flipping], entering[flipping]] = np.where(sign[flipping] > 0, UPPER, LOWER)
+        pivoting = ~flipping & ~unbounded
+        p_inst, p_enter, p_leave = inst[pivoting], entering[pivoting], leaving[pivoting]
+        p_change = change[pivoting, p_leave]
+        leaving_var = basis[p_inst, p_leave]
+        status[p_inst, leaving_var] = np.where(p_change > 0, UPPER, LOWER)
+        # a variable leaving from below its lower bound stops at the lower one (and above at the upper)
+        from_below = below_b[pivoting, p_leave]
+        from_above = above_b[pivoting, p_leave]
+        status[p_inst[from_below], leaving_var[from_below]] = LOWER
+        status[p_inst[from_above], leaving_var[from_above]] = UPPER
+        basis[p_inst, p_leave] = p_enter
+        status[p_inst, p_enter] = BASIC
+        degenerate[inst] = np.where(step <= primal_tolerance, degenerate[inst] + 1, 0)
+
+        still = np.ones(len(active), dtype=bool)
+        still[done] = False
+        still[idx[unbounded]] = False
+        active = active[still]
+
+    return _solution(a_matrix, m_matrix, cost, lower, upper, basis, status, result, n_col)
+
+
+def has_free_columns(collower, colupper):
+    """Whether a variable has no finite bound, solve_batch starts every nonbasic variable at one of its bounds"""
+    return not np.all(np.isfinite(collower) | np.isfinite(colupper))
+
+
+def _nonbasic_values(status, lower, upper):
+    return np.where(status == LOWER, lower, np.where(status == UPPER, upper, 0.0))
+
+
+def _solution(a_matrix, m_matrix, cost, lower, upper, basis, status, result, n_col):
+    """highs_call-like outputs of the final bases"""
+    k, n_row = basis.shape
+    values = _nonbasic_values(status, lower, upper)
+    b_inverse = np.linalg.pinv(m_matrix[:, basis].transpose(1, 0, 2))
+    basic_values = -np.einsum("kij,kj->ki", b_inverse, values @ m_matrix.T)
+    np.put_along_axis(values, basis, basic_values, axis=1)
+    col_value = values[:, :n_col]
+    row_value = col_value @ a_matrix.T
+    row_dual = np.einsum("ki,kij->kj", np.take_along_axis(cost, basis, 1), b_inverse)
+    col_dual = cost[:, :n_col] - row_dual @ a_matrix
+    col_dual[status[:, :n_col] == BASIC] = 0.0
+    return (result, col_value, col_dual, row_value, row_dual,
+            status[:, :n_col].astype(np.int32), status[:, n_col:].astype(np.int32))
+
+
+class Model(scipy_solver.Model):
+    """
+    LP model solved by solve_batch, one LP at a time by solve() and all at once by solve_many(). Instances the
+    kernel does not finish, and LPs with free variables, are solved by SciPy's HiGHS (scipy_solver.Model).
+    """
+    scaling_passes = 0  # Dantzig pricing takes more pivots on the scaled diet LP
+
+    def _run_solver(self, colcost, collower, colupper, rowlower, rowupper):
+        if has_free_columns(collower, colupper):
+            return super()._run_solver(colcost, collower, colupper, rowlower, rowupper)
+        sol = solve_batch(self._lp.a_matrix.toarray(), colcost, collower, colupper, rowlower, rowupper)
+        if sol[0][0] == FAILED:
+            return super()._run_solver(colcost, collower, colupper, rowlower, rowupper)
+        if sol[0][0] != OPTIMAL:
+            return None
+        return (0,) + tuple(v[0] for v in sol[1:])
+
+    def solve_many(self, constraints, rhs, objectives=None):
+        if not self._matrix_built:
+            self._build_matrix()
+        rowlower, rowupper = self._batch_row_bounds(constraints, rhs)
+        if objectives is None:
+            colcost = np.tile(self.colcost, (len(rowlower), 1))
+        else:
+            colcost = np.asarray(objectives, dtype=np.float64) * self.sense
+        columns = self._lp.columns(colcost, self.collower, self.colupper)
+        if has_free_columns(*columns[1:]):
+            # every LP goes the way of the FAILED ones
+            sol, result = None, np.full(len(rowlower), FAILED)
+        else:
+            sol = solve_batch(self._lp.a_matrix.toarray(), *columns, *self._lp.rows(rowlower, rowupper))
+            result = sol[0]
+        status = []
+        values, red_costs = np.full((2, len(result), len(self.colcost)), np.nan)
+        duals = np.full((len(result), len(self.rowlower)), np.nan)
+        objective = np.full(len(result), np.nan)
+        self.raw_solutions = []
+        for i in range(len(result)):
+            self.rowlower[:], self.rowupper[:], self.colcost[:] = rowlower[i], rowupper[i], colcost[i]
+            if result[i] == FAILED:
+                self.solve()
+                raw = self.raw_solution
+            else:
+                raw = None
+                if result[i] == OPTIMAL:
+                    raw = self._lp.solution(tuple(v[i] for v in sol), self.colcost, self.rowlower, self.rowupper)
+                    raw = (0,) + tuple(v.tolist() for v in raw[1:])
+                self.load_raw_solution(raw)
+            status.append(self.get_solution_status())
+            self.raw_solutions.append(raw)
+            if raw is not None:
+                values[i], red_costs[i], duals[i] = raw[1], raw[2], raw[4]
+                objective[i] = self.get_solution_obj()
+        return status, values, objective, duals, -red_costs
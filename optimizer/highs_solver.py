@@ -1,24 +1,47 @@
+import copy
 import ctypes
+import ctypes.util
 import logging
+import os
 import numpy as np
 from scipy.sparse import csc_matrix
 import platform
 
+from optimizer.basis_cache import BasisCache
+from optimizer.certificate_cache import CertificateCache
+from optimizer.conditioning import ConditionedLp
+
 # highs lib folder must be in "LD_LIBRARY_PATH" environment variable
 highslib = None
+# True when highslib exposes the object API (Highs_create...), models then keep a persistent HiGHS instance
+persistent = False
+
+model_status_optimal = 7
+model_status_infeasible = 8
+matrix_format_colwise = 1
+sense_minimize = 1
 
 def_status = {0: "optimal", None: "infeasible"}
-epsilon = 0.0000001
+# rows without upper bound report their slack to this value (open bounds are passed to HiGHS as infinities)
 infinite = 10000000
 
 
 def config():
-    global highslib
+    global highslib, persistent
+    if highslib is not None:
+        return
     if platform.system() in ('Windows', 'Microsoft'):
         highslib = ctypes.cdll.LoadLibrary("./optimizer/resources/highs.dll")
     else:
-        # TODO: Implement call to LINUX .so solver
-        raise SystemError("Only windows dll available")
+        # HIGHS_LIBRARY points to libhighs.so, otherwise it is looked up as any other shared library
+        library = os.environ.get("HIGHS_LIBRARY") or ctypes.util.find_library("highs") or "libhighs.so"
+        try:
+            highslib = ctypes.cdll.LoadLibrary(library)
+        except OSError as e:
+            raise SystemError(f"HiGHS shared library not found ({library}), set HIGHS_LIBRARY: {e}")
+        _bind_object_api(highslib)
+        persistent = True
+        return
 
     highslib.Highs_call.argtypes = (ctypes.c_int, ctypes.c_int, ctypes.c_int,
                                     ctypes.POINTER(ctypes.c_double),
@@ -39,7 +62,35 @@ def config():
     highslib.Highs_call.restype = ctypes.c_int
 
 
-def highs_call(colcost, collower, colupper, rowlower, rowupper, astart, aindex, avalue):
+def _bind_object_api(lib):
+    dbl_p = ctypes.POINTER(ctypes.c_double)
+    int_p = ctypes.POINTER(ctypes.c_int)
+    lib.Highs_create.argtypes = ()
+    lib.Highs_create.restype = ctypes.c_void_p
+    lib.Highs_destroy.argtypes = (ctypes.c_void_p,)
+    lib.Highs_destroy.restype = None
+    lib.Highs_setBoolOptionValue.argtypes = (ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int)
+    lib.Highs_passLp.argtypes = (ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+                                 ctypes.c_int, ctypes.c_double, dbl_p, dbl_p, dbl_p, dbl_p, dbl_p,
+                                 int_p, int_p, dbl_p)
+    lib.Highs_changeColsCostByRange.argtypes = (ctypes.c_void_p, ctypes.c_int, ctypes.c_int, dbl_p)
+    lib.Highs_changeColsBoundsByRange.argtypes = (ctypes.c_void_p, ctypes.c_int, ctypes.c_int, dbl_p, dbl_p)
+    lib.Highs_changeRowsBoundsByRange.argtypes = (ctypes.c_void_p, ctypes.c_int, ctypes.c_int, dbl_p, dbl_p)
+    lib.Highs_changeCoeff.argtypes = (ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_double)
+    lib.Highs_run.argtypes = (ctypes.c_void_p,)
+    lib.Highs_getModelStatus.argtypes = (ctypes.c_void_p,)
+    lib.Highs_getSolution.argtypes = (ctypes.c_void_p, dbl_p, dbl_p, dbl_p, dbl_p)
+    lib.Highs_getBasis.argtypes = (ctypes.c_void_p, int_p, int_p)
+    lib.Highs_setBasis.argtypes = (ctypes.c_void_p, int_p, int_p)
+    lib.Highs_getDualRay.argtypes = (ctypes.c_void_p, int_p, dbl_p)
+    for name in ("Highs_setBoolOptionValue", "Highs_passLp", "Highs_changeColsCostByRange",
+                 "Highs_changeColsBoundsByRange", "Highs_changeRowsBoundsByRange", "Highs_changeCoeff", "Highs_run",
+                 "Highs_getModelStatus", "Highs_getSolution", "Highs_getBasis", "Highs_setBasis",
+                 "Highs_getDualRay"):
+        getattr(lib, name).restype = ctypes.c_int
+
+
+def highs_call(colcost, collower, colupper, rowlower, rowupper, astart, aindex, avalue, out=None):
     """
     :param colcost: obj-fun coefficients [default minimize]
     :param collower: vector variables lower bound
@@ -49,6 +100,7 @@ def highs_call(colcost, collower, colupper, rowlower, rowupper, astart, aindex,
     :param astart: column pointer vector (column compression matrix)
     :param aindex: row-index vector (column compression matrix)
     :param avalue: non-zero coefficients vector (column compression matrix)
+    :param out: SolutionBuffers written by HiGHS, allocated here if None or of another size
     :returns retcode: status code
     :returns col_value: optimal variables' values
     :returns col_dual: optimal dual variables' values (shadow price)
@@ -56,6 +108,8 @@ def highs_call(colcost, collower, colupper, rowlower, rowupper, astart, aindex,
     :returns row_dual: reduced costs of constraints
     :returns col_basis: check comment on Enum objetc below
     :returns row_basis: check comment on Enum objetc below
+    Inputs are handed to HiGHS as pointers to numpy arrays (copied only if not contiguous float64/int32),
+    outputs are views of the out buffers and are overwritten by the next call with the same buffers.
 
      enum class HighsBasisStatus {
        LOWER =
@@ -70,36 +124,18 @@ def highs_call(colcost, collower, colupper, rowlower, rowupper, astart, aindex,
     """
 
     global highslib
+    colcost, collower, colupper, rowlower, rowupper, avalue = \
+        [as_double(v) for v in (colcost, collower, colupper, rowlower, rowupper, avalue)]
+    astart, aindex = as_int(astart), as_int(aindex)
     n_col = len(colcost)
     n_row = len(rowlower)
     n_nz = len(aindex)
 
-    dbl_array_type_col = ctypes.c_double * n_col
-    dbl_array_type_row = ctypes.c_double * n_row
-    int_array_type_astart = ctypes.c_int * (n_col + 1)
-    int_array_type_aindex = ctypes.c_int * n_nz
-    dbl_array_type_avalue = ctypes.c_double * n_nz
-
-    int_array_type_col = ctypes.c_int * n_col
-    int_array_type_row = ctypes.c_int * n_row
-
-    col_value = [0] * n_col
-    col_dual = [0] * n_col
-
-    row_value = [0] * n_row
-    row_dual = [0] * n_row
-
-    col_basis = [0] * n_col
-    row_basis = [0] * n_row
+    if out is None or not out.fits(n_col, n_row):
+        out = SolutionBuffers(n_col, n_row)
 
     return_val = 0
 
-    col_value = dbl_array_type_col(*col_value)
-    col_dual = dbl_array_type_col(*col_dual)
-    row_value = dbl_array_type_row(*row_value)
-    row_dual = dbl_array_type_row(*row_dual)
-    col_basis = int_array_type_col(*col_basis)
-    row_basis = int_array_type_row(*row_basis)
     logging.info(f"colcost=[{colcost}\n"
                  f"collower={collower}\n"
                  f"colupper={colupper}\n"
@@ -111,12 +147,12 @@ def highs_call(colcost, collower, colupper, rowlower, rowupper, astart, aindex,
     try:
         retcode = highslib.Highs_call(
             ctypes.c_int(n_col), ctypes.c_int(n_row), ctypes.c_int(n_nz),
-            dbl_array_type_col(*colcost), dbl_array_type_col(*collower), dbl_array_type_col(*colupper),
-            dbl_array_type_row(*rowlower), dbl_array_type_row(*rowupper),
-            int_array_type_astart(*astart), int_array_type_aindex(*aindex), dbl_array_type_avalue(*avalue),
-            col_value, col_dual,
-            row_value, row_dual,
-            col_basis, row_basis, ctypes.byref(ctypes.c_int(return_val)))
+            _pointer(colcost), _pointer(collower), _pointer(colupper),
+            _pointer(rowlower), _pointer(rowupper),
+            _pointer(astart), _pointer(aindex), _pointer(avalue),
+            _pointer(out.col_value), _pointer(out.col_dual),
+            _pointer(out.row_value), _pointer(out.row_dual),
+            _pointer(out.col_basis), _pointer(out.row_basis), ctypes.byref(ctypes.c_int(return_val)))
         print(retcode)
     except Exception as e:
         if "writing" in e.args[0]:
@@ -124,7 +160,117 @@ def highs_call(colcost, collower, colupper, rowlower, rowupper, astart, aindex,
         else:
             logging.error("An error occurred when executing HiGHS, probably infeasible: {}".format(str(e)))
         return None
-    return retcode, list(col_value), list(col_dual), list(row_value), list(row_dual), list(col_basis), list(row_basis)
+    return retcode, out.col_value, out.col_dual, out.row_value, out.row_dual, out.col_basis, out.row_basis
+
+
+class SolutionBuffers:
+    """Output arrays of highs_call, allocated once per LP size and reused by every solve"""
+
+    def __init__(self, n_col, n_row):
+        self.col_value = np.zeros(n_col, dtype=np.float64)
+        self.col_dual = np.zeros(n_col, dtype=np.float64)
+        self.row_value = np.zeros(n_row, dtype=np.float64)
+        self.row_dual = np.zeros(n_row, dtype=np.float64)
+        self.col_basis = np.zeros(n_col, dtype=np.int32)
+        self.row_basis = np.zeros(n_row, dtype=np.int32)
+
+    def fits(self, n_col, n_row):
+        return len(self.col_value) == n_col and len(self.row_value) == n_row
+
+
+def as_double(values):
+    """Contiguous float64 array, values itself when it already is one"""
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def as_int(values):
+    """Contiguous C int array, values itself when it already is one"""
+    return np.ascontiguousarray(values, dtype=np.intc)
+
+
+def _pointer(array):
+    if array.dtype == np.intc:
+        return array.ctypes.data_as(ctypes.POINTER(ctypes.c_int))
+    return array.ctypes.data_as(ctypes.POINTER(ctypes.c_double))
+
+
+class Highs:
+    """
+    Persistent HiGHS instance (C object API). The LP is passed once, later solves only change costs,
+    row bounds and coefficients in place, so HiGHS keeps its internal state between them.
+    """
+
+    model_status = None
+
+    def __init__(self):
+        self.handle = ctypes.c_void_p(highslib.Highs_create())
+        highslib.Highs_setBoolOptionValue(self.handle, b"output_flag", 0)
+
+    def __del__(self):
+        if self.handle and highslib is not None:
+            highslib.Highs_destroy(self.handle)
+            self.handle = None
+
+    def pass_lp(self, colcost, collower, colupper, rowlower, rowupper, astart, aindex, avalue):
+        colcost, collower, colupper, rowlower, rowupper, avalue = \
+            [as_double(v) for v in (colcost, collower, colupper, rowlower, rowupper, avalue)]
+        astart, aindex = as_int(astart), as_int(aindex)
+        status = highslib.Highs_passLp(
+            self.handle, len(colcost), len(rowlower), len(aindex), matrix_format_colwise, sense_minimize, 0.0,
+            _pointer(colcost), _pointer(collower), _pointer(colupper), _pointer(rowlower), _pointer(rowupper),
+            _pointer(astart), _pointer(aindex), _pointer(avalue))
+        if status < 0:
+            raise RuntimeError(f"HiGHS rejected the LP (status {status})")
+
+    def change(self, colcost, collower, colupper, rowlower, rowupper, coefficients=()):
+        """
+        :param colcost: new obj-fun coefficients (all columns)
+        :param collower: new variables lower bounds (all columns)
+        :param colupper: new variables upper bounds (all columns)
+        :param rowlower: new constraints lhs bounds (all rows)
+        :param rowupper: new constraints rhs bounds (all rows)
+        :param coefficients: (row, column, value) of changed matrix entries
+        """
+        colcost, collower, colupper, rowlower, rowupper = \
+            [as_double(v) for v in (colcost, collower, colupper, rowlower, rowupper)]
+        if len(colcost) > 0:
+            highslib.Highs_changeColsCostByRange(self.handle, 0, len(colcost) - 1, _pointer(colcost))
+            highslib.Highs_changeColsBoundsByRange(self.handle, 0, len(colcost) - 1,
+                                                   _pointer(collower), _pointer(colupper))
+        if len(rowlower) > 0:
+            highslib.Highs_changeRowsBoundsByRange(self.handle, 0, len(rowlower) - 1,
+                                                   _pointer(rowlower), _pointer(rowupper))
+        for row, col, val in coefficients:
+            highslib.Highs_changeCoeff(self.handle, row, col, val)
+
+    def set_basis(self, col_basis, row_basis):
+        """Start the next run (dual simplex) from this basis instead of the one HiGHS holds"""
+        col_basis, row_basis = as_int(col_basis), as_int(row_basis)
+        if highslib.Highs_setBasis(self.handle, _pointer(col_basis), _pointer(row_basis)) < 0:
+            logging.warning("HiGHS rejected the warm start basis")
+
+    def run(self, out):
+        """Solve the current LP, same returns as highs_call (None unless optimal)"""
+        self.model_status = None
+        if highslib.Highs_run(self.handle) < 0:
+            logging.error("An error occurred when executing HiGHS")
+            return None
+        self.model_status = highslib.Highs_getModelStatus(self.handle)
+        if self.model_status != model_status_optimal:
+            return None
+        highslib.Highs_getSolution(self.handle, _pointer(out.col_value), _pointer(out.col_dual),
+                                   _pointer(out.row_value), _pointer(out.row_dual))
+        highslib.Highs_getBasis(self.handle, _pointer(out.col_basis), _pointer(out.row_basis))
+        return 0, out.col_value, out.col_dual, out.row_value, out.row_dual, out.col_basis, out.row_basis
+
+    def dual_ray(self, n_row):
+        """Farkas certificate of the last run if it was infeasible, None otherwise"""
+        if self.model_status != model_status_infeasible:
+            return None
+        has_ray = ctypes.c_int(0)
+        ray = np.zeros(n_row, dtype=np.float64)
+        highslib.Highs_getDualRay(self.handle, ctypes.byref(has_ray), _pointer(ray))
+        return ray if has_ray.value else None
 
 
 class Model:
@@ -134,13 +280,14 @@ class Model:
         opt_objective = None
 
         def __init__(self, *args):
-            [var_names, cstrs] = args
+            [var_names, cs_names, rowupper] = args
             self.variables = dict(zip(list(var_names), [None for i in range(len(var_names))]))
             self.basic_variables = dict(zip(list(var_names), [None for i in range(len(var_names))]))
-            self.constraints = dict(zip(list(cstrs.keys()),[{} for i in range(len(cstrs))]))
-            for constraint in cstrs.keys():
+            self.constraints = dict(zip(list(cs_names), [{} for i in range(len(cs_names))]))
+            for i, constraint in enumerate(cs_names):
                 self.constraints[constraint]["optimal"] = None
-                self.constraints[constraint]["slack"] = cstrs[constraint]["rhs"]
+                self.constraints[constraint]["upper"] = float(rowupper[i])
+                self.constraints[constraint]["slack"] = float(rowupper[i])
                 self.constraints[constraint]["active"] = None
 
         def get_solution(self, *args):
@@ -162,79 +309,176 @@ class Model:
                 const_names = list(self.constraints.keys())
                 for i in range(len(aux_constraints)):
                     self.constraints[const_names[i]]["optimal"] = aux_constraints[i]
-                    slack = self.constraints[const_names[i]]["slack"]
-                    self.constraints[const_names[i]]["slack"] = abs(aux_constraints[i] - slack)
+                    # from the bound kept at creation, a solution loaded twice reports the same slack
+                    upper = self.constraints[const_names[i]]["upper"]
+                    self.constraints[const_names[i]]["slack"] = abs(aux_constraints[i] - upper)
                     self.constraints[const_names[i]]["active"] = aux_active_constraints[i]
             self.status = def_status[self.status]
 
-        def comp_objective(self, variables_coef):
+        def comp_objective(self, colcost):
             if not self.status.__contains__("infeasible"):
-                self.opt_objective = float(np.dot(list(variables_coef.values()), list(self.variables.values())))
-
-    colcost, collower, colupper, rowlower, rowupper, astart, aindex, avalue = [[] for i in range(8)]
-    var_map = {}
-    rev_var_map = {}
-    cs_map = {}
-    rev_cs_map = {}
+                values = np.array(list(self.variables.values()))
+                # columns with infinite cost are fixed at their bound, nothing is paid at 0
+                self.opt_objective = float(np.dot(np.where(values == 0, 0.0, colcost), values))
+
+    colcost, collower, colupper, rowlower, rowupper, astart, aindex, avalue = [None for i in range(8)]
+    variables = None  # {name: column}
+    constraints = None  # {name: row}
+    senses = None
+    _rows = None  # {name: (variable names, coefficients)} used to build the constraint matrix
+    _matrix_built = False
     solution = None
-    sense, variables, constraints, var_lb, var_ub = [None for j in range(5)]
+    raw_solution = None
+    raw_solutions = None  # raw_solution of every instance of the last solve_many
+    _buffers = None
+    _highs = None  # persistent Highs instance, None until the first solve or when the LP must be passed again
+    _changed_coefficients = None  # (row, column, value) of the solver LP changed since the last solve
+    _lp = None  # ConditionedLp passed to the solvers, built with the constraint matrix
+    scaling_passes = 4  # geometric scaling passes of the solver LP, 0 leaves it unscaled
+    basis = None  # (col_basis, row_basis) of the last optimal solution
+    basis_cache = None  # BasisCache of the solver LP, answers LPs before HiGHS is called
+    basis_cache_size = 8
+    certificate_cache = None  # CertificateCache of the solver LP, rejects infeasible LPs
+    certificate_cache_size = 16
+    sense = None
     objective_offset = 0
 
     def __init__(self):
         self.variables = {}
         self.constraints = {}
-        self.var_lb = {}
-        self.var_ub = {}
+        self.senses = []
+        self._rows = {}
+        self.colcost = np.zeros(0)
+        self.collower = np.zeros(0)
+        self.colupper = np.zeros(0)
+        self.rowlower = np.zeros(0)
+        self.rowupper = np.zeros(0)
+        self._matrix_built = False
+        self._changed_coefficients = []
 
     def _solve(self):
+        lp = self._lp
+        colcost, collower, colupper = lp.columns(self.colcost, self.collower, self.colupper)
+        rowlower, rowupper = lp.rows(self.rowlower, self.rowupper)
+        if self.basis_cache is None:
+            a_matrix = lp.a_matrix.toarray()
+            self.basis_cache = BasisCache(a_matrix, self.basis_cache_size)
+            self.certificate_cache = CertificateCache(a_matrix, self.certificate_cache_size)
+        if self.certificate_cache.infeasible(collower, colupper, rowlower, rowupper):
+            self.load_raw_solution(None)
+            return
+        sol_highs = self.basis_cache.solve(colcost, collower, colupper, rowlower, rowupper)
+        if sol_highs is None:
+            sol_highs = self._run_solver(colcost, collower, colupper, rowlower, rowupper)
+            if sol_highs is not None:
+                self.basis_cache.add(sol_highs[5], sol_highs[6])
+        if sol_highs is not None:
+            sol_highs = lp.solution(sol_highs, self.colcost, self.rowlower, self.rowupper)
+            sol_highs = (sol_highs[0],) + tuple(v.tolist() for v in sol_highs[1:])
+        self.load_raw_solution(sol_highs)
+
+    def _run_solver(self, colcost, collower, colupper, rowlower, rowupper):
+        """
+        Solve the solver LP (self._lp) with these costs and bounds
+        :return: highs_call tuple in solver rows and units (None unless optimal), the buffers are overwritten by
+                the next solve
+        """
+        if self._buffers is None or not self._buffers.fits(*reversed(self._lp.shape)):
+            self._buffers = SolutionBuffers(*reversed(self._lp.shape))
+        if persistent:
+            return self._run_persistent(colcost, collower, colupper, rowlower, rowupper)
+        return highs_call(
+            colcost,
+            collower,
+            colupper,
+            rowlower,
+            rowupper,
+            self._lp.astart,
+            self._lp.aindex,
+            self._lp.avalue,
+            self._buffers)
+
+    def _run_persistent(self, colcost, collower, colupper, rowlower, rowupper):
+        if self._highs is None:
+            self._highs = Highs()
+            self._highs.pass_lp(colcost, collower, colupper, rowlower, rowupper,
+                                self._lp.astart, self._lp.aindex, self._lp.avalue)
+            # between runs HiGHS keeps its own basis (also after infeasible ones, which is the better start
+            # in the infeasible CNEm tails), the last optimal one is only needed by a new instance
+            if self.basis is not None and \
+                    len(self.basis[0]) == len(self.colcost) and len(self.basis[1]) == len(self.rowlower):
+                self._highs.set_basis(*self._lp.basis(*self.basis))
+        else:
+            self._highs.change(colcost, collower, colupper, rowlower, rowupper, self._changed_coefficients)
+        self._changed_coefficients = []
+        sol_highs = self._highs.run(self._buffers)
+        if sol_highs is None:
+            ray = self._highs.dual_ray(len(rowlower))
+            if ray is not None:
+                self.certificate_cache.add(ray)
+        return sol_highs
+
+    def load_raw_solution(self, sol_highs):
+        """Take HiGHS output as the solution of the current LP, as if it had just been solved"""
         if self.solution is None:
-            self.solution = self._Solution(self.variables.keys(), self.constraints)
-
-        sol_highs = highs_call(
-            self.colcost,
-            self.collower,
-            self.colupper,
-            self.rowlower,
-            self.rowupper,
-            self.astart,
-            self.aindex,
-            self.avalue)
+            self.solution = self._Solution(self.variables.keys(), self.constraints.keys(),
+                                           np.where(np.isinf(self.rowupper), infinite, self.rowupper))
+        self.raw_solution = sol_highs
         self.solution.get_solution(sol_highs)
+        if sol_highs is not None:
+            self.basis = (sol_highs[5], sol_highs[6])
 
-        self.solution.comp_objective(self.variables)
-
-    def _model_check(self):
-        self.colcost, self.collower, self.colupper, self.rowlower,\
-        self.rowupper, self.astart, self.aindex, self.avalue = [[] for i in range(8)]
-
-    def _model_compress(self):
-        self.var_map = dict(zip(range(len(self.variables)), self.variables.keys()))
-        self.rev_var_map = dict(zip(self.variables.keys(), range(len(self.variables))))
-        for var in range(len(self.variables)):
-            self.colcost.append(self.variables[self.var_map[var]])
-            self.collower.append(self.var_lb[self.var_map[var]])
-            self.colupper.append(self.var_ub[self.var_map[var]])
-        self.cs_map = dict(zip(range(len(self.constraints)), self.constraints.keys()))
-        self.rev_cs_map = dict(zip(self.constraints.keys(), range(len(self.constraints))))
+        self.solution.comp_objective(self.colcost)
+
+    def reset_solution(self):
+        """Forget previous solutions, the next one is reported as for a newly built model"""
+        self.solution = None
+        self.raw_solution = None
+
+    def copy(self):
+        """
+        Model with the same LP and no solution. The copy gets its own HiGHS instance; the basis and certificate
+        caches are shared, they only hold solutions valid for the constraint matrix (a changed matrix gets new ones)
+        and lock their updates, so copies may be solved in different threads.
+        """
+        clone = copy.copy(self)
+        for name in ("colcost", "collower", "colupper", "rowlower", "rowupper", "avalue"):
+            setattr(clone, name, None if getattr(self, name) is None else getattr(self, name).copy())
+        clone.variables = dict(self.variables)
+        clone.constraints = dict(self.constraints)
+        clone.senses = list(self.senses)
+        clone._rows = {name: (list(variables), list(coefficients))
+                       for name, (variables, coefficients) in self._rows.items()}
+        if self._lp is not None:
+            clone._lp = self._lp.copy()
+        clone._highs = None
+        clone._buffers = None
+        clone._changed_coefficients = []
+        clone.reset_solution()
+        clone.raw_solutions = None
+        return clone
+
+    def _build_matrix(self):
+        """Column compressed constraint matrix, built once unless constraints or coefficients are added"""
         row = []
         col = []
         data = []
-        for cs in range(len(self.constraints)):
-            self.rowlower.append(self.constraints[self.cs_map[cs]]["lhs"])
-            self.rowupper.append(self.constraints[self.cs_map[cs]]["rhs"])
-            # print(self.constraints[self.cs_map[cs]]["coefficients"])
-            for j in range(len(self.constraints[self.cs_map[cs]]["variables"])):
-                col.append(self.rev_var_map[self.constraints[self.cs_map[cs]]["variables"][j]])
+        for name, cs in self.constraints.items():
+            variables, coefficients = self._rows[name]
+            for j in range(len(variables)):
+                col.append(self.variables[variables[j]])
                 row.append(cs)
-                data.append(self.constraints[self.cs_map[cs]]["coefficients"][j])
-
-        # print("Max: {0}\n\nst:\nrhs:{1}\n\nlhs:{2}\n\nx lb: {3}\n\nx ub: {4}\n\n".format(
-        #     self.colcost, self.rowlower, self.rowupper, self.collower, self.colupper))
+                data.append(coefficients[j])
 
         sparse_matrix = csc_matrix((data, (row, col)), shape=(len(self.constraints), len(self.variables)))
-        self.aindex = list(sparse_matrix.indices)
-        self.astart = list(sparse_matrix.indptr)
-        self.avalue = list(sparse_matrix.data)
+        self.aindex = sparse_matrix.indices.astype(np.int32)
+        self.astart = sparse_matrix.indptr.astype(np.int32)
+        self.avalue = sparse_matrix.data.astype(np.float64)
+        self._lp = ConditionedLp(sparse_matrix, self.scaling_passes)
+        self._matrix_built = True
+        self._highs = None
+        self.basis_cache = None
+        self._changed_coefficients = []
 
     def set_sense(self, direction="max"):
         if direction == "max":
@@ -258,10 +502,13 @@ class Model:
             raise IndexError("lp_model > add_variables, vector's length don't match")
         if len(names) == 0:
             names = list(range(len(obj)))
+        first = len(self.variables)
         for i in range(len(names)):
-            self.variables[names[i]] = obj[i] * self.sense
-            self.var_lb[names[i]] = lb[i]
-            self.var_ub[names[i]] = ub[i]
+            self.variables[names[i]] = first + i
+        self.colcost = np.concatenate([self.colcost, [obj[i] * self.sense for i in range(len(names))]])
+        self.collower = np.concatenate([self.collower, np.asarray(lb, dtype=np.float64)])
+        self.colupper = np.concatenate([self.colupper, np.asarray(ub, dtype=np.float64)])
+        self._matrix_built = False
         return self.variables
 
     def add_constraint(self, names=None, lin_expr=None, rhs=None, senses=None):
@@ -276,44 +523,40 @@ class Model:
         :param senses: {E: equal, G: greater-equal, L: lower-equal}
         :type names: list
         """
+        lower, upper = [], []
         for i in range(len(names)):
             if senses[i] == "E":
-                # self.equality_constraints.append(names[i])
-                self.constraints[names[i]] = {}
-                self.constraints[names[i]]["variables"] = lin_expr[i][0]
-                self.constraints[names[i]]["coefficients"] = lin_expr[i][1]
-                self.constraints[names[i]]["lhs"] = rhs[i] - epsilon
-                self.constraints[names[i]]["rhs"] = rhs[i] + epsilon
-                self.constraints[names[i]]["sense"] = "E"
-
+                lower.append(rhs[i])
+                upper.append(rhs[i])
             elif senses[i] == "G":
-                self.constraints[names[i]] = {}
-                self.constraints[names[i]]["variables"] = lin_expr[i][0]
-                self.constraints[names[i]]["coefficients"] = lin_expr[i][1]
-                self.constraints[names[i]]["lhs"] = rhs[i]
-                self.constraints[names[i]]["rhs"] = infinite
-                self.constraints[names[i]]["sense"] = "G"
+                lower.append(rhs[i])
+                upper.append(np.inf)
             elif senses[i] == "L":
-                self.constraints[names[i]] = {}
-                self.constraints[names[i]]["variables"] = lin_expr[i][0]
-                self.constraints[names[i]]["coefficients"] = lin_expr[i][1]
-                self.constraints[names[i]]["lhs"] = -infinite
-                self.constraints[names[i]]["rhs"] = rhs[i]
-                self.constraints[names[i]]["sense"] = "L"
+                lower.append(-np.inf)
+                upper.append(rhs[i])
+            else:
+                continue
+            self.constraints[names[i]] = len(self.constraints)
+            self.senses.append(senses[i])
+            self._rows[names[i]] = (list(lin_expr[i][0]), list(lin_expr[i][1]))
+        self.rowlower = np.concatenate([self.rowlower, np.asarray(lower, dtype=np.float64)])
+        self.rowupper = np.concatenate([self.rowupper, np.asarray(upper, dtype=np.float64)])
+        self._matrix_built = False
 
     def set_constraint_rhs(self, seq_of_pairs):
         for cons_tuple in seq_of_pairs:
-            if self.constraints[cons_tuple[0]]["sense"] == "E":
-                self.constraints[cons_tuple[0]]["lhs"] = cons_tuple[1] - epsilon
-                self.constraints[cons_tuple[0]]["rhs"] = cons_tuple[1] + epsilon
-            if self.constraints[cons_tuple[0]]["sense"] == "L":
-                self.constraints[cons_tuple[0]]["rhs"] = cons_tuple[1]
-            if self.constraints[cons_tuple[0]]["sense"] == "G":
-                self.constraints[cons_tuple[0]]["lhs"] = cons_tuple[1]
+            cs = self.constraints[cons_tuple[0]]
+            if self.senses[cs] == "E":
+                self.rowlower[cs] = cons_tuple[1]
+                self.rowupper[cs] = cons_tuple[1]
+            if self.senses[cs] == "L":
+                self.rowupper[cs] = cons_tuple[1]
+            if self.senses[cs] == "G":
+                self.rowlower[cs] = cons_tuple[1]
 
     def set_constraint_sense(self, cst_name, sense):
         if sense in ["L", "G"]:
-            self.constraints[cst_name]["sense"] = sense
+            self.senses[self.constraints[cst_name]] = sense
         else:
             raise Exception(f"sense {sense} not supported")
 
@@ -321,9 +564,22 @@ class Model:
         for triplet in seq_of_triplets:
             cst = triplet[0]
             var = triplet[1]
-            index = list(self.constraints[cst]['variables']).index(var)
             val = triplet[2]
-            self.constraints[cst]["coefficients"][index] = val
+            variables, coefficients = self._rows[cst]
+            index = variables.index(var)
+            coefficients[index] = val
+            if self._matrix_built:
+                col, row = self.variables[var], self.constraints[cst]
+                entries = np.nonzero(self.aindex[self.astart[col]:self.astart[col + 1]] == row)[0]
+                changed = None
+                if len(entries) == 1 and variables.count(var) == 1:
+                    self.avalue[self.astart[col] + entries[0]] = val
+                    changed = self._lp.set_coefficient(row, col, val)
+                if changed is not None:
+                    self._changed_coefficients.append(changed)
+                    self.basis_cache = None
+                else:
+                    self._matrix_built = False
 
     def set_objective_offset(self, val):
         self.objective_offset = val
@@ -335,24 +591,24 @@ class Model:
         names = list(self.variables.keys())
         for i in range(len(self.variables)):
             if names[i] == obj_vec[i][0]:
-                self.variables[names[i]] = obj_vec[i][1] * self.sense
+                self.colcost[i] = obj_vec[i][1] * self.sense
             else:
                 logging.error("Variables' names don't match:\n{0}\n{1}\n\n".format(names, obj_vec))
                 raise IndexError
 
     def get_constraints_names(self):
-        cs_names = self.constraints.keys()
-        return list(dict.fromkeys(cs_names))
+        return list(self.constraints.keys())
 
     def get_constraints_rhs(self, constraints):
         rhs = []
         for cs_name in constraints:
-            if self.constraints[cs_name]["sense"] == "E":
-                rhs.append(self.constraints[cs_name]["rhs"] - epsilon)
-            if self.constraints[cs_name]["sense"] == "L":
-                rhs.append(self.constraints[cs_name]["rhs"])
-            if self.constraints[cs_name]["sense"] == "G":
-                rhs.append(self.constraints[cs_name]["lhs"])
+            cs = self.constraints[cs_name]
+            if self.senses[cs] == "E":
+                rhs.append(self.rowupper[cs])
+            if self.senses[cs] == "L":
+                rhs.append(self.rowupper[cs])
+            if self.senses[cs] == "G":
+                rhs.append(self.rowlower[cs])
 
         return rhs
 
@@ -361,12 +617,54 @@ class Model:
 
     def solve(self):
         try:
-            self._model_check()
-            self._model_compress()
+            if not self._matrix_built:
+                self._build_matrix()
             self._solve()
         except Exception as e:
             logging.error("An error occurred:\n{}".format(str(e)))
 
+    def solve_many(self, constraints, rhs, objectives=None):
+        """
+        Solve the LP once per row of rhs (and objectives) in order, each solve starting from the previous one.
+        The model keeps the last right-hand side, objective and solution.
+        :param constraints: names of the constraints in the columns of rhs
+        :param rhs: matrix with one right-hand side per row
+        :param objectives: matrix with the obj-fun coefficients of all variables per row, None keeps the objective
+        :return: status list and matrices of solutions, objective values, duals and reduced costs (NaN if infeasible)
+        """
+        rowlower, rowupper = self._batch_row_bounds(constraints, rhs)
+        n_var, n_row = len(self.colcost), len(self.rowlower)
+        status = []
+        values, duals, red_costs = np.full((3, len(rowlower), max(n_var, n_row)), np.nan)
+        objective = np.full(len(rowlower), np.nan)
+        self.raw_solutions = []
+        for i in range(len(rowlower)):
+            self.rowlower[:], self.rowupper[:] = rowlower[i], rowupper[i]
+            if objectives is not None:
+                self.colcost[:] = np.asarray(objectives[i], dtype=np.float64) * self.sense
+            self.solve()
+            status.append(self.get_solution_status())
+            self.raw_solutions.append(self.raw_solution)
+            if self.raw_solution is not None:
+                values[i, :n_var] = self.raw_solution[1]
+                red_costs[i, :n_var] = self.raw_solution[2]
+                duals[i, :n_row] = self.raw_solution[4]
+                objective[i] = self.get_solution_obj()
+        return status, values[:, :n_var], objective, duals[:, :n_row], -red_costs[:, :n_var]
+
+    def _batch_row_bounds(self, constraints, rhs):
+        """Row bounds (one row per right-hand side) of the current LP with rhs set on constraints"""
+        rhs = np.atleast_2d(np.asarray(rhs, dtype=np.float64))
+        rows = np.array([self.constraints[name] for name in constraints], dtype=int)
+        senses = np.array([self.senses[row] for row in rows])
+        equal, greater, lower = senses == "E", senses == "G", senses == "L"
+        rowlower, rowupper = np.tile(self.rowlower, (len(rhs), 1)), np.tile(self.rowupper, (len(rhs), 1))
+        rowlower[:, rows[equal]] = rhs[:, equal]
+        rowupper[:, rows[equal]] = rhs[:, equal]
+        rowlower[:, rows[greater]] = rhs[:, greater]
+        rowupper[:, rows[lower]] = rhs[:, lower]
+        return rowlower, rowupper
+
     def get_solution_status(self):
         return self.solution.status
 
@@ -0,0 +1,23 @@
+"""Small LP shared by the solver and cache tests"""
+import numpy as np
+
+# max x1 + 2 x2  s.t.  x1 + x2 + x3 = 1,  3 x1 >= a,  4 x2 <= 2,  0 <= x <= 1: infeasible for a > 3
+A_MATRIX = [[1, 1, 1], [3, 0, 0], [0, 4, 0]]
+COST = np.array([-1.0, -2.0, 0.0])  # as passed to the solvers, which minimize
+COL_LOWER, COL_UPPER = np.zeros(3), np.ones(3)
+
+
+def row_bounds(a):
+    """Solver row bounds of the LP with 3 x1 >= a"""
+    return np.array([1.0, a, -np.inf]), np.array([1.0, np.inf, 2.0])
+
+
+def lp(rhs_a, model_class):
+    """The LP with 3 x1 >= rhs_a built in a highs_solver.Model (or subclass)"""
+    model = model_class()
+    model.set_sense("max")
+    model.add_variables(obj=[1.0, 2.0, 0.0], lb=[0, 0, 0], ub=[1, 1, 1], names=["x1", "x2", "x3"])
+    model.add_constraint(names=["SUM 1", "A", "B"],
+                         lin_expr=[[["x1", "x2", "x3"], [1, 1, 1]], [["x1"], [3.0]], [["x2"], [4.0]]],
+                         rhs=[1, rhs_a, 2], senses=["E", "G", "L"])
+    return model
@@ -1,9 +1,89 @@
 import numpy as np
 from aenum import Enum
+from collections import OrderedDict
 import logging
+import time
 from model.lp_model import Model
 
-Status = Enum('Status', 'EMPTY READY SOLVED ERROR')
+Status = Enum('Status', 'EMPTY READY SOLVED ERROR TIMED_OUT')
+
+cnem_quantum = 1e-9  # CNEm [Mcal/kg] closer than this share one cached evaluation
+breakpoint_tol = 1e-6  # CNEm [Mcal/kg] precision of the breakpoint next to the parametric search optimum
+dual_tolerance = 1e-7  # normalized optimal duals closer than this belong to the same piece
+expected_pieces = 8  # pieces of the CNEm domain assumed by estimate_evaluations for PARAM
+interior_probes = 3  # CNEm probed inside an interval with the same duals at both ends before it is taken as one piece
+brent_flat_evaluations = 3  # consecutive evaluations within the objective tolerance that stop BRENT
+batch_size = 32  # CNEm solved together by Model.run_many, the deadline is checked between batches
+
+
+def _dual_signature(solution):
+    """
+    Optimal row duals and reduced costs of a solution scaled to max norm 1, None if infeasible. The LP costs of a
+    scenario only change by a positive factor with CNEm, so the optimal dual solution is the same along a piece
+    of the CNEm domain and changes at basis breakpoints, where the objective has its kinks
+    """
+    if solution is None:
+        return None
+    duals = np.array([value for key, value in solution.items()
+                      if key.endswith("_dual") or key.endswith("_red_cost")], dtype=float)
+    scale = np.abs(duals).max(initial=0.0)
+    return duals / scale if scale > 0 else duals
+
+
+def _same_piece(signature, other):
+    if signature is None or other is None:
+        return signature is None and other is None
+    return signature.shape == other.shape and np.allclose(signature, other, rtol=0, atol=dual_tolerance)
+
+
+class SearchTimeout(Exception):
+    """Raised by Searcher evaluations once the searcher deadline has passed"""
+    pass
+
+
+class EvaluationCache:
+    """
+    Model evaluations of one scenario by quantized CNEm: the solution dict, or None if the CNEm is infeasible.
+    Bound refinement, GSS and BF evaluate many CNEm more than once, repeats are answered without solving the LP
+    """
+
+    def __init__(self, size=None, quantum=cnem_quantum):
+        """
+        :param size: number of evaluations kept, the least recently used is dropped; None keeps all, 0 disables
+        :param quantum: CNEm closer than quantum share one evaluation
+        """
+        self.size = size
+        self.quantum = quantum
+        self._evaluations = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, cnem):
+        return int(round(cnem / self.quantum))
+
+    def get(self, cnem):
+        """:return: (True, solution or None) if the CNEm was evaluated, (False, None) otherwise"""
+        key = self._key(cnem)
+        if key not in self._evaluations:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        self._evaluations.move_to_end(key)
+        return True, self._evaluations[key]
+
+    def put(self, cnem, solution):
+        if self.size is not None and self.size <= 0:
+            return
+        self._evaluations[self._key(cnem)] = solution
+        if self.size is not None and len(self._evaluations) > self.size:
+            self._evaluations.popitem(last=False)
+
+    def clear(self):
+        """Forget the evaluations, e.g. after the model changed"""
+        self._evaluations.clear()
+
+    def __len__(self):
+        return len(self._evaluations)
 
 
 class Searcher:
@@ -14,15 +94,124 @@ class Searcher:
     _status = Status.EMPTY
     _solutions = None
 
-    def __init__(self, model, obj_func_key="obj_func"):
+    _deadline = None
+    _best = None
+    _bracketing = "bisection"
+    _cache: EvaluationCache = None
+    _pieces = None
+    _objective_tol = 0.01
+    _objective_rtol = 0.0
 
+    def __init__(self, model, obj_func_key="obj_func", bracketing="bisection", cache_size=None,
+                 objective_tol=0.01, objective_rtol=0.0):
+        """
+        :param bracketing: how refine_bounds finds the feasible CNEm edges, see Bracketing
+        :param cache_size: model evaluations memoized, see EvaluationCache
+        :param objective_tol: BRENT stops once brent_flat_evaluations objectives in a row changed less than this
+        :param objective_rtol: ... or less than this fraction of the best objective
+        """
+        if bracketing not in Bracketing:
+            raise ValueError("Bracketing {} not supported".format(bracketing))
         self._model = model
+        self._bracketing = bracketing
         self._obj_func_key = obj_func_key
         self._solutions = []
         self._status = Status.READY
         self._model.prefix_id = ""
+        self._best = None
+        self._cache = EvaluationCache(cache_size)
+        self._objective_tol = objective_tol
+        self._objective_rtol = objective_rtol
+
+    def set_deadline(self, deadline):
+        """
+        :param deadline: time.time() after which evaluations stop with SearchTimeout, None for no limit
+        """
+        self._deadline = deadline
+
+    @property
+    def cache(self):
+        """EvaluationCache of the model evaluations (hits and misses counters)"""
+        return self._cache
+
+    def _evaluate(self, p_id, p_cnem):
+        """Evaluate model at p_cnem (or take it from the cache), keeping the best feasible solution seen so far"""
+        cached, solution = self._cache.get(p_cnem)
+        if cached:
+            if solution is not None:
+                solution = {**solution, "Problem_ID": p_id}
+        else:
+            if self._deadline is not None and time.time() > self._deadline:
+                raise SearchTimeout("Deadline reached at CNEm = {}".format(p_cnem))
+            # the first run of a scenario has its own MPm RHS, another run at the same CNEm does not repeat it
+            first_run = getattr(self._model, "first_run", False)
+            solution = self._model.run(p_id, p_cnem)
+            if not first_run:
+                self._cache.put(p_cnem, solution)
+        if solution is not None and \
+                (self._best is None or solution[self._obj_func_key] > self._best[self._obj_func_key]):
+            self._best = solution
+        return solution
+
+    def _evaluate_many(self, p_ids, p_cnems):
+        """
+        Evaluate model at every p_cnem as _evaluate does, the ones not in the cache are solved in batches by
+        Model.run_many (one by one while the model still has the first run of its scenario to do)
+        """
+        solutions = [None] * len(p_cnems)
+        pending = []
+        for i, p_cnem in enumerate(p_cnems):
+            cached, solution = self._cache.get(p_cnem)
+            if not cached:
+                pending.append(i)
+            elif solution is not None:
+                solutions[i] = {**solution, "Problem_ID": p_ids[i]}
+        while len(pending) > 0 and getattr(self._model, "first_run", False):
+            i = pending.pop(0)
+            solutions[i] = self._evaluate(p_ids[i], p_cnems[i])
+        for start in range(0, len(pending), batch_size):
+            if self._deadline is not None and time.time() > self._deadline:
+                raise SearchTimeout("Deadline reached at CNEm = {}".format(p_cnems[pending[start]]))
+            batch = pending[start:start + batch_size]
+            for i, solution in zip(batch, self._model.run_many([p_ids[i] for i in batch],
+                                                               [p_cnems[i] for i in batch])):
+                self._cache.put(p_cnems[i], solution)
+                solutions[i] = solution
+                if solution is not None and \
+                        (self._best is None or solution[self._obj_func_key] > self._best[self._obj_func_key]):
+                    self._best = solution
+        return solutions
+
+    def stop_timed_out(self):
+        """Keep best solution found before the deadline and flag the search as timed out"""
+        logging.warning("Time budget exhausted: {}".format(self._msg))
+        self._solutions = [] if self._best is None else [self._best]
+        self._status = Status.TIMED_OUT
+
+    @staticmethod
+    def estimate_evaluations(algorithm, lb, ub, tol):
+        """
+        Rough number of LP solves an algorithm {'BF', 'GSS', 'BRENT', 'PARAM'} needs to search [lb, ub] with
+        tolerance tol
+        """
+        if tol is None or tol <= 0 or ub <= lb:
+            return 0
+        if algorithm == "BF":
+            return int(np.ceil((ub - lb) / tol))
+        if algorithm == "GSS":
+            inv_phi = (np.sqrt(5) - 1) / 2
+            return int(np.ceil(np.log(tol / (ub - lb)) / np.log(inv_phi))) + 2
+        if algorithm == "BRENT":
+            # parabolic steps save about a quarter of the golden-section steps on the kinked profit curves
+            return int(np.ceil(0.75 * Searcher.estimate_evaluations("GSS", lb, ub, tol)))
+        if algorithm == "PARAM":
+            return expected_pieces * (int(np.ceil(np.log2((ub - lb) / tol))) + 2 + interior_probes)
+        return 0
 
     def refine_bounds(self, lb=0.0, ub=1.0, tol=0.01):
+        """Feasible CNEm edges of [lb, ub] within tol, (None, None) if no CNEm is feasible"""
+        if self._bracketing == "bisection":
+            return self.bisect_bounds(lb, ub, tol)
         new_lb = self.refine_bound(lb, ub, direction=1, tol=tol)
         if new_lb is None:
             return None, None
@@ -34,12 +223,60 @@ class Searcher:
         space = np.linspace(v0, vf, int(np.ceil((vf - v0 + tol) / tol)))
         if direction == -1:
             space = reversed(space)
-        new_v = self.__brute_force(self._model.run, space, first_feasible=True)
+        new_v = self.__brute_force(self._evaluate, space, first_feasible=True)
         if new_v is None:
             return new_v
         else:
             return new_v['CNEm']
 
+    def bisect_bounds(self, lb=0.0, ub=1.0, tol=0.01):
+        """
+        Feasible CNEm edges of [lb, ub] on the grid of refine_bound (step <= tol) in O(log((ub - lb) / tol)) LP
+        solves: lb, ub and then the midpoints of ever finer halvings of the grid are tried until one is feasible,
+        each edge is then bisected between it and the nearest infeasible grid point. The edges are those of the
+        scan if the feasible CNEm are an interval, otherwise those of the part holding the first feasible point
+        """
+        space = np.linspace(lb, ub, int(np.ceil((ub - lb + tol) / tol)))
+        feasible = {}
+
+        def is_feasible(i):
+            if i not in feasible:
+                feasible[i] = self._evaluate(len(feasible), space[i]) is not None
+                logging.info("Bisection <iteration, cnem, feasible>: <{0}, {1}, {2}>".format(
+                    len(feasible) - 1, space[i], feasible[i]))
+            return feasible[i]
+
+        last = len(space) - 1
+        point = next((i for i in self.__probes(last) if is_feasible(i)), None)
+        if point is None:
+            return None, None
+        new_lb = 0 if is_feasible(0) else self.__bisect(
+            is_feasible, max(i for i in feasible if i < point and not feasible[i]), point)
+        new_ub = last if is_feasible(last) else self.__bisect(
+            is_feasible, min(i for i in feasible if i > point and not feasible[i]), point)
+        return space[new_lb], space[new_ub]
+
+    @staticmethod
+    def __probes(last):
+        """0, last and then every index in between, by halving steps (a power of 2) of the grid"""
+        yield 0
+        yield last
+        step = 1 << (last - 1).bit_length()
+        while step > 1:
+            yield from range(step // 2, last, step)
+            step //= 2
+
+    @staticmethod
+    def __bisect(is_feasible, outside, inside):
+        """Feasible grid point next to the infeasible one on the edge between infeasible outside and feasible inside"""
+        while abs(inside - outside) > 1:
+            middle = (outside + inside) // 2
+            if is_feasible(middle):
+                inside = middle
+            else:
+                outside = middle
+        return inside
+
     def brute_force_search(self, lb, ub, p_tol, uncertain_bounds=False):
         """Executes brute force search algorithm"""
         if self._status != Status.READY:
@@ -50,7 +287,12 @@ class Searcher:
                 self._status = Status.ERROR
                 return
         cnem_space = np.linspace(lb, ub, int(np.ceil((ub - lb) / p_tol)))
-        bf_results = self.__brute_force(self._model.run, cnem_space)
+        if hasattr(self._model, "run_many"):
+            bf_results = [solution for solution in self._evaluate_many(list(range(len(cnem_space))), cnem_space)
+                          if solution is not None]
+            logging.info("Brute force: {0} of {1} CNEm feasible".format(len(bf_results), len(cnem_space)))
+        else:
+            bf_results = self.__brute_force(self._evaluate, cnem_space)
         if len(bf_results) == 0:
             self._status = Status.ERROR
         else:
@@ -95,13 +337,108 @@ class Searcher:
                 self._status = Status.ERROR
                 return
         gss_results = []
-        a, b = self.__golden_section_search_recursive(self._model.run, lb, ub, gss_results, tol=p_tol)
+        a, b = self.__golden_section_search_recursive(self._evaluate, lb, ub, gss_results, tol=p_tol)
         if a is None:
             self._status = Status.ERROR
         else:
             self._status = Status.SOLVED
         return gss_results
 
+    def brent_search(self, lb, ub, p_tol, uncertain_bounds=True):
+        """
+        Executes Brent's method: parabolic interpolation through the three best points, with golden-section steps
+        where the parabola is not trusted. Stops when the best CNEm is known to p_tol, or when the last
+        brent_flat_evaluations objectives were all within the objective tolerance of the best one
+        """
+        if self._status != Status.READY:
+            self.__clear_searcher()
+        if uncertain_bounds:
+            lb, ub = self.refine_bounds(lb, ub, 0.001)
+            if lb is None:
+                self._status = Status.ERROR
+                return
+        brent_results = []
+        self.__brent(self._evaluate, lb, ub, brent_results, tol=p_tol)
+        if len(brent_results) == 0:
+            self._status = Status.ERROR
+        else:
+            self._status = Status.SOLVED
+        return brent_results
+
+    def __brent(self, f, a, b, results, tol=1e-3):
+        """
+        Maximize f(p_id, CNEm)[obj_func] on [a, b] by Brent's method (bounded, as in scipy's fminbound) on the
+        negative objective, infeasible CNEm count as +inf. Feasible solutions are appended to results
+        :return: best CNEm
+        """
+        def g(p_id, p_cnem):
+            solution = f(p_id, p_cnem)
+            if solution is None:
+                return np.inf
+            results.append(solution)
+            return -solution[self._obj_func_key]
+
+        sqrt_eps = np.sqrt(np.finfo(float).eps)
+        inv_phi2 = (3 - np.sqrt(5)) / 2
+        p_id = 0
+        x = v = w = a + inv_phi2 * (b - a)  # best, second best and previous second best
+        fx = fv = fw = g(p_id, x)
+        d = e = 0.0
+        flat = 0
+        xm = (a + b) / 2
+        tol1 = sqrt_eps * abs(x) + tol / 2
+        while abs(x - xm) > 2 * tol1 - (b - a) / 2:
+            golden = True
+            # infeasible CNEm give no parabola, inf - inf would only fall back to golden section through NaN
+            if abs(e) > tol1 and np.isfinite([fx, fw, fv]).all():
+                # parabola through x, w and v
+                r = (x - w) * (fx - fv)
+                q = (x - v) * (fx - fw)
+                p = (x - v) * q - (x - w) * r
+                q = 2 * (q - r)
+                if q > 0:
+                    p = -p
+                q = abs(q)
+                r, e = e, d
+                if abs(p) < abs(q * r / 2) and q * (a - x) < p < q * (b - x):
+                    golden = False
+                    d = p / q
+                    if (x + d) - a < 2 * tol1 or b - (x + d) < 2 * tol1:
+                        d = tol1 if xm >= x else -tol1
+            if golden:
+                e = (a - x) if x >= xm else (b - x)
+                d = inv_phi2 * e
+            u = x + (d if abs(d) >= tol1 else (tol1 if d >= 0 else -tol1))
+            p_id += 1
+            logging.info("\n{0}".format(p_id))
+            fu = g(p_id, u)
+            flat_tol = self._objective_tol
+            if np.isfinite(fx):
+                # an infeasible incumbent has no scale, inf * rtol would take every step as flat
+                flat_tol = max(flat_tol, self._objective_rtol * abs(fx))
+            flat = flat + 1 if np.isfinite(fu) and np.isfinite(fx) and abs(fu - fx) <= flat_tol else 0
+            if fu <= fx:
+                if u >= x:
+                    a = x
+                else:
+                    b = x
+                v, fv, w, fw, x, fx = w, fw, x, fx, u, fu
+            else:
+                if u < x:
+                    a = u
+                else:
+                    b = u
+                if fu <= fw or w == x:
+                    v, fv, w, fw = w, fw, u, fu
+                elif fu <= fv or v == x or v == w:
+                    v, fv = u, fu
+            if flat >= brent_flat_evaluations:
+                logging.info("Objective flat to {0} around CNEm = {1}".format(flat_tol, x))
+                break
+            xm = (a + b) / 2
+            tol1 = sqrt_eps * abs(x) + tol / 2
+        return x
+
     def __golden_section_search_recursive(
             self, f, a, b, results, p_id=0, tol=1e-3, h=None, c=None, d=None, fc=None, fd=None):
         """
@@ -150,14 +487,158 @@ class Searcher:
             raise e
             return None, None
 
+    def parametric_search(self, lb, ub, p_tol, uncertain_bounds=False):
+        """
+        Executes parametric search: [lb, ub] is split at the basis breakpoints (found by bisection to p_tol) into
+        pieces with one optimal dual solution, the objective is smooth inside each piece and maximized there by GSS,
+        and the breakpoint next to the best optimum is located to breakpoint_tol. Returns the breakpoint table as
+        solutions: lower edge, optimum and upper edge of every piece, in CNEm order, with the piece columns of
+        piece_columns (see also get_pieces). Before a piece is closed, interior_probes CNEm inside it are tried, so a
+        piece lying between two points with the same duals is split off too.
+        A high-accuracy mode that takes several times the evaluations of GSS, see estimate_evaluations; the optimum
+        is global as long as the objective is unimodal inside every piece
+        """
+        if self._status != Status.READY:
+            self.__clear_searcher()
+        if uncertain_bounds:
+            lb, ub = self.refine_bounds(lb, ub, 0.001)
+            if lb is None:
+                self._status = Status.ERROR
+                return
+        evaluated = {}  # CNEm: (solution, dual signature)
+
+        def evaluate(p_cnem):
+            if p_cnem not in evaluated:
+                solution = self._evaluate(len(evaluated), p_cnem)
+                evaluated[p_cnem] = solution, _dual_signature(solution)
+            return evaluated[p_cnem]
+
+        def objective(p_cnem):
+            return evaluated[p_cnem][0][self._obj_func_key]
+
+        def first_outside(start, signature):
+            return min((v for v in evaluated if v > start and not _same_piece(evaluated[v][1], signature)),
+                       default=None)
+
+        pieces = []
+        start = lb
+        while start is not None:
+            feasible = evaluate(start)[0] is not None
+            evaluate(ub)
+            signature = evaluated[start][1]
+            outside = first_outside(start, signature)
+            stop = ub if outside is None else outside
+            if stop - start > p_tol:
+                for v in np.linspace(start, stop, interior_probes + 2)[1:-1]:
+                    evaluate(v)
+                outside = first_outside(start, signature)
+            if outside is None:
+                end = ub
+            else:
+                inside = max(v for v in evaluated if start <= v < outside and _same_piece(evaluated[v][1], signature))
+                end, outside = self.__bisect_breakpoint(evaluate, inside, outside, signature, p_tol)
+            if feasible:
+                pieces.append([start, end])
+            start = outside
+        if len(pieces) == 0:
+            self._status = Status.ERROR
+            return []
+
+        def piece_optimum(piece):
+            return max((v for v in evaluated if piece[0] <= v <= piece[1] and evaluated[v][0] is not None),
+                       key=objective)
+
+        infeasible = {self._obj_func_key: -np.inf}  # in case a piece is not an interval
+        for lo, hi in pieces:
+            if hi - lo > p_tol:
+                self.__golden_section_search_recursive(
+                    lambda p_id, v: evaluate(v)[0] or infeasible, lo, hi, [], tol=p_tol)
+        # the best optimum is usually on a piece edge, a kink of the objective: locate that breakpoint to breakpoint_tol
+        best = max(range(len(pieces)), key=lambda i: objective(piece_optimum(pieces[i])))
+        optimum = piece_optimum(pieces[best])
+        for side, neighbor in ((0, best - 1), (1, best + 1)):
+            edge = pieces[best][side]
+            beyond = [v for v in evaluated if (v < edge if side == 0 else v > edge)]
+            if optimum != edge or len(beyond) == 0:
+                continue
+            outside = max(beyond) if side == 0 else min(beyond)
+            inside, new_outside = self.__bisect_breakpoint(evaluate, edge, outside, evaluated[edge][1],
+                                                           breakpoint_tol)
+            pieces[best][side] = inside
+            if 0 <= neighbor < len(pieces) and pieces[neighbor][1 - side] == outside:
+                pieces[neighbor][1 - side] = new_outside
+
+        results = []
+        self._pieces = []
+        for i, piece in enumerate(pieces):
+            optimum = piece_optimum(piece)
+            self._pieces.append((piece[0], piece[1], optimum, objective(optimum)))
+            logging.info("Piece {0}: {1} <= CNEm <= {2}, optimum {3} at CNEm = {4}".format(
+                i, piece[0], piece[1], objective(optimum), optimum))
+            columns = dict(zip(piece_columns, (i,) + self._pieces[-1]))
+            results += [{**evaluated[v][0], **columns} for v in sorted({piece[0], optimum, piece[1]})]
+        self._status = Status.SOLVED
+        return results
+
+    @staticmethod
+    def __bisect_breakpoint(evaluate, inside, outside, signature, tol):
+        """
+        Bisect between inside (of the piece with this dual signature) and outside (of another piece) down to tol
+        :return: the last CNEm inside and the first outside
+        """
+        while abs(outside - inside) > tol:
+            middle = (inside + outside) / 2
+            if _same_piece(evaluate(middle)[1], signature):
+                inside = middle
+            else:
+                outside = middle
+        return inside, outside
+
+    def get_pieces(self):
+        """Breakpoint table of the last parametric search: (CNEm lo, CNEm hi, optimal CNEm, optimum) per piece"""
+        return self._pieces
+
     def run_scenario(self, algorithm, lb, ub, tol, uncertain_bounds = True, find_red_cost = False):
         self._msg = f"single objective lb={lb}, ub={ub}, algorithm={algorithm}"
         self.__clear_searcher()
-        sol_vec = getattr(self, algorithm)(lb, ub, tol, uncertain_bounds)
+        try:
+            sol_vec = getattr(self, algorithm)(lb, ub, tol, uncertain_bounds)
+        except SearchTimeout:
+            self.stop_timed_out()
+            return
         status, solution = self.get_results(sol_vec)
         if status == Status.SOLVED:
             self._solutions = solution
 
+    def warm_search(self, algorithm, lb, ub, tol, cnem, window):
+        """
+        Search only [cnem - window, cnem + window] within [lb, ub], around a previously found optimum
+        :param algorithm: method name, see Algorithms
+        :param cnem: previous optimal CNEm
+        :param window: half width of the searched interval
+        :return: True if the optimum was found inside the window,
+            False if a full search is needed (no feasible CNEm in the window or optimum on a window edge)
+        """
+        w_lb, w_ub = max(lb, cnem - window), min(ub, cnem + window)
+        if w_lb >= w_ub:
+            return False
+        new_lb, new_ub = self.refine_bounds(w_lb, w_ub, tol)
+        if new_lb is None:
+            logging.info("No feasible CNEm in the window [{0}, {1}]".format(w_lb, w_ub))
+            return False
+        self.run_scenario(algorithm, new_lb, new_ub, tol, uncertain_bounds=False)
+        if self._status == Status.TIMED_OUT:
+            return True
+        solutions = [sol for sol in self._solutions
+                     if sol is not None and not np.isnan(sol[self._obj_func_key])]
+        if self._status != Status.SOLVED or len(solutions) == 0:
+            return False
+        best = max(solutions, key=lambda sol: sol[self._obj_func_key])
+        if (w_lb > lb and best["CNEm"] - w_lb <= tol) or (w_ub < ub and w_ub - best["CNEm"] <= tol):
+            logging.info("Optimum CNEm = {0} on the edge of the window [{1}, {2}]".format(best["CNEm"], w_lb, w_ub))
+            return False
+        return True
+
     def clear_searcher(self, force=False):
         self.__clear_searcher(force_clear=force)
 
@@ -168,7 +649,7 @@ class Searcher:
         """
         if solution_vec is None:
             solution_vec = self._solutions
-        if len(solution_vec) == 0 or self._status != Status.SOLVED:
+        if len(solution_vec) == 0 or self._status not in (Status.SOLVED, Status.TIMED_OUT):
             return self._status, None
         if best:
             result = self.__extract_optimal(solution_vec)
@@ -200,6 +681,7 @@ class Searcher:
     
     def search_reduced_cost_recursive(self, algorithm, lb, ub, tol, lb_cost, ub_cost, tol_cost):
         
+        self._cache.clear()  # evaluations of the previous special_cost
         if (ub_cost - lb_cost < tol_cost):
             self._model.special_cost = lb_cost
             self.run_scenario(algorithm, lb, ub, tol, uncertain_bounds = False, find_red_cost = True)
@@ -227,6 +709,7 @@ class Searcher:
         # TODO: encontrar preco em que o produto entra x% na dieta
         
         self._model.special_cost = 10.0
+        self._cache.clear()
         
         tol_cost = 0.01
         lb_cost = tol_cost
@@ -257,7 +740,12 @@ class Searcher:
 
         
 
-Algorithms = {'BF': 'brute_force_search', 'GSS': 'golden_section_search'}
+# breakpoint table columns added to the PARAM solutions, see Searcher.get_pieces
+piece_columns = ["Piece", "Piece CNEm LB", "Piece CNEm UB", "Piece optimal CNEm", "Piece optimum"]
+
+Algorithms = {'BF': 'brute_force_search', 'GSS': 'golden_section_search', 'PARAM': 'parametric_search',
+              'BRENT': 'brent_search'}
+Bracketing = ["bisection", "scan"]  # Searcher.bisect_bounds or the refine_bound linear scan
 
 if __name__ == "__main__":
     print("hello numerical_methods")
\ No newline at end of file
@@ -12,11 +12,19 @@ except ModuleNotFoundError as e:
     pass
 try:
     from optimizer import highs_solver
+    from optimizer import scipy_solver
+    from optimizer import dense_solver
 except ModuleNotFoundError as e:
     pass
 
-optimizers = ["CPLEX", "HiGHS"]
+optimizers = ["CPLEX", "HiGHS", "SciPy", "Dense"]
+array_solvers = ["HiGHS", "SciPy", "Dense"]  # highs_solver.Model and its subclasses
 SOLVER = None
+cplex_big_m = 100000  # CPLEX gets this cost instead of an infinite one, the other solvers take infinities
+
+
+def _cplex_costs(costs):
+    return [max(-cplex_big_m, min(cplex_big_m, c)) if abs(c) == float("inf") else c for c in costs]
 
 
 def config(slv):
@@ -36,9 +44,22 @@ class Optimizer:
         if SOLVER == "HiGHS":
             highs_solver.config()
             self.model = highs_solver.Model()
+        if SOLVER == "SciPy":
+            self.model = scipy_solver.Model()
+        if SOLVER == "Dense":
+            self.model = dense_solver.Model()
         obj_methods = [method_name for method_name in dir(self.model) if callable(getattr(self.model, method_name))]
         print()
 
+    def copy(self):
+        """Independent copy of the model (and its solver state), changes to one do not reach the other"""
+        clone = Optimizer.__new__(Optimizer)
+        if SOLVER == "CPLEX":
+            clone.model = cplex.Cplex(self.model)
+        elif SOLVER in array_solvers:
+            clone.model = self.model.copy()
+        return clone
+
     def set_solver(self, solver):
         if not optimizers.__contains__(solver):
             logging.error("The solver {} is not implemented.".format(solver))
@@ -58,7 +79,7 @@ class Optimizer:
             option = {"max": self.model.objective.sense.maximize,
                       "min": self.model.objective.sense.minimize}
             self.model.objective.set_sense(option[kwargs["sense"]])
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             self.model.set_sense(kwargs["sense"])
 
 
@@ -69,12 +90,12 @@ class Optimizer:
         """
         
         if SOLVER == "CPLEX":
-            variables = self.model.variables.add(obj=kwargs["obj"],
+            variables = self.model.variables.add(obj=_cplex_costs(kwargs["obj"]),
                                                  lb=kwargs["lb"],
                                                  ub=kwargs["ub"],
                                                  names=kwargs["names"])
             return variables
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             variables = self.model.add_variables(obj=kwargs["obj"],
                                                  lb=kwargs["lb"],
                                                  ub=kwargs["ub"],
@@ -94,7 +115,7 @@ class Optimizer:
                                               rhs=kwargs["rhs"],
                                               senses=kwargs["senses"]
                                               )
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             self.model.add_constraint(names=kwargs["names"],
                                       lin_expr=kwargs["lin_expr"],
                                       rhs=kwargs["rhs"],
@@ -105,7 +126,7 @@ class Optimizer:
     def set_obj_offset(self, val):
         if SOLVER == "CPLEX":
             self.model.objective.set_offset(val)
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             self.model.set_objective_offset(val)
 
     def set_constraint_sense(self, cst_name, sense):
@@ -114,7 +135,7 @@ class Optimizer:
         """
         if SOLVER == "CPLEX":
             self.model.linear_constraints.set_senses(cst_name, sense)
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             self.model.set_constraint_sense(cst_name, sense)
 
     def set_constraint_rhs(self, seq_of_pairs):
@@ -124,7 +145,7 @@ class Optimizer:
         
         if SOLVER == "CPLEX":
             self.model.linear_constraints.set_rhs(seq_of_pairs)
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             self.model.set_constraint_rhs(seq_of_pairs)
 
     def set_constraint_coefficients(self, seq_of_triplets):
@@ -133,7 +154,7 @@ class Optimizer:
         """
         if SOLVER == "CPLEX":
             self.model.linear_constraints.set_coefficients(seq_of_triplets)
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             self.model.set_constraint_coefficients(seq_of_triplets)
 
     def set_objective_function(self, objective_vector, offset=0):
@@ -142,8 +163,9 @@ class Optimizer:
         """
         
         if SOLVER == "CPLEX":
-            self.model.objective.set_linear(objective_vector)
-        elif SOLVER == "HiGHS":
+            names, costs = zip(*objective_vector)
+            self.model.objective.set_linear(list(zip(names, _cplex_costs(costs))))
+        elif SOLVER in array_solvers:
             self.model.set_objective_function(objective_vector)
 
         self.set_obj_offset(offset)
@@ -156,7 +178,7 @@ class Optimizer:
         """
         if SOLVER == "CPLEX":
             return self.model.linear_constraints.get_names()
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             return self.model.get_constraints_names()
 
 
@@ -167,7 +189,7 @@ class Optimizer:
         """
         if SOLVER == "CPLEX":
             return self.model.linear_constraints.get_rhs(constraints)
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             return self.model.get_constraints_rhs(constraints)
 
 
@@ -177,7 +199,7 @@ class Optimizer:
         """
         if SOLVER == "CPLEX":
             return self.model.variables.get_names()
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             return self.model.get_variable_names()
 
     # SOLVING AND RESULTS
@@ -187,16 +209,89 @@ class Optimizer:
         
         if SOLVER == "CPLEX":
             self.model.solve()
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             self.model.solve()
 
 
+    def solve_many(self, constraints, rhs, objectives=None):
+        """
+        Solve the model for a batch of right-hand sides (and objectives) with the same constraint structure
+        :param constraints: list with the constraint names of the rhs columns
+        :param rhs: matrix, one right-hand side per row
+        :param objectives: matrix, obj-fun coefficients of all variables (get_variable_names() order) per row;
+                None keeps the current objective
+        :return: status list and stacked solutions, objective values, dual values and reduced costs
+                (rows of infeasible instances are NaN); the model is left with the last instance
+        """
+
+        if SOLVER == "CPLEX":
+            variables = self.get_variable_names()
+            status, values, objective, duals, red_costs = [], [], [], [], []
+            for i in range(len(rhs)):
+                self.set_constraint_rhs(list(zip(constraints, rhs[i])))
+                if objectives is not None:
+                    self.model.objective.set_linear(list(zip(variables, _cplex_costs(objectives[i]))))
+                self.solve()
+                status.append(self.get_solution_status())
+                try:
+                    values.append(self.get_solution_vec())
+                    objective.append(self.get_solution_obj())
+                    duals.append(self.get_dual_values())
+                    red_costs.append(self.get_dual_reduced_costs())
+                except cplex.exceptions.CplexError:
+                    values.append([float("nan")] * len(variables))
+                    objective.append(float("nan"))
+                    duals.append([float("nan")] * self.model.linear_constraints.get_num())
+                    red_costs.append([float("nan")] * len(variables))
+            return status, values, objective, duals, red_costs
+        elif SOLVER in array_solvers:
+            return self.model.solve_many(constraints, rhs, objectives)
+
+
+    def get_raw_solution(self):
+        """Solver output of the last solve, None if the solver cannot reload it"""
+
+        if SOLVER == "CPLEX":
+            return None
+        elif SOLVER in array_solvers:
+            return self.model.raw_solution
+
+
+    def get_raw_solutions(self):
+        """Solver output of every instance of the last solve_many, None if the solver cannot reload them"""
+
+        if SOLVER == "CPLEX":
+            return None
+        elif SOLVER in array_solvers:
+            return self.model.raw_solutions
+
+
+    def load_raw_solution(self, raw_solution):
+        """Report raw_solution (from get_raw_solution()) as the solution of the current model, without solving"""
+
+        if SOLVER == "CPLEX":
+            raise RuntimeError("Chosen solver <{0}> has no method to execute {1}.".format(
+                SOLVER, "load_raw_solution"
+            ))
+        elif SOLVER in array_solvers:
+            self.model.load_raw_solution(raw_solution)
+
+
+    def reset_solution(self):
+        """Forget previous solutions of the model"""
+
+        if SOLVER == "CPLEX":
+            pass
+        elif SOLVER in array_solvers:
+            self.model.reset_solution()
+
+
     def feasopt(self):
         """Relax the constraints"""
         
         if SOLVER == "CPLEX":
             self.model.feasopt.linear_constraints()
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             raise RuntimeError("Chosen solver <{0}> has no method to execute {1}.".format(
                 SOLVER, "feasopt"
             ))
@@ -207,7 +302,7 @@ class Optimizer:
         
         if SOLVER == "CPLEX":
             return self.model.solution.get_status_string()
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             return self.model.get_solution_status()
 
 
@@ -218,7 +313,7 @@ class Optimizer:
         
         if SOLVER == "CPLEX":
             return self.model.solution.get_values()
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             return self.model.get_solution_vec()
 
 
@@ -230,7 +325,7 @@ class Optimizer:
         
         if SOLVER == "CPLEX":
             return self.model.solution.get_objective_value()
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             return self.model.get_solution_obj()
 
 
@@ -242,7 +337,7 @@ class Optimizer:
         
         if SOLVER == "CPLEX":
             return self.model.solution.get_activity_levels(constraints)
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             return self.model.get_solution_activity_levels(constraints)
 
     # DUAL PROBLEM
@@ -254,7 +349,7 @@ class Optimizer:
         
         if SOLVER == "CPLEX":
             return self.model.solution.get_reduced_costs()
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             return self.model.get_dual_reduced_costs()
 
 
@@ -265,7 +360,7 @@ class Optimizer:
         
         if SOLVER == "CPLEX":
             return self.model.solution.get_dual_values()
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             return self.model.get_dual_values()
 
 
@@ -276,7 +371,7 @@ class Optimizer:
         
         if SOLVER == "CPLEX":
             return self.model.solution.get_linear_slacks()
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             return self.model.get_dual_linear_slacks()
 
     # DEBUGGING PURPOSES
@@ -290,7 +385,7 @@ class Optimizer:
         
         if SOLVER == "CPLEX":
             self.model.write(kwargs["name"])
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             self.model.write(kwargs["name"])
 
 
@@ -302,5 +397,5 @@ class Optimizer:
         
         if SOLVER == "CPLEX":
             self.model.solution.write(file_name)
-        elif SOLVER == "HiGHS":
+        elif SOLVER in array_solvers:
             self.model.write_solution(file_name)
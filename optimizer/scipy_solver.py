@@ -0,0 +1,67 @@
+import numpy as np
+from scipy.optimize import linprog
+from scipy.sparse import vstack
+
+from optimizer import highs_solver
+from optimizer.basis_cache import BASIC, LOWER, UPPER
+
+basis_tolerance = 1e-9
+
+
+class Model(highs_solver.Model):
+    """
+    LP model solved by the HiGHS bundled with SciPy (scipy.optimize.linprog), runs wherever SciPy does.
+    Model construction, updates and solution getters are the ones of highs_solver.Model; each solve passes the
+    prebuilt sparse matrices to linprog and reports its result in the highs_call format.
+    """
+    _a_ub = None  # stacked [A; -A] rows with finite upper / lower bounds
+    _ub_rows = None
+    _lb_rows = None
+
+    def _build_matrix(self):
+        super()._build_matrix()
+        self._a_ub = None
+
+    def set_constraint_coefficients(self, seq_of_triplets):
+        super().set_constraint_coefficients(seq_of_triplets)
+        self._a_ub = None
+
+    def _stacked_matrix(self, rowlower, rowupper):
+        ub_rows = np.flatnonzero(np.isfinite(rowupper))
+        lb_rows = np.flatnonzero(np.isfinite(rowlower))
+        if self._a_ub is None or not np.array_equal(ub_rows, self._ub_rows) \
+                or not np.array_equal(lb_rows, self._lb_rows):
+            a_matrix = self._lp.a_matrix
+            self._a_ub = vstack([a_matrix[ub_rows], -a_matrix[lb_rows]], format="csc")
+            self._ub_rows, self._lb_rows = ub_rows, lb_rows
+        return self._a_ub
+
+    def _run_solver(self, colcost, collower, colupper, rowlower, rowupper):
+        a_ub = self._stacked_matrix(rowlower, rowupper)
+        b_ub = np.concatenate([rowupper[self._ub_rows], -rowlower[self._lb_rows]])
+        res = linprog(colcost, A_ub=a_ub, b_ub=b_ub, bounds=np.column_stack([collower, colupper]), method="highs")
+        if res.status != 0:
+            return None
+        col_value = res.x
+        row_value = self._lp.a_matrix @ col_value
+        n_ub = len(self._ub_rows)
+        row_dual = np.zeros(len(rowlower))
+        np.add.at(row_dual, self._ub_rows, res.ineqlin.marginals[:n_ub])
+        np.subtract.at(row_dual, self._lb_rows, res.ineqlin.marginals[n_ub:])
+        col_dual = res.lower.marginals + res.upper.marginals
+        col_basis = _basis_status(col_value, collower, colupper, col_dual)
+        row_basis = _basis_status(row_value, rowlower, rowupper, row_dual)
+        return 0, col_value, col_dual, row_value, row_dual, col_basis, row_basis
+
+
+def _basis_status(values, lower, upper, duals):
+    """
+    HiGHS basis status read from the values (linprog reports no basis): nonbasic at a bound, basic otherwise.
+    Fixed ones are at the bound of their dual's sign (>= 0 at lower bounds).
+    """
+    status = np.full(len(values), BASIC, dtype=np.int32)
+    at_upper = np.isfinite(upper) & (np.abs(values - upper) <= basis_tolerance * (1 + np.abs(upper)))
+    at_lower = np.isfinite(lower) & (np.abs(values - lower) <= basis_tolerance * (1 + np.abs(lower)))
+    status[at_upper] = UPPER
+    status[at_lower & ~(at_upper & (duals < 0))] = LOWER
+    return status
@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+
+from optimizer.basis_cache import BasisCache, BASIC, LOWER, UPPER
+from optimizer.lp_fixtures import A_MATRIX, COST, COL_LOWER, COL_UPPER, row_bounds
+
+
+class TestBasisCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = BasisCache(A_MATRIX)
+        # optimal for a = 2.4: x1, x2 basic, x3 at lower, sum row at upper, row A at lower
+        self.cache.add([BASIC, BASIC, LOWER], [UPPER, LOWER, BASIC])
+
+    def test_new_rhs_answered_from_basis(self):
+        sol = self.cache.solve(COST, COL_LOWER, COL_UPPER, *row_bounds(2.1))
+        status, x, col_dual, row_value, row_dual = sol[:5]
+        self.assertEqual(status, 0)
+        np.testing.assert_allclose(x, [0.7, 0.3, 0])
+        np.testing.assert_allclose(row_value, [1, 2.1, 1.2])
+        np.testing.assert_allclose(row_dual, [-2, 1 / 3, 0])
+        np.testing.assert_allclose(col_dual, [0, 0, 2])
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_infeasible_basis_is_a_miss(self):
+        # primal: row B becomes active
+        self.assertIsNone(self.cache.solve(COST, COL_LOWER, COL_UPPER, *row_bounds(0.5)))
+        # dual: x1 gets more valuable than x2
+        self.assertIsNone(self.cache.solve(np.array([-3.0, -2.0, 0.0]), COL_LOWER, COL_UPPER, *row_bounds(2.1)))
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_size_bound(self):
+        cache = BasisCache(A_MATRIX, size=1)
+        cache.add([BASIC, BASIC, LOWER], [UPPER, LOWER, BASIC])
+        cache.add([BASIC, BASIC, LOWER], [UPPER, LOWER, BASIC])
+        cache.add([BASIC, LOWER, BASIC], [UPPER, LOWER, BASIC])
+        self.assertEqual(len(cache.bases), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import threading
+import unittest
+
+import numpy as np
+
+from optimizer.certificate_cache import CertificateCache
+from optimizer.lp_fixtures import A_MATRIX, COL_LOWER, COL_UPPER, row_bounds
+
+
+class TestCertificateCache(unittest.TestCase):
+
+    def test_ray_rejects_infeasible_bounds_only(self):
+        cache = CertificateCache(A_MATRIX)
+        self.assertFalse(cache.infeasible(COL_LOWER, COL_UPPER, *row_bounds(3.5)))
+        # y = (0, 1, 0): 3 x1 >= a but 3 x1 <= 3 over the column bounds
+        cache.add([0, 1, 0])
+        self.assertTrue(cache.infeasible(COL_LOWER, COL_UPPER, *row_bounds(3.5)))
+        self.assertTrue(cache.infeasible(COL_LOWER, COL_UPPER, *row_bounds(3.01)))
+        self.assertFalse(cache.infeasible(COL_LOWER, COL_UPPER, *row_bounds(3.0)))
+        self.assertFalse(cache.infeasible(COL_LOWER, COL_UPPER, *row_bounds(2.1)))
+        self.assertEqual((cache.hits, cache.misses), (2, 3))
+
+    def test_round_off_does_not_reach_infinite_bounds(self):
+        cache = CertificateCache(A_MATRIX)
+        cache.add([0, 1, -1e-14])
+        self.assertTrue(cache.infeasible(COL_LOWER, COL_UPPER, *row_bounds(3.5)))
+
+    def test_size_bound_keeps_recent(self):
+        cache = CertificateCache(A_MATRIX, size=2)
+        for ray in ([1, 0, 0], [0, 0, 1], [0, 1, 0]):
+            cache.add(ray)
+        self.assertEqual(len(cache.rays), 2)
+        np.testing.assert_array_equal(cache.rays[0], [0, 1, 0])
+        np.testing.assert_array_equal(cache.col_rays[0], [3, 0, 0])
+
+    def test_rays_stay_paired_across_threads(self):
+        cache = CertificateCache(A_MATRIX, size=4)
+        rays = [[0, 1, 0], [1, 0, 0], [0, 0, 1], [1, 1, 0], [0, 1, 1]]
+
+        def work(offset):
+            for i in range(300):
+                cache.add(rays[(i + offset) % len(rays)])
+                cache.infeasible(COL_LOWER, COL_UPPER, *row_bounds(3.5))
+
+        threads = [threading.Thread(target=work, args=(offset,)) for offset in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        np.testing.assert_array_equal(cache.col_rays, cache.rays @ np.asarray(A_MATRIX, dtype=float))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+from scipy.sparse import csc_matrix
+
+from optimizer.basis_cache import BASIC, LOWER, UPPER
+from optimizer.conditioning import ConditionedLp
+
+# rows: 100 x1 + 2 x2 >= 1, 100 x1 + 2 x2 <= 3 (a range written as two rows), x1 + 0.01 x2 = 0.02
+A_MATRIX = csc_matrix([[100.0, 2.0], [100.0, 2.0], [1.0, 0.01]])
+ROW_LOWER = np.array([1.0, -np.inf, 0.02])
+ROW_UPPER = np.array([np.inf, 3.0, 0.02])
+
+
+class TestConditionedLp(unittest.TestCase):
+
+    def test_range_rows_are_merged_and_scaled_by_powers_of_2(self):
+        lp = ConditionedLp(A_MATRIX)
+        self.assertEqual(lp.shape, (2, 2))
+        np.testing.assert_array_equal(lp.row_map, [0, 0, 1])
+        for scale in np.r_[lp.row_scale, lp.col_scale]:
+            self.assertEqual(np.log2(scale), np.round(np.log2(scale)))
+        lower, upper = lp.rows(ROW_LOWER, ROW_UPPER)
+        np.testing.assert_array_equal(lower / lp.row_scale, [1.0, 0.02])
+        np.testing.assert_array_equal(upper / lp.row_scale, [3.0, 0.02])
+        scaled = lp.a_matrix.toarray()
+        self.assertLess(np.abs(np.log2(np.abs(scaled[scaled != 0]))).max(),
+                        np.abs(np.log2(np.abs(A_MATRIX.data))).max())
+
+    def test_solution_goes_back_to_model_rows(self):
+        lp = ConditionedLp(A_MATRIX)
+        # merged row at its upper bound (dual <= 0), equality row at its lower bound
+        sol = (0, np.array([0.01, 1.0]) / lp.col_scale, np.array([0.5, 0.0]) * lp.col_scale,
+               np.array([3.0, 0.02]) * lp.row_scale, np.array([-2.0, 1.0]) / lp.row_scale,
+               [BASIC, BASIC], [UPPER, LOWER])
+        status, col_value, col_dual, row_value, row_dual, col_basis, row_basis = \
+            lp.solution(sol, np.zeros(2), ROW_LOWER, ROW_UPPER)
+        np.testing.assert_allclose(col_value, [0.01, 1.0])
+        np.testing.assert_allclose(col_dual, [0.5, 0.0])
+        np.testing.assert_allclose(row_value, [3.0, 3.0, 0.02])
+        np.testing.assert_allclose(row_dual, [0.0, -2.0, 1.0])
+        self.assertEqual(list(row_basis), [BASIC, UPPER, LOWER])
+        self.assertEqual(list(lp.basis(col_basis, row_basis)[1]), [UPPER, LOWER])
+
+    def test_infinite_cost_fixes_column(self):
+        lp = ConditionedLp(A_MATRIX, passes=0)
+        colcost, collower, colupper = lp.columns(np.array([np.inf, -1.0]), np.zeros(2), np.ones(2))
+        np.testing.assert_array_equal(colcost, [0.0, -1.0])
+        np.testing.assert_array_equal(collower, [0.0, 0.0])
+        np.testing.assert_array_equal(colupper, [0.0, 1.0])
+
+    def test_coefficient_of_merged_row_needs_rebuild(self):
+        lp = ConditionedLp(A_MATRIX)
+        self.assertIsNone(lp.set_coefficient(0, 0, 50.0))
+        row, col, value = lp.set_coefficient(2, 1, 0.02)
+        self.assertEqual((row, col), (1, 1))
+        self.assertEqual(value, 0.02 * lp.row_scale[1] * lp.col_scale[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+import numpy as np
+from scipy.optimize import linprog
+
+from optimizer import dense_solver, lp_fixtures
+from optimizer.basis_cache import BASIC, LOWER, UPPER
+
+
+def lp(rhs_a):
+    return lp_fixtures.lp(rhs_a, dense_solver.Model)
+
+
+class TestSolveBatch(unittest.TestCase):
+
+    def test_matches_linprog(self):
+        rng = np.random.default_rng(7)
+        n_row, n_col, k = 7, 12, 100
+        a_matrix = rng.uniform(0, 1, (n_row, n_col)) * (rng.uniform(size=(n_row, n_col)) < 0.6)
+        a_matrix[0] = 1.0
+        colcost = rng.normal(size=(k, n_col))
+        colupper = rng.uniform(0.1, 1, (k, n_col))
+        rowlower = np.tile(np.r_[1.0, np.full(n_row - 1, -np.inf)], (k, 1))
+        rowupper = np.tile(np.r_[1.0, np.full(n_row - 1, np.inf)], (k, 1))
+        rowlower[:, 1:4] = rng.uniform(0, 0.6, (k, 3))
+        rowupper[:, 4:] = rng.uniform(0.1, 0.8, (k, n_row - 4))
+        sol = dense_solver.solve_batch(a_matrix, colcost, 0.0, colupper, rowlower, rowupper)
+        for i in range(k):
+            bounded = np.isfinite(rowupper[i]), np.isfinite(rowlower[i])
+            res = linprog(colcost[i], A_ub=np.vstack([a_matrix[bounded[0]], -a_matrix[bounded[1]]]),
+                          b_ub=np.r_[rowupper[i][bounded[0]], -rowlower[i][bounded[1]]],
+                          bounds=np.column_stack([np.zeros(n_col), colupper[i]]), method="highs")
+            self.assertEqual(sol[0][i], dense_solver.OPTIMAL if res.status == 0 else dense_solver.INFEASIBLE)
+            if res.status == 0:
+                self.assertAlmostEqual(colcost[i] @ sol[1][i], res.fun, places=7)
+
+    def test_free_variables_rejected(self):
+        self.assertRaises(ValueError, dense_solver.solve_batch, lp_fixtures.A_MATRIX, lp_fixtures.COST,
+                          [0.0, 0.0, -np.inf], [1.0, 1.0, np.inf], *lp_fixtures.row_bounds(2.4))
+
+
+class TestDenseModel(unittest.TestCase):
+
+    def test_solution_and_duals(self):
+        model = lp(2.4)
+        model.solve()
+        self.assertEqual(model.get_solution_status(), "optimal")
+        np.testing.assert_allclose(model.get_solution_vec(), [0.8, 0.2, 0], atol=1e-6)
+        np.testing.assert_allclose(model.get_dual_values(), [-2, 1 / 3, 0], atol=1e-6)
+        np.testing.assert_allclose(model.get_dual_reduced_costs(), [0, 0, -2], atol=1e-6)
+        self.assertEqual(list(model.basis[0]), [BASIC, BASIC, LOWER])
+        self.assertEqual(list(model.basis[1]), [UPPER, LOWER, BASIC])
+
+    def test_solve_many(self):
+        model = lp(2.4)
+        status, values, objective, duals, red_costs = model.solve_many(["A", "B"], [[2.4, 2], [4, 2], [1.5, 0.4]])
+        self.assertEqual(status, ["optimal", "infeasible", "optimal"])
+        np.testing.assert_allclose(values[0], [0.8, 0.2, 0], atol=1e-6)
+        np.testing.assert_allclose(values[2], [0.9, 0.1, 0], atol=1e-6)
+        np.testing.assert_allclose(objective[[0, 2]], [1.2, 1.1], atol=1e-6)
+        self.assertTrue(np.isnan(values[1]).all())
+
+    def test_free_variables_solved_by_scipy(self):
+        model = dense_solver.Model()
+        model.set_sense("max")
+        model.add_variables(obj=[1.0, 2.0, 0.0], lb=[0, 0, -np.inf], ub=[1, 1, np.inf], names=["x1", "x2", "x3"])
+        model.add_constraint(names=["SUM 1", "A", "B"],
+                             lin_expr=[[["x1", "x2", "x3"], [1, 1, 1]], [["x1"], [3.0]], [["x2"], [4.0]]],
+                             rhs=[1, 2.4, 2], senses=["E", "G", "L"])
+        model.solve()
+        self.assertEqual(model.get_solution_status(), "optimal")
+        np.testing.assert_allclose(model.get_solution_vec(), [1, 0.5, -0.5], atol=1e-6)
+        status, values, objective, duals, red_costs = model.solve_many(["A"], [[2.4], [4]])
+        self.assertEqual(status, ["optimal", "infeasible"])
+        np.testing.assert_allclose(objective[0], 2.0, atol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
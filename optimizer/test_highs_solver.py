@@ -0,0 +1,128 @@
+import unittest
+
+import numpy as np
+
+from optimizer import highs_solver, lp_fixtures
+from optimizer.highs_solver import Model, SolutionBuffers, as_double, as_int
+
+
+class TestModel(unittest.TestCase):
+
+    def setUp(self):
+        self.model = Model()
+        self.model.set_sense("max")
+        self.model.add_variables(obj=[1.0, 2.0], lb=[0, 0], ub=[1, 1], names=["x1", "x2"])
+        self.model.add_constraint(names=["SUM 1", "A", "B"],
+                                  lin_expr=[[["x1", "x2"], [1, 1]], [["x1"], [3.0]], [["x2"], [4.0]]],
+                                  rhs=[1, 0.5, 0.2], senses=["E", "G", "L"])
+
+    def test_arrays(self):
+        np.testing.assert_array_equal(self.model.colcost, [-1.0, -2.0])
+        np.testing.assert_array_equal(self.model.rowlower, [1, 0.5, -np.inf])
+        np.testing.assert_array_equal(self.model.rowupper, [1, np.inf, 0.2])
+        self.assertEqual(self.model.get_constraints_rhs(["SUM 1", "A", "B"]), [1, 0.5, 0.2])
+
+    def test_updates_patch_arrays_in_place(self):
+        self.model._build_matrix()
+        astart, aindex = self.model.astart, self.model.aindex
+        self.model.set_constraint_rhs((("A", 0.7), ("B", 0.3), ("SUM 1", 2)))
+        self.model.set_objective_function([("x1", 5.0), ("x2", 6.0)])
+        self.model.set_constraint_coefficients([("A", "x1", 9.0)])
+        self.assertTrue(self.model._matrix_built)
+        self.assertIs(self.model.astart, astart)
+        self.assertIs(self.model.aindex, aindex)
+        np.testing.assert_allclose(self.model.get_constraints_rhs(["SUM 1", "A", "B"]), [2, 0.7, 0.3])
+        np.testing.assert_array_equal(self.model.colcost, [-5.0, -6.0])
+        np.testing.assert_array_equal(self.model.avalue, [1, 9.0, 1, 4.0])
+
+    def test_copy_is_independent(self):
+        self.model._build_matrix()
+        clone = self.model.copy()
+        clone.set_constraint_rhs((("A", 0.7),))
+        clone.set_objective_function([("x1", 5.0), ("x2", 6.0)])
+        clone.set_constraint_coefficients([("A", "x1", 9.0)])
+        self.assertEqual(self.model.get_constraints_rhs(["SUM 1", "A", "B"]), [1, 0.5, 0.2])
+        np.testing.assert_array_equal(self.model.colcost, [-1.0, -2.0])
+        np.testing.assert_array_equal(self.model.avalue, [1, 3.0, 1, 4.0])
+        np.testing.assert_array_equal(clone.avalue, [1, 9.0, 1, 4.0])
+
+    def test_marshalling_does_not_copy_model_arrays(self):
+        self.model._build_matrix()
+        self.assertIs(as_double(self.model.colcost), self.model.colcost)
+        self.assertIs(as_double(self.model.avalue), self.model.avalue)
+        self.assertIs(as_int(self.model.astart), self.model.astart)
+        self.assertIs(as_int(self.model.aindex), self.model.aindex)
+        buffers = SolutionBuffers(2, 3)
+        self.assertTrue(buffers.fits(2, 3))
+        self.assertFalse(buffers.fits(2, 4))
+
+
+def native_highs():
+    try:
+        highs_solver.config()
+    except SystemError:
+        return False
+    return highs_solver.persistent
+
+
+def lp(rhs_a):
+    return lp_fixtures.lp(rhs_a, Model)
+
+
+@unittest.skipUnless(native_highs(), "HiGHS shared library not available (set HIGHS_LIBRARY)")
+class TestPersistentHighs(unittest.TestCase):
+
+    def test_changes_are_solved_in_place(self):
+        model = lp(0.5)
+        model.solve()
+        instance = model._highs
+        self.assertEqual(model.get_solution_status(), "optimal")
+        np.testing.assert_allclose(model.get_solution_vec(), [0.5, 0.5, 0], atol=1e-6)
+
+        model.set_constraint_rhs((("A", 2.4),))
+        model.solve()
+        self.assertIs(model._highs, instance)
+        fresh = lp(2.4)
+        fresh.solve()
+        np.testing.assert_allclose(model.get_solution_vec(), fresh.get_solution_vec(), atol=1e-6)
+        self.assertAlmostEqual(model.get_solution_obj(), fresh.get_solution_obj())
+
+        model.set_constraint_rhs((("A", 4),))
+        model.solve()
+        self.assertEqual(model.get_solution_status(), "infeasible")
+
+    def test_solve_many_matches_single_solves(self):
+        batch = [[2.4, 2], [4, 2], [2.1, 1]]
+        objectives = [[1, 2, 0], [1, 2, 0], [1, 3, 0]]
+        status, values, objective, duals, red_costs = lp(0.5).solve_many(["A", "B"], batch, objectives)
+        self.assertEqual(status, ["optimal", "infeasible", "optimal"])
+        self.assertTrue(np.all(np.isnan(values[1])))
+        for i in (0, 2):
+            model = lp(batch[i][0])
+            model.set_constraint_rhs((("B", batch[i][1]),))
+            model.set_objective_function(list(zip(["x1", "x2", "x3"], objectives[i])))
+            model.solve()
+            np.testing.assert_allclose(values[i], model.get_solution_vec(), atol=1e-6)
+            self.assertAlmostEqual(objective[i], model.get_solution_obj())
+            np.testing.assert_allclose(duals[i], model.get_dual_values(), atol=1e-6)
+            np.testing.assert_allclose(red_costs[i], model.get_dual_reduced_costs(), atol=1e-6)
+
+    def test_last_optimal_basis_starts_a_new_instance(self):
+        model = lp(2.4)
+        model.solve()
+        basis = model.basis
+        self.assertEqual((len(basis[0]), len(basis[1])), (3, 3))
+        model.set_constraint_rhs((("A", 4),))
+        model.solve()
+        self.assertIs(model.basis, basis)
+
+        model.set_constraint_rhs((("A", 2.1),))
+        model._matrix_built = False
+        model.solve()
+        fresh = lp(2.1)
+        fresh.solve()
+        np.testing.assert_allclose(model.get_solution_vec(), fresh.get_solution_vec(), atol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,210 @@
+import time
+import unittest
+import warnings
+
+import model  # noqa: F401, resolves the model <-> optimizer import cycle
+from optimizer.numerical_methods import Searcher, Status, Algorithms, EvaluationCache, piece_columns
+
+
+class ConcaveModel:
+    """Stand-in for lp_model.Model: concave profit in CNEm, infeasible outside [feasible_lb, feasible_ub]"""
+    prefix_id = ""
+
+    def __init__(self, optimum=1.7, feasible_lb=1.1, feasible_ub=2.6, delay=0.0):
+        self.optimum = optimum
+        self.feasible_lb = feasible_lb
+        self.feasible_ub = feasible_ub
+        self.delay = delay
+        self.calls = 0
+
+    def run(self, p_id, p_cnem):
+        self.calls += 1
+        if self.delay > 0:
+            time.sleep(self.delay)
+        if not self.feasible_lb <= p_cnem <= self.feasible_ub:
+            return None
+        return {"Problem_ID": p_id, "CNEm": p_cnem, "obj_func": 500 - 100 * (p_cnem - self.optimum) ** 2}
+
+
+class PiecewiseModel(ConcaveModel):
+    """Stand-in with an optimal dual solution that changes at breakpoints, where the objective may have a kink"""
+
+    def __init__(self, breakpoints, objective, piece=None, feasible_lb=0.0):
+        """:param piece: dual signature of the piece a CNEm falls in, the index of the piece if None"""
+        super().__init__(feasible_lb=feasible_lb, feasible_ub=10.0)
+        self.breakpoints = breakpoints
+        self.objective = objective
+        self.piece = piece or (lambda index: index)
+
+    def run(self, p_id, p_cnem):
+        self.calls += 1
+        if not self.feasible_lb <= p_cnem <= self.feasible_ub:
+            return None
+        piece = self.piece(sum(p_cnem > breakpoint for breakpoint in self.breakpoints))
+        return {"Problem_ID": p_id, "CNEm": p_cnem, "obj_func": self.objective(p_cnem),
+                "A_dual": 1.0, "x1_red_cost": float(piece)}
+
+
+class TestSearcher(unittest.TestCase):
+
+    def test_algorithms_find_optimum(self):
+        for algorithm in ["BF", "GSS", "BRENT"]:
+            searcher = Searcher(ConcaveModel())
+            searcher.run_scenario(Algorithms[algorithm], 0.8, 3.0, 0.01)
+            status, best = searcher.get_results(best=True)
+            self.assertEqual(status, Status.SOLVED)
+            self.assertAlmostEqual(best["CNEm"], 1.7, delta=0.01)
+
+    def test_time_budget_keeps_best_so_far(self):
+        searcher = Searcher(ConcaveModel(feasible_lb=0.8, delay=0.002))
+        searcher.set_deadline(time.time() + 0.05)
+        searcher.run_scenario(Algorithms["BF"], 0.8, 3.0, 0.001)
+        status, solutions = searcher.get_results()
+        self.assertEqual(status, Status.TIMED_OUT)
+        self.assertEqual(len(solutions), 1)
+
+    def test_warm_search_window(self):
+        model = ConcaveModel(optimum=1.72)
+        searcher = Searcher(model)
+        self.assertTrue(searcher.warm_search(Algorithms["GSS"], 0.8, 3.0, 0.01, 1.7, 0.1))
+        status, best = searcher.get_results(best=True)
+        self.assertAlmostEqual(best["CNEm"], 1.72, delta=0.01)
+
+        cold = ConcaveModel(optimum=1.72)
+        Searcher(cold).run_scenario(Algorithms["GSS"], 0.8, 3.0, 0.01)
+        self.assertLess(model.calls, cold.calls)
+
+    def test_warm_search_falls_back(self):
+        # optimum moved out of the window
+        searcher = Searcher(ConcaveModel(optimum=2.2))
+        self.assertFalse(searcher.warm_search(Algorithms["GSS"], 0.8, 3.0, 0.01, 1.7, 0.1))
+        # window infeasible
+        self.assertFalse(Searcher(ConcaveModel()).warm_search(Algorithms["GSS"], 0.8, 3.0, 0.01, 0.9, 0.1))
+        # optimum at the domain bound, not a window edge
+        searcher = Searcher(ConcaveModel(optimum=1.0, feasible_lb=1.05))
+        self.assertTrue(searcher.warm_search(Algorithms["GSS"], 0.8, 3.0, 0.01, 1.1, 0.1))
+
+    def test_bisection_finds_the_scan_bounds(self):
+        for feasible_lb, feasible_ub in [(1.1, 2.6), (0.8, 1.3), (2.95, 3.0), (0.5, 4.0), (1.234, 1.236)]:
+            scan = ConcaveModel(feasible_lb=feasible_lb, feasible_ub=feasible_ub)
+            bisection = ConcaveModel(feasible_lb=feasible_lb, feasible_ub=feasible_ub)
+            expected = Searcher(scan, bracketing="scan").refine_bounds(0.8, 3.0, 0.01)
+            self.assertEqual(Searcher(bisection).refine_bounds(0.8, 3.0, 0.01), expected)
+            self.assertLessEqual(bisection.calls, scan.calls)
+        bisection = ConcaveModel(feasible_lb=1.1, feasible_ub=2.6)
+        Searcher(bisection).refine_bounds(0.8, 3.0, 0.0001)
+        self.assertLess(bisection.calls, 40)
+        self.assertEqual(Searcher(ConcaveModel(feasible_lb=3.5)).refine_bounds(0.8, 3.0, 0.01), (None, None))
+
+    def test_repeated_cnem_are_not_solved_again(self):
+        model = ConcaveModel()
+        searcher = Searcher(model)
+        searcher.run_scenario(Algorithms["BF"], 0.8, 3.0, 0.01, uncertain_bounds=True)
+        calls = model.calls
+        searcher.run_scenario(Algorithms["BF"], 0.8, 3.0, 0.01, uncertain_bounds=True)
+        self.assertEqual(model.calls, calls)
+        self.assertEqual(searcher.cache.misses, calls)
+        self.assertGreater(searcher.cache.hits, calls)
+        status, best = searcher.get_results(best=True)
+        self.assertAlmostEqual(best["CNEm"], 1.7, delta=0.01)
+
+        model = ConcaveModel()
+        searcher = Searcher(model, cache_size=0)
+        searcher.refine_bounds(0.8, 3.0, 0.01)
+        calls = model.calls
+        searcher.refine_bounds(0.8, 3.0, 0.01)
+        self.assertEqual(model.calls, 2 * calls)
+
+    def test_parametric_search_finds_kink_optimum(self):
+        model = PiecewiseModel([1.2, 1.5 + 1e-4, 1.9], lambda cnem: 500 - 100 * abs(cnem - 1.5 - 1e-4))
+        searcher = Searcher(model)
+        searcher.run_scenario(Algorithms["PARAM"], 0.8, 3.0, 0.01, uncertain_bounds=False)
+        status, best = searcher.get_results(best=True)
+        self.assertEqual(status, Status.SOLVED)
+        self.assertAlmostEqual(best["CNEm"], 1.5001, delta=1e-6)
+        pieces = searcher.get_pieces()
+        self.assertEqual(len(pieces), 4)
+        for (lo, hi, optimum, value), breakpoint in zip(pieces, [1.2, 1.5001, 1.9]):
+            self.assertLessEqual(hi, breakpoint)
+            self.assertLessEqual(breakpoint - hi, 0.01)
+        self.assertLess(model.calls, Searcher.estimate_evaluations("BF", 0.8, 3.0, 0.01))
+
+    def test_parametric_search_finds_optimum_inside_piece(self):
+        model = PiecewiseModel([1.2, 1.9], lambda cnem: 500 - 100 * (cnem - 1.7) ** 2)
+        searcher = Searcher(model)
+        searcher.run_scenario(Algorithms["PARAM"], 0.8, 3.0, 0.01, uncertain_bounds=False)
+        status, best = searcher.get_results(best=True)
+        self.assertAlmostEqual(best["CNEm"], 1.7, delta=0.01)
+        self.assertEqual(len(searcher.get_pieces()), 3)
+
+    def test_parametric_search_probes_inside_equal_ends(self):
+        # the duals at both ends of the domain are the same, the middle piece is only found by probing
+        model = PiecewiseModel([1.5, 2.0], lambda cnem: 500 - 100 * abs(cnem - 1.75), piece=lambda index: index % 2)
+        searcher = Searcher(model)
+        searcher.run_scenario(Algorithms["PARAM"], 0.8, 3.0, 0.01, uncertain_bounds=False)
+        status, solutions = searcher.get_results()
+        pieces = searcher.get_pieces()
+        self.assertEqual(len(pieces), 3)
+        for (lo, hi, optimum, value), breakpoint in zip(pieces, [1.5, 2.0]):
+            self.assertLessEqual(breakpoint - hi, 0.01)
+        self.assertAlmostEqual(max(solutions, key=lambda sol: sol["obj_func"])["CNEm"], 1.75, delta=0.01)
+        # the breakpoint table goes out with the solutions
+        self.assertEqual(sorted({sol["Piece"] for sol in solutions}), [0, 1, 2])
+        for sol in solutions:
+            self.assertEqual(tuple(sol[column] for column in piece_columns[1:]), pieces[sol["Piece"]])
+
+    def test_brent_needs_fewer_evaluations_than_gss(self):
+        for optimum in [0.9, 1.3, 1.7, 2.5]:
+            gss, brent = ConcaveModel(optimum=optimum), ConcaveModel(optimum=optimum)
+            Searcher(gss).run_scenario(Algorithms["GSS"], 1.1, 2.6, 0.001, uncertain_bounds=False)
+            searcher = Searcher(brent, objective_tol=0.0)
+            searcher.run_scenario(Algorithms["BRENT"], 1.1, 2.6, 0.001, uncertain_bounds=False)
+            status, best = searcher.get_results(best=True)
+            self.assertAlmostEqual(best["CNEm"], min(max(optimum, 1.1), 2.6), delta=0.001)
+            self.assertLess(brent.calls, gss.calls)
+
+    def test_brent_stops_on_flat_objective(self):
+        model = PiecewiseModel([], lambda cnem: 500 - 0.001 * abs(cnem - 1.7))
+        searcher = Searcher(model, objective_tol=0.01)
+        searcher.run_scenario(Algorithms["BRENT"], 0.8, 3.0, 1e-6, uncertain_bounds=False)
+        self.assertEqual(model.calls, 4)
+        model = PiecewiseModel([], lambda cnem: 500 - 0.001 * abs(cnem - 1.7))
+        searcher = Searcher(model, objective_tol=0.0, objective_rtol=1e-4)
+        searcher.run_scenario(Algorithms["BRENT"], 0.8, 3.0, 1e-6, uncertain_bounds=False)
+        self.assertEqual(model.calls, 4)
+
+    def test_brent_relative_tolerance_ignores_infeasible_incumbent(self):
+        # the first point, 0.8 + 0.38 * 2.2 = 1.64, is infeasible: the first feasible step is not flat
+        model = PiecewiseModel([], lambda cnem: 500 - 0.001 * abs(cnem - 1.7), feasible_lb=1.7)
+        searcher = Searcher(model, objective_tol=0.0, objective_rtol=1e-4)
+        with warnings.catch_warnings():
+            # no parabola is fitted through infeasible CNEm
+            warnings.simplefilter("error", RuntimeWarning)
+            searcher.run_scenario(Algorithms["BRENT"], 0.8, 3.0, 1e-6, uncertain_bounds=False)
+        self.assertEqual(model.calls, 5)
+
+    def test_estimate_evaluations(self):
+        self.assertGreater(Searcher.estimate_evaluations("BF", 0.8, 3.0, 0.01),
+                           Searcher.estimate_evaluations("GSS", 0.8, 3.0, 0.01))
+
+
+class TestEvaluationCache(unittest.TestCase):
+
+    def test_quantized_keys_and_size(self):
+        cache = EvaluationCache(size=2)
+        cache.put(1.0, {"CNEm": 1.0})
+        cache.put(1.1, None)
+        self.assertEqual(cache.get(1.0 + 1e-12), (True, {"CNEm": 1.0}))
+        self.assertEqual(cache.get(1.1), (True, None))
+        self.assertEqual(cache.get(1.2), (False, None))
+        cache.put(1.2, None)
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get(1.0), (False, None))
+        self.assertEqual((cache.hits, cache.misses), (2, 2))
+        disabled = EvaluationCache(size=0)
+        disabled.put(1.0, None)
+        self.assertEqual(len(disabled), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+import numpy as np
+
+from optimizer import scipy_solver, lp_fixtures
+from optimizer.basis_cache import BASIC, LOWER, UPPER
+
+
+def lp(rhs_a):
+    return lp_fixtures.lp(rhs_a, scipy_solver.Model)
+
+
+class TestScipyModel(unittest.TestCase):
+
+    def test_solution_and_duals(self):
+        model = lp(2.4)
+        model.solve()
+        self.assertEqual(model.get_solution_status(), "optimal")
+        np.testing.assert_allclose(model.get_solution_vec(), [0.8, 0.2, 0], atol=1e-6)
+        self.assertAlmostEqual(model.get_solution_obj(), 1.2, places=6)
+        # HiGHS signs: row duals -2 (sum at its upper bound) and 1/3 (A at its lower bound) for the min problem
+        np.testing.assert_allclose(model.get_dual_values(), [-2, 1 / 3, 0], atol=1e-6)
+        np.testing.assert_allclose(model.get_dual_reduced_costs(), [0, 0, -2], atol=1e-6)
+        self.assertEqual(list(model.basis[0]), [BASIC, BASIC, LOWER])
+        self.assertEqual(list(model.basis[1]), [UPPER, LOWER, BASIC])
+
+    def test_updates_and_infeasible(self):
+        model = lp(2.4)
+        model.solve()
+        model.set_constraint_rhs((("A", 4),))
+        model.solve()
+        self.assertEqual(model.get_solution_status(), "infeasible")
+        model.set_constraint_coefficients([("A", "x1", 5.0)])
+        model.solve()
+        np.testing.assert_allclose(model.get_solution_vec(), [0.8, 0.2, 0], atol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
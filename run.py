@@ -1,19 +1,85 @@
 from model import diet
+from model.output_handler import merge_outputs
+from model import server
+from config import SERVER_ADDRESS
+import argparse
+import json
 import time
 import logging
 
 if __name__ == "__main__":
     start_time = time.time()
 
+    parser = argparse.ArgumentParser(description="Max profit diet optimization")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="number of processes solving scenarios in parallel (default: config.N_WORKERS)")
+    parser.add_argument("--resume", action="store_true", default=None,
+                        help="continue an interrupted run, skipping scenarios already completed")
+    parser.add_argument("--workspace", default=None,
+                        help="empty folder (or one left by an interrupted run) for this run's partial results "
+                             "(default: unique folder in model/temp_output/)")
+    parser.add_argument("--shard", default=None, metavar="i/N",
+                        help="solve only the i-th of N slices of the scenarios, 0 <= i < N (default: config.SHARD)")
+    parser.add_argument("--shard-mode", choices=["hash", "range"], default=None,
+                        help="split scenario IDs by hash or by contiguous ranges (default: config.SHARD_MODE)")
+    parser.add_argument("--scenario-budget", type=float, default=None, metavar="SECONDS",
+                        help="time budget per scenario, the best solution so far is reported as TIMED_OUT "
+                             "(default: config.SCENARIO_TIME_BUDGET)")
+    parser.add_argument("--run-budget", type=float, default=None, metavar="SECONDS",
+                        help="time budget for the whole run, scenarios left are not solved "
+                             "(default: config.RUN_TIME_BUDGET)")
+    parser.add_argument("--grid", default=None, metavar="FILE",
+                        help="JSON grid spec expanded into the scenarios to solve, see model/grid.py "
+                             "(default: config.GRID)")
+    parser.add_argument("--incremental", nargs="?", const=True, default=None, metavar="DIR",
+                        help="only solve scenarios whose inputs changed since a previous run, carrying over the "
+                             "other results (default folder: latest in ./Output/)")
+    parser.add_argument("--warm-start", nargs="?", const=True, default=None, metavar="DIR",
+                        help="search only a window around the optimal CNEm of a previous run, e.g. after a price "
+                             "update (default folder: latest in ./Output/)")
+    parser.add_argument("--warm-window", type=float, default=None, metavar="CNEM",
+                        help="half width of the warm start window (default: config.WARM_WINDOW)")
+    parser.add_argument("--merge", nargs="+", default=None, metavar="DIR",
+                        help="merge the Output folders of sharded runs instead of optimizing")
+    parser.add_argument("--merge-into", default=None, metavar="DIR",
+                        help="folder for merged results (default: new folder in ./Output/)")
+    parser.add_argument("--serve", nargs="?", const=SERVER_ADDRESS, default=None, metavar="[HOST:]PORT",
+                        help="keep data and solver warm and answer diet quotes over HTTP "
+                             "(default address: config.SERVER_ADDRESS)")
+    parser.add_argument("--log", default=None,
+                        help="log file (default: activity.log, activity_shard<i>of<N>.log for shards)")
+    args = parser.parse_args()
+
+    log_file = args.log
+    if log_file is None:
+        log_file = "activity.log"
+        if args.shard is not None:
+            log_file = "activity_shard{0}of{1}.log".format(*diet.parse_shard(args.shard))
+
     fmt_str = "%(asctime)s: %(levelname)s: %(funcName)s Line:%(lineno)d %(message)s"
-    logging.basicConfig(filename="activity.log",
+    logging.basicConfig(filename=log_file,
                         level=logging.DEBUG,
                         filemode="w",
                         format=fmt_str)
 
-    diet_opt = diet.Diet()
-    diet_opt.initialize("Starting diet.py")
-    diet_opt.run()
+    grid = None
+    if args.grid is not None:
+        with open(args.grid, "r", encoding="utf-8") as file:
+            grid = json.load(file)
+
+    if args.merge is not None:
+        print(merge_outputs(args.merge, args.merge_into))
+    elif args.serve is not None:
+        diet_opt = diet.Diet(n_workers=args.workers)
+        diet_opt.load_data("Starting quote server")
+        server.QuoteServer(diet_opt, diet_opt.n_workers).serve(*server.parse_address(args.serve))
+    else:
+        diet_opt = diet.Diet(n_workers=args.workers, resume=args.resume, workspace=args.workspace,
+                             shard=args.shard, shard_mode=args.shard_mode,
+                             scenario_time_budget=args.scenario_budget, run_time_budget=args.run_budget,
+                             grid=grid, incremental=args.incremental,
+                             warm_start=args.warm_start, warm_window=args.warm_window)
+        diet_opt.initialize("Starting diet.py")
+        diet_opt.run()
     elapsed_time = time.time() - start_time
     print(elapsed_time)
-